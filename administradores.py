@@ -0,0 +1,61 @@
+'''
+Concessão e remoção do acesso de administrador.
+
+O cadastro pela API (/auth/criar_conta) sempre cria usuários comuns; o acesso de
+administrador é concedido por este comando, executado por quem tem acesso ao banco:
+
+    python -m administradores ana@email.com              # concede
+    python -m administradores ana@email.com --remover    # remove
+
+A alteração vale para os próximos tokens de acesso do usuário (novo login ou /auth/refresh,
+que relê o usuário do banco); os tokens de acesso já emitidos valem até expirar.
+'''
+
+# Importa o 'argparse' e o 'asyncio', usados pelo comando.
+import argparse
+import asyncio
+
+# Importa os construtores de comandos do SQLAlchemy.
+from sqlalchemy import update, func
+
+# Importa a função que prende a sessão ao banco principal.
+from database import usar_primario
+
+# Importa o modelo da tabela de usuários.
+from models import Usuario
+
+
+async def definir_admin(session, email, admin=True):
+    '''
+    Concede (ou remove) o acesso de administrador do usuário com o e-mail informado.
+    Retorna False se o e-mail não estiver cadastrado.
+    '''
+
+    usar_primario(session)
+    resultado = await session.execute(
+        update(Usuario).where(func.lower(Usuario.email) == email.strip().lower()).values(admin=admin)
+    )
+    await session.commit()
+    return resultado.rowcount > 0
+
+
+async def _executar(email, admin):
+    from database import iniciar_banco, encerrar_banco, pegar_fabrica_sessoes
+
+    iniciar_banco()
+    try:
+        async with pegar_fabrica_sessoes()() as session:
+            return await definir_admin(session, email, admin)
+    finally:
+        await encerrar_banco()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concede ou remove o acesso de administrador de um usuário.')
+    parser.add_argument('email', help='e-mail do usuário')
+    parser.add_argument('--remover', action='store_true', help='remove o acesso em vez de concedê-lo')
+    args = parser.parse_args()
+
+    if not asyncio.run(_executar(args.email, not args.remover)):
+        raise SystemExit(f'Usuário não encontrado: {args.email}')
+    print(f'Acesso de administrador {"removido de" if args.remover else "concedido a"} {args.email}.')
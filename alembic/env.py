@@ -28,6 +28,12 @@ from models import Base
 
 target_metadata = Base.metadata
 
+# Usa a mesma URL (síncrona) configurada para a aplicação via DATABASE_URL / .env.
+# O '%' é escapado porque o alembic interpreta o valor com a sintaxe do configparser.
+from config import pegar_settings
+
+config.set_main_option('sqlalchemy.url', pegar_settings().database_url.replace('%', '%%'))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -0,0 +1,58 @@
+"""Use AUTOINCREMENT ids for orders and order items
+
+Revision ID: 8b3e6f1c2a47
+Revises: c5f96cda21cc
+Create Date: 2026-10-17 05:02:11.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3e6f1c2a47'
+down_revision: Union[str, Sequence[str], None] = 'c5f96cda21cc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Tabelas principais e as respectivas tabelas de arquivo (que guardam os IDs já usados).
+TABELAS = (('pedidos', 'pedidos_arquivados'), ('itens_pedido', 'itens_pedido_arquivados'))
+
+
+def _recriar(autoincremento):
+    # No SQLite, AUTOINCREMENT só pode ser definido na criação da tabela: o modo 'batch'
+    # recria as tabelas (o índice parcial da fila é removido antes e recriado depois).
+    op.drop_index('ix_pedidos_fila', table_name='pedidos', sqlite_where=sa.text("status = 'PENDENTE'"))
+    for tabela, _ in TABELAS:
+        with op.batch_alter_table(tabela, recreate='always', table_kwargs={'sqlite_autoincrement': autoincremento}):
+            pass
+    op.create_index('ix_pedidos_fila', 'pedidos', ['id', 'reservado_ate'], unique=False, sqlite_where=sa.text("status = 'PENDENTE'"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nos demais bancos, os IDs já vêm de sequências, que nunca reutilizam valores.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    _recriar(True)
+
+    # Os próximos IDs continuam depois do maior ID já usado, inclusive os de pedidos e itens
+    # arquivados (ou removidos antes desta migração, se ainda estiverem no arquivo).
+    for tabela, arquivo in TABELAS:
+        op.execute(sa.text(f"DELETE FROM sqlite_sequence WHERE name = '{tabela}'"))
+        op.execute(sa.text(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT '{tabela}', max(coalesce(max(t.id), 0), "
+            f"(SELECT coalesce(max(a.id), 0) FROM {arquivo} a)) FROM {tabela} t"
+        ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    _recriar(False)
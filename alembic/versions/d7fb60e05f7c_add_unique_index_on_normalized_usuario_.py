@@ -0,0 +1,32 @@
+"""Add unique index on normalized usuario email
+
+Revision ID: d7fb60e05f7c
+Revises: c6f51578994d
+Create Date: 2026-10-17 04:04:38.108375
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7fb60e05f7c'
+down_revision: Union[str, Sequence[str], None] = 'c6f51578994d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Normaliza os e-mails já cadastrados (a aplicação passa a gravá-los em minúsculas).
+    # Se existirem e-mails duplicados após a normalização, a criação do índice falha
+    # e os registros repetidos precisam ser resolvidos manualmente antes da migração.
+    op.execute("UPDATE usuarios SET email = lower(trim(email))")
+    op.create_index('ix_usuarios_email_lower', 'usuarios', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_usuarios_email_lower', table_name='usuarios')
@@ -0,0 +1,140 @@
+'''
+Arquivamento de pedidos encerrados.
+
+Move os pedidos FINALIZADOS e CANCELADOS criados há mais de N dias (e seus itens) das
+tabelas 'pedidos' e 'itens_pedido' para 'pedidos_arquivados' e 'itens_pedido_arquivados',
+em lotes. As tabelas principais e seus índices ficam apenas com os pedidos recentes,
+pequenos o bastante para permanecer no cache do banco.
+
+Cada lote é uma transação própria (cópia + remoção): se o processo for interrompido,
+os lotes já confirmados ficam arquivados e os demais continuam nas tabelas principais;
+basta executar o comando de novo para continuar de onde parou.
+
+    python -m arquivamento                       # ARQUIVAMENTO_DIAS / ARQUIVAMENTO_LOTE
+    python -m arquivamento --dias 90 --lote 500 --max-lotes 20
+'''
+
+# Importa o 'argparse' e o 'asyncio', usados pelo comando de arquivamento.
+import argparse
+import asyncio
+
+# Importa o 'timedelta', usado no limite de idade dos pedidos arquivados.
+from datetime import timedelta
+
+# Importa os construtores de comandos do SQLAlchemy.
+from sqlalchemy import select, insert, delete, literal, DateTime
+
+# Importa as configurações da aplicação (idade mínima, tamanho do lote e pausa entre lotes).
+from config import pegar_settings
+
+# Importa a função que prende a sessão ao banco principal (o arquivamento lê e grava as mesmas linhas).
+from database import usar_primario
+
+# Importa os modelos das tabelas principais e de arquivo, e os status de pedido encerrado.
+from models import Pedido, ItensPedido, PedidoArquivado, ItemPedidoArquivado, STATUS_FINALIZADO, STATUS_CANCELADO, agora_utc
+
+# Importa a marcação das alterações que invalidam o cache de respostas (as listagens deixam de mostrar os pedidos arquivados).
+from cache_respostas import marcar_alteracao
+
+
+COLUNAS_PEDIDO = ('id', 'status', 'usuario', 'preco', 'versao', 'criado_em')
+COLUNAS_ITEM = ('id', 'quantidade', 'sabor', 'tamanho', 'preco_unitario', 'pedido')
+
+
+async def arquivar_lote(session, limite, tamanho_lote):
+    '''
+    Arquiva até 'tamanho_lote' pedidos encerrados criados antes de 'limite', em uma transação.
+    Retorna a quantidade de pedidos arquivados (0 quando não há mais o que arquivar).
+
+    Os IDs originais são preservados no arquivo: as tabelas principais usam AUTOINCREMENT
+    no SQLite (e sequências nos demais bancos), então um ID arquivado nunca é reutilizado.
+    '''
+
+    usar_primario(session)
+
+    ids = (await session.execute(
+        select(Pedido.id)
+        .where(
+            Pedido.status.in_((STATUS_FINALIZADO, STATUS_CANCELADO)),
+            Pedido.criado_em < limite,
+        )
+        .order_by(Pedido.id)
+        .limit(tamanho_lote)
+    )).scalars().all()
+
+    if not ids:
+        await session.rollback()
+        return 0
+
+    # Copia os pedidos e os itens para as tabelas de arquivo (INSERT ... SELECT, sem passar pela aplicação).
+    agora = literal(agora_utc(), DateTime)
+    await session.execute(insert(PedidoArquivado).from_select(
+        [*COLUNAS_PEDIDO, 'arquivado_em'],
+        select(*(getattr(Pedido, coluna) for coluna in COLUNAS_PEDIDO), agora).where(Pedido.id.in_(ids))
+    ))
+    await session.execute(insert(ItemPedidoArquivado).from_select(
+        list(COLUNAS_ITEM),
+        select(*(getattr(ItensPedido, coluna) for coluna in COLUNAS_ITEM)).where(ItensPedido.pedido.in_(ids))
+    ))
+
+    # Remove os originais (itens antes dos pedidos, por causa da chave estrangeira).
+    await session.execute(delete(ItensPedido).where(ItensPedido.pedido.in_(ids)))
+    usuarios = (await session.execute(
+        delete(Pedido).where(Pedido.id.in_(ids)).returning(Pedido.usuario)
+    )).scalars().all()
+
+    marcar_alteracao(session, usuarios=set(usuarios), pedidos=ids)
+    await session.commit()
+    return len(ids)
+
+
+async def arquivar(fabrica_sessoes, dias, tamanho_lote, pausa_ms=0, max_lotes=None):
+    '''
+    Arquiva os pedidos encerrados criados há mais de 'dias' dias, lote a lote, até não
+    restar nenhum (ou até 'max_lotes' lotes). Retorna a quantidade de pedidos arquivados.
+
+    Cada lote usa uma sessão nova e, entre os lotes, o comando pausa 'pausa_ms' para que
+    as requisições não fiquem esperando pelo banco (no SQLite, um escritor por vez).
+    '''
+
+    limite = agora_utc() - timedelta(days=dias)
+    total = 0
+    lotes = 0
+
+    while max_lotes is None or lotes < max_lotes:
+        async with fabrica_sessoes() as session:
+            arquivados = await arquivar_lote(session, limite, tamanho_lote)
+        if not arquivados:
+            break
+
+        total += arquivados
+        lotes += 1
+        print(f'Lote {lotes}: {arquivados} pedidos arquivados ({total} no total).', flush=True)
+        await asyncio.sleep(pausa_ms / 1000)
+
+    return total
+
+
+async def _executar(args):
+    from database import iniciar_banco, encerrar_banco, pegar_fabrica_sessoes
+
+    iniciar_banco()
+    try:
+        return await arquivar(pegar_fabrica_sessoes(), args.dias, args.lote, args.pausa_ms, args.max_lotes)
+    finally:
+        await encerrar_banco()
+
+
+if __name__ == '__main__':
+    settings = pegar_settings()
+
+    parser = argparse.ArgumentParser(description='Arquiva os pedidos encerrados antigos.')
+    parser.add_argument('--dias', type=int, default=settings.arquivamento_dias,
+                        help='idade mínima (pela data de criação) dos pedidos arquivados')
+    parser.add_argument('--lote', type=int, default=settings.arquivamento_lote, help='pedidos por transação')
+    parser.add_argument('--pausa-ms', type=int, default=settings.arquivamento_pausa_ms, help='pausa entre os lotes')
+    parser.add_argument('--max-lotes', type=int, help='interrompe após esta quantidade de lotes (padrão: sem limite)')
+    args = parser.parse_args()
+
+    total = asyncio.run(_executar(args))
+    print(f'{total} pedidos arquivados.')
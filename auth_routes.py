@@ -2,30 +2,56 @@
 # Também importa Depends (para injeção de dependências) e HTTPException (para erros HTTP personalizados).
 from fastapi import APIRouter, Depends, HTTPException
 
+# Importa o Request, usado para identificar o IP do cliente no limite de tentativas de login.
+from fastapi import Request
+
 # Importa o modelo de banco de dados 'Usuario' definido no módulo 'models'.
 from models import Usuario
 
 # Importa a função responsável por gerenciar a sessão com o banco de dados.
 from dependencies import pegar_sessao
 
-# Importa o contexto de criptografia bcrypt definido no arquivo principal (main.py).
-from main import bcrypt_context
+# Importa a função que prende a sessão ao banco principal (o login não pode depender do atraso das réplicas).
+from database import usar_primario
+
+# Importa o serviço de hash de senhas, que executa o bcrypt em um pool de threads próprio,
+# e as funções que emitem e verificam os tokens de acesso (JWT).
+from security import servico_hash, criar_token, verificar_token, TOKEN_REFRESH
+
+# Importa o limitador de tentativas de login (balde de tokens por IP/e-mail e bloqueio).
+from limitador import pegar_limitador_login
 
 # Importa o schema de validação 'UsuarioSchema', que define como os dados do usuário devem ser recebidos e validados.
 # Importa o schema de validação 'LoginSchema', que define como os dados do login devem ser recebidos e validados.
-from schemas import UsuarioSchema, LoginSchema
+# Importa o schema 'RefreshSchema', usado na renovação do token de acesso.
+from schemas import UsuarioSchema, LoginSchema, RefreshSchema
 
-# Importa o tipo 'Session' do SQLAlchemy, usado para digitar a dependência do banco.
-from sqlalchemy.orm import Session
+# Importa o 'select', o 'update' e o 'func', usados para montar as consultas no estilo do SQLAlchemy 2.0,
+# e o IntegrityError, lançado quando o índice único de e-mail recusa um cadastro duplicado.
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError
+
+# Importa o tipo 'AsyncSession' do SQLAlchemy, usado para digitar a dependência do banco.
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 # Cria um roteador específico para autenticação.
 # Todas as rotas desse módulo terão o prefixo '/auth' e serão agrupadas sob a tag 'auth' na documentação do FastAPI.
 auth_router = APIRouter(prefix='/auth', tags=['auth'])
 
-def criar_token(id_usuario):
-    token = f'fue8350je373$.{id_usuario}'
-    return token
+async def buscar_usuario_por_email(session: AsyncSession, email):
+    '''
+    Busca um usuário pelo e-mail normalizado.
+
+    A comparação usa 'lower(email)', exatamente a expressão do índice único
+    'ix_usuarios_email_lower', então o banco localiza o usuário pelo índice
+    (tempo praticamente constante), sem percorrer a tabela de usuários.
+    '''
+
+    resultado = await session.execute(select(Usuario).where(func.lower(Usuario.email) == email))
+    return resultado.scalars().first()
+
+
 
 
 @auth_router.get('/')
@@ -45,68 +71,65 @@ async def home():
 
 
 @auth_router.post('/criar_conta')
-async def criar_conta(usuario_schema: UsuarioSchema, session: Session = Depends(pegar_sessao)):
+async def criar_conta(usuario_schema: UsuarioSchema, session: AsyncSession = Depends(pegar_sessao)):
     '''
     Rota responsável por criar um novo usuário no banco de dados.
 
     Parâmetros:
-    - usuario_schema: objeto validado via Pydantic (contém nome, e-mail, senha, ativo e admin).
+    - usuario_schema: objeto validado via Pydantic (contém nome, e-mail, senha e ativo).
     - session: instância de sessão do SQLAlchemy, gerenciada automaticamente pela dependência 'pegar_sessao'.
 
     Processo:
-    1. Verifica se o e-mail informado já existe no banco.
-    2. Se existir, lança uma exceção HTTP 400.
-    3. Se não existir, criptografa a senha com bcrypt.
-    4. Cria um novo registro de usuário no banco.
-    5. Retorna mensagem de sucesso.
+    1. Criptografa a senha (bcrypt, ou o algoritmo configurado em SENHA_ESQUEMAS).
+    2. Insere o novo usuário no banco (sempre sem acesso de administrador).
+    3. Se o e-mail já existir, o índice único de e-mail recusa o INSERT e a rota responde 400.
+    4. Retorna mensagem de sucesso.
+
+    A duplicidade é verificada pelo próprio banco (índice único em lower(email)), e não por
+    uma consulta prévia: assim, dois cadastros simultâneos do mesmo e-mail não passam ambos
+    pela verificação, e o cadastro custa um único comando no banco.
 
     Observação:
     - Em um cenário real, seria necessário validar:
         • formato do e-mail;
         • força e comprimento da senha;
-        • duplicidade de e-mails;
         • política de criação de usuários (ex: apenas admin pode criar novos usuários).
     '''
 
-    # Verifica se já existe um usuário com o e-mail informado.
-    usuario = session.query(Usuario).filter(Usuario.email == usuario_schema.email).first()
-    
-    # Se o usuário já existe, retorna erro HTTP 400 (Bad Request).
-    if usuario:
-        raise HTTPException(status_code=400, detail='E-mail do usuário já cadastrado.') 
-
-    else:
-        # Garante que a senha tenha um tamanho máximo de 72 bytes antes da criptografia.
-        # Isso evita erros no bcrypt, que tem esse limite.
-        senha_ajustada = usuario_schema.senha.encode("utf-8")[:72].decode("utf-8", errors="ignore")
-
-        # Criptografa a senha usando o contexto bcrypt definido no main.py.
-        senha_criptografada = bcrypt_context.hash(senha_ajustada)
-
-        # Cria uma nova instância do modelo 'Usuario' para ser persistida no banco.
-        novo_usuario = Usuario(
-            nome=usuario_schema.nome,
-            email=usuario_schema.email,
-            senha=senha_criptografada,
-            ativo=usuario_schema.ativo,
-            admin=usuario_schema.admin
-        )
+    # Criptografa a senha no pool de threads do serviço de hash (sem bloquear o event loop).
+    # Se o pool estiver saturado, o serviço responde 429 (Too Many Requests).
+    # O limite de 72 bytes do bcrypt é tratado pelo próprio serviço.
+    senha_criptografada = await servico_hash.hash(usuario_schema.senha)
 
-        # Adiciona o novo usuário à sessão do banco.
-        session.add(novo_usuario)
+    # Cria uma nova instância do modelo 'Usuario' para ser persistida no banco.
+    novo_usuario = Usuario(
+        nome=usuario_schema.nome,
+        email=usuario_schema.email,
+        senha=senha_criptografada,
+        ativo=usuario_schema.ativo,
+        admin=False
+    )
 
+    # Adiciona o novo usuário à sessão do banco.
+    session.add(novo_usuario)
+
+    try:
         # Confirma a transação, salvando as alterações no banco de dados.
-        session.commit()
+        await session.commit()
+    except IntegrityError:
+        # O índice único recusou o e-mail: o usuário já existe.
+        await session.rollback()
+        raise HTTPException(status_code=400, detail='E-mail do usuário já cadastrado.')
 
-        # Retorna uma mensagem de sucesso com o e-mail do usuário criado.
-        return {'mensagem': f'Usuário cadastrado com sucesso: {usuario_schema.email}'}
+    # Retorna uma mensagem de sucesso com o e-mail do usuário criado.
+    return {'mensagem': f'Usuário cadastrado com sucesso: {usuario_schema.email}'}
 
     
 # ===============================================
 # 🔐 ROTA POST — Login de usuário
 # ===============================================
 @auth_router.post('/login')
-async def login(login_schema: LoginSchema, session: Session = Depends(pegar_sessao)):
+async def login(login_schema: LoginSchema, request: Request, session: AsyncSession = Depends(pegar_sessao)):
     '''
     Realiza o login de um usuário autenticando suas credenciais.
 
@@ -115,29 +138,85 @@ async def login(login_schema: LoginSchema, session: Session = Depends(pegar_sess
     - senha: senha em texto puro (que será comparada com a senha criptografada do banco).
 
     O retorno é um token de acesso (JWT, por exemplo), que será usado para autenticação nas demais rotas.
+
+    Tentativas acima do limite por IP ou por e-mail, ou de um e-mail bloqueado após várias
+    falhas seguidas, recebem 429 (com Retry-After) antes de qualquer consulta ao banco ou
+    verificação de senha.
     '''
 
-    # Busca o usuário no banco de dados com base no e-mail informado.
-    usuario = session.query(Usuario).filter(UsuarioSchema.email == login_schema).first()
+    # Recusa a tentativa se o IP ou o e-mail excederam o limite (429), sem tocar no banco nem no bcrypt.
+    limitador = pegar_limitador_login()
+    await limitador.verificar(request.client.host if request.client else 'desconhecido', login_schema.email)
+
+    # Busca o usuário no banco de dados com base no e-mail informado (já normalizado pelo schema).
+    # A busca vai ao banco principal: uma réplica atrasada não reconheceria uma conta recém-criada.
+    usar_primario(session)
+    usuario = await buscar_usuario_por_email(session, login_schema.email)
+
+    # Devolve a conexão ao pool antes da verificação da senha (operação lenta do bcrypt).
+    await session.close()
 
     # Se o usuário não existir, lança um erro 400 (Bad Request).
     if not usuario:
+        await limitador.registrar_falha(login_schema.email)
         raise HTTPException(status_code=400, detail='Usuário não encontrado')
 
     # Verifica se a senha informada confere com a senha armazenada (criptografada).
-    senha_valida = bcrypt_context.verify(login_schema.senha, usuario.senha)
+    # A verificação roda no pool de threads do serviço de hash, liberando o event loop.
+    # Se o hash usar parâmetros antigos (outro algoritmo ou custo), um novo hash é gerado.
+    senha_valida, novo_hash = await servico_hash.verify_and_update(login_schema.senha, usuario.senha)
 
     # Caso a senha esteja incorreta, retorna erro 401 (não autorizado).
     if not senha_valida:
+        await limitador.registrar_falha(login_schema.email)
         raise HTTPException(status_code=401, detail='Senha incorreta')
 
-    # Caso o login seja bem-sucedido, gera um token de acesso.
-    # OBS: A função "criar_token" deve ser implementada em um módulo de utilitários
-    # (ex: utils/security.py) e retornar um JWT contendo o ID do usuário.
-    access_token = criar_token(usuario.id)
+    await limitador.registrar_sucesso(login_schema.email)
 
-    # Retorna o token e o tipo do token (padrão Bearer).
+    # Regrava o hash com os parâmetros atuais (acontece uma única vez por usuário após a mudança).
+    # O UPDATE é condicional ao hash antigo, para não sobrescrever uma troca de senha simultânea.
+    if novo_hash:
+        await session.execute(
+            update(Usuario).where(Usuario.id == usuario.id, Usuario.senha == usuario.senha).values(senha=novo_hash)
+        )
+        await session.commit()
+
+    # Caso o login seja bem-sucedido, gera um token de acesso (JWT assinado com a SECRET_KEY)
+    # e um token de renovação, usado em /auth/refresh quando o token de acesso expirar.
+    access_token = criar_token(usuario.id, usuario.admin)
+    refresh_token = criar_token(usuario.id, usuario.admin, tipo=TOKEN_REFRESH)
+
+    # Retorna os tokens e o tipo do token (padrão Bearer).
     return {
         'access_token': access_token,
+        'refresh_token': refresh_token,
+        'token_type': 'Bearer'
+    }
+
+
+# ===============================================
+# 🔄 ROTA POST — Renovação do token de acesso
+# ===============================================
+@auth_router.post('/refresh')
+async def refresh(refresh_schema: RefreshSchema, session: AsyncSession = Depends(pegar_sessao)):
+    '''
+    Gera um novo token de acesso a partir de um token de renovação válido.
+
+    Além da assinatura e da expiração do token de renovação, o usuário é relido do banco
+    principal (uma consulta pela chave primária): o novo token traz o acesso de administrador
+    atual (ex: removido com 'python -m administradores --remover'), e usuários que não
+    existem mais não recebem novos tokens.
+    '''
+
+    token = verificar_token(refresh_schema.refresh_token, tipo=TOKEN_REFRESH)
+
+    usar_primario(session)
+    admin = (await session.execute(select(Usuario.admin).where(Usuario.id == token.id))).first()
+    if admin is None:
+        raise HTTPException(status_code=401, detail='Usuário não encontrado.',
+                            headers={'WWW-Authenticate': 'Bearer'})
+
+    return {
+        'access_token': criar_token(token.id, bool(admin.admin)),
         'token_type': 'Bearer'
     }
@@ -0,0 +1,319 @@
+'''
+Benchmark de carga dos endpoints de autenticação e pedidos.
+
+Para cada tamanho de base, cria um banco SQLite temporário com o schema da aplicação,
+popula N pedidos (com itens), sobe a aplicação no próprio processo (httpx + ASGITransport,
+sem rede) e mede vazão e latência (p50/p99) de cada endpoint em vários níveis de concorrência:
+
+- POST /auth/criar_conta
+- POST /auth/login
+- POST /orders/pedido
+- GET  /orders/            (listagem paginada)
+- GET  /orders/detalhados  (listagem com itens)
+
+O cache de respostas (CACHE_RESPOSTAS_TTL) fica desligado: as listagens medem as consultas
+ao banco (paginação por keyset + selectinload), que dependem do tamanho da base, e não
+acertos no cache. Com --cache-respostas, o cache configurado é mantido (cenário com cache).
+
+Cada tamanho roda em um subprocesso próprio, pois o engine do banco é configurado
+a partir de DATABASE_URL quando a aplicação é importada.
+
+Os resultados são impressos como JSON (uma linha por cenário) e podem ser gravados
+em arquivo com --saida. Com --comparar, os resultados são comparados com uma execução
+anterior e o comando termina com erro se algum p99 piorar além da tolerância.
+
+Uso:
+    python -m benchmarks.bench_endpoints --tamanhos 10000,1000000 --concorrencias 1,10,50
+    python -m benchmarks.bench_endpoints --saida atual.json --comparar base.json --tolerancia 0.25
+    python -m benchmarks.bench_endpoints --cache-respostas --saida com_cache.json
+'''
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.estatisticas import percentil
+
+
+# Usuários criados na base de teste; os pedidos são distribuídos entre eles.
+QUANTIDADE_USUARIOS = 1000
+
+# Credenciais do usuário usado nas requisições autenticadas (é o usuário de id 1).
+EMAIL_BENCH = 'bench@exemplo.com'
+SENHA_BENCH = 'senha-bench'
+
+STATUS = ('PENDENTE', 'FINALIZADO', 'CANCELADO')
+SABORES = ('calabresa', 'mussarela', 'portuguesa', 'frango')
+TAMANHOS = ('pequena', 'media', 'grande')
+
+
+# ===========================
+# 🌱 Preparação da base
+# ===========================
+def popular(caminho, quantidade_pedidos):
+    '''
+    Cria o schema da aplicação e insere usuários, pedidos e itens diretamente pelo sqlite3.
+    '''
+
+    from passlib.context import CryptContext
+    from database import criar_engine
+    from models import Base
+
+    engine = criar_engine(f'sqlite:///{caminho}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    senha_hash = CryptContext(schemes=['bcrypt']).hash(SENHA_BENCH)
+    aleatorio = random.Random(42)
+
+    conexao = sqlite3.connect(caminho)
+    conexao.executemany(
+        'INSERT INTO usuarios (id, nome, email, senha, ativo, admin) VALUES (?, ?, ?, ?, 1, 0)',
+        [(1, 'Bench', EMAIL_BENCH, senha_hash)] +
+        [(i, f'Usuário {i}', f'usuario{i}@exemplo.com', senha_hash) for i in range(2, QUANTIDADE_USUARIOS + 1)]
+    )
+
+    lote = 50000
+    for inicio in range(1, quantidade_pedidos + 1, lote):
+        ids = range(inicio, min(inicio + lote, quantidade_pedidos + 1))
+        pedidos = []
+        itens = []
+        for id_pedido in ids:
+            total = 0.0
+            for _ in range(2):
+                quantidade = aleatorio.randint(1, 3)
+                preco = aleatorio.choice((30.0, 45.0, 60.0))
+                total += quantidade * preco
+                itens.append((quantidade, aleatorio.choice(SABORES), aleatorio.choice(TAMANHOS), preco, id_pedido))
+            usuario = (id_pedido % QUANTIDADE_USUARIOS) + 1
+            pedidos.append((id_pedido, aleatorio.choice(STATUS), usuario, total))
+
+        conexao.executemany('INSERT INTO pedidos (id, status, usuario, preco) VALUES (?, ?, ?, ?)', pedidos)
+        conexao.executemany(
+            'INSERT INTO itens_pedido (quantidade, sabor, tamanho, preco_unitario, pedido) VALUES (?, ?, ?, ?, ?)', itens
+        )
+        conexao.commit()
+
+    conexao.execute('ANALYZE')
+    conexao.commit()
+    conexao.close()
+
+
+# ===========================
+# ⏱️ Medição
+# ===========================
+async def medir(cliente, nome, requisicoes, concorrencia, fazer_requisicao):
+    '''
+    Executa 'requisicoes' chamadas de 'fazer_requisicao' com no máximo 'concorrencia'
+    em andamento ao mesmo tempo, retornando vazão e latências.
+    '''
+
+    latencias = []
+    erros = 0
+    proxima = iter(range(requisicoes))
+
+    async def trabalhador():
+        nonlocal erros
+        for numero in proxima:
+            inicio = time.perf_counter()
+            resposta = await fazer_requisicao(cliente, numero)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if resposta.status_code >= 400:
+                erros += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+
+    return {
+        'endpoint': nome,
+        'concorrencia': concorrencia,
+        'requisicoes': requisicoes,
+        'erros': erros,
+        'vazao_rps': round(requisicoes / duracao, 2),
+        'p50_ms': round(statistics.median(latencias), 3),
+        'p99_ms': round(percentil(latencias, 0.99), 3),
+    }
+
+
+async def executar_cenarios(tamanho, concorrencias, requisicoes, requisicoes_auth):
+    import httpx
+    from main import app
+
+    resultados = []
+    contador = iter(range(10 ** 9))
+
+    async with app.router.lifespan_context(app):
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url='http://bench') as cliente:
+            resposta = await cliente.post('/auth/login', json={'email': EMAIL_BENCH, 'senha': SENHA_BENCH})
+            resposta.raise_for_status()
+            cabecalhos = {'Authorization': f"Bearer {resposta.json()['access_token']}"}
+
+            async def criar_conta(c, _):
+                numero = next(contador)
+                return await c.post('/auth/criar_conta', json={
+                    'nome': 'Novo', 'email': f'novo{tamanho}-{numero}@exemplo.com',
+                    'senha': 'senha', 'ativo': True, 'admin': False
+                })
+
+            async def login(c, _):
+                return await c.post('/auth/login', json={'email': EMAIL_BENCH, 'senha': SENHA_BENCH})
+
+            async def criar_pedido(c, _):
+                return await c.post('/orders/pedido', json={'usuario': 1}, headers=cabecalhos)
+
+            async def listar(c, _):
+                return await c.get('/orders/', params={'status': 'PENDENTE', 'limite': 50}, headers=cabecalhos)
+
+            async def listar_detalhados(c, _):
+                return await c.get('/orders/detalhados', params={'limite': 50}, headers=cabecalhos)
+
+            cenarios = [
+                ('POST /auth/criar_conta', criar_conta, requisicoes_auth),
+                ('POST /auth/login', login, requisicoes_auth),
+                ('POST /orders/pedido', criar_pedido, requisicoes),
+                ('GET /orders/', listar, requisicoes),
+                ('GET /orders/detalhados', listar_detalhados, requisicoes),
+            ]
+
+            for nome, funcao, quantidade in cenarios:
+                for concorrencia in concorrencias:
+                    resultado = await medir(cliente, nome, quantidade, concorrencia, funcao)
+                    resultado['pedidos_na_base'] = tamanho
+                    resultados.append(resultado)
+                    print(json.dumps(resultado), flush=True)
+
+    return resultados
+
+
+def executar_tamanho(args):
+    '''
+    Executado no subprocesso: popula a base e mede todos os cenários para um tamanho.
+    '''
+
+    caminho = os.environ['BENCH_BANCO']
+    popular(caminho, args.tamanho)
+    asyncio.run(executar_cenarios(args.tamanho, args.concorrencias, args.requisicoes, args.requisicoes_auth))
+
+
+# ===========================
+# 📏 Comparação com uma execução anterior
+# ===========================
+def comparar(resultados, caminho_base, tolerancia, cache_respostas=False):
+    '''
+    Compara o p99 de cada cenário com a execução de referência.
+    Retorna a lista de cenários que pioraram além da tolerância.
+    As duas execuções precisam ter o cache de respostas no mesmo estado (ligado/desligado).
+    '''
+
+    with open(caminho_base) as arquivo:
+        relatorio = json.load(arquivo)
+    if relatorio.get('cache_respostas', False) != cache_respostas:
+        raise SystemExit('A execução de referência foi feita com o cache de respostas em outro estado '
+                         '(--cache-respostas): os resultados não são comparáveis.')
+    base = relatorio['resultados']
+
+    chave = lambda r: (r['endpoint'], r['concorrencia'], r['pedidos_na_base'])
+    referencia = {chave(r): r for r in base}
+
+    regressoes = []
+    for resultado in resultados:
+        anterior = referencia.get(chave(resultado))
+        if anterior and resultado['p99_ms'] > anterior['p99_ms'] * (1 + tolerancia):
+            regressoes.append({
+                'endpoint': resultado['endpoint'],
+                'concorrencia': resultado['concorrencia'],
+                'pedidos_na_base': resultado['pedidos_na_base'],
+                'p99_ms_anterior': anterior['p99_ms'],
+                'p99_ms_atual': resultado['p99_ms'],
+            })
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', default='10000,1000000', help='quantidades de pedidos na base, separadas por vírgula')
+    parser.add_argument('--concorrencias', default='1,10,50', help='níveis de concorrência, separados por vírgula')
+    parser.add_argument('--requisicoes', type=int, default=500, help='requisições por cenário de pedidos')
+    parser.add_argument('--requisicoes-auth', type=int, default=50,
+                        help='requisições por cenário de autenticação (cada uma executa um bcrypt)')
+    parser.add_argument('--saida', help='arquivo JSON onde gravar os resultados')
+    parser.add_argument('--comparar', help='arquivo JSON de uma execução anterior, usado como referência')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='piora máxima aceita no p99 (0.25 = 25%%)')
+    parser.add_argument('--cache-respostas', action='store_true',
+                        help='mantém o cache de respostas ligado (padrão: desligado, medindo as consultas ao banco)')
+    parser.add_argument('--tamanho', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    args.concorrencias = [int(c) for c in args.concorrencias.split(',')]
+
+    # Modo interno: um único tamanho, executado no subprocesso.
+    if args.tamanho is not None:
+        executar_tamanho(args)
+        return
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for tamanho in (int(t) for t in args.tamanhos.split(',')):
+            caminho = os.path.join(diretorio, f'bench_{tamanho}.db')
+            ambiente = dict(
+                os.environ,
+                BENCH_BANCO=caminho,
+                DATABASE_URL=f'sqlite:///{caminho}',
+                SECRET_KEY=os.environ.get('SECRET_KEY', 'chave-do-benchmark'),
+                # O benchmark repete o login do mesmo usuário e IP: os limites de tentativas
+                # são elevados para medir o endpoint, e não as recusas do limitador.
+                LOGIN_IP_CAPACIDADE='1000000',
+                LOGIN_IP_POR_MINUTO='1000000',
+                LOGIN_EMAIL_CAPACIDADE='1000000',
+                LOGIN_EMAIL_POR_MINUTO='1000000',
+            )
+            if not args.cache_respostas:
+                # Sem o cache, as leituras repetidas chegam ao banco a cada requisição.
+                ambiente['CACHE_RESPOSTAS_TTL'] = '0'
+            comando = [
+                sys.executable, '-m', 'benchmarks.bench_endpoints',
+                '--tamanho', str(tamanho),
+                '--concorrencias', ','.join(str(c) for c in args.concorrencias),
+                '--requisicoes', str(args.requisicoes),
+                '--requisicoes-auth', str(args.requisicoes_auth),
+            ]
+            processo = subprocess.run(comando, env=ambiente, stdout=subprocess.PIPE, text=True, check=True)
+            for linha in processo.stdout.splitlines():
+                if linha.startswith('{'):
+                    resultados.append(json.loads(linha))
+                    print(linha, flush=True)
+
+    relatorio = {
+        'benchmark': 'endpoints',
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'cache_respostas': args.cache_respostas,
+        'resultados': resultados,
+    }
+
+    if args.saida:
+        with open(args.saida, 'w') as arquivo:
+            json.dump(relatorio, arquivo, indent=2)
+
+    if args.comparar:
+        regressoes = comparar(resultados, args.comparar, args.tolerancia, args.cache_respostas)
+        for regressao in regressoes:
+            print('REGRESSÃO:', json.dumps(regressao), file=sys.stderr)
+        if regressoes:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+'''
+Benchmark de calibração do custo do hash de senhas.
+
+Mede a latência (mediana e máximo) da verificação de uma senha para cada custo do bcrypt
+e, se o pacote argon2-cffi estiver instalado, para algumas combinações de custo do argon2.
+A verificação é a operação executada em todo login, no pool de threads do serviço de hash.
+
+Recomenda o maior custo cuja mediana fica dentro da latência alvo (--alvo-ms) e imprime
+as linhas correspondentes para o .env. Também estima quantos logins por segundo cada
+worker suporta com HASH_WORKERS threads de hash (o bcrypt e o argon2 liberam o GIL).
+
+Ao aumentar o custo no .env, os hashes existentes são refeitos automaticamente no
+próximo login de cada usuário.
+
+Uso:
+    python -m benchmarks.bench_hash --alvo-ms 250 --repeticoes 5
+    python -m benchmarks.bench_hash --rounds 10,11,12,13,14
+'''
+
+import argparse
+import importlib.util
+import json
+import statistics
+import time
+
+from passlib.context import CryptContext
+
+from config import pegar_settings
+
+
+SENHA = 'senha-do-benchmark'
+
+# Combinações de custo do argon2 medidas: (time_cost, memory_cost em KiB, parallelism).
+COMBINACOES_ARGON2 = [
+    (2, 19456, 1),
+    (2, 65536, 2),
+    (3, 65536, 4),
+    (4, 131072, 4),
+]
+
+
+def medir(contexto, repeticoes):
+    '''
+    Gera um hash com o contexto informado e mede a latência da verificação (ms).
+    '''
+
+    senha_hash = contexto.hash(SENHA)
+    contexto.verify(SENHA, senha_hash)  # aquecimento
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        contexto.verify(SENHA, senha_hash)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), max(tempos)
+
+
+def resultado(algoritmo, parametros, env, p50, maximo, hash_workers):
+    return {
+        'algoritmo': algoritmo,
+        'parametros': parametros,
+        'env': env,
+        'p50_ms': round(p50, 2),
+        'max_ms': round(maximo, 2),
+        'logins_por_segundo': round(hash_workers * 1000 / p50, 1),
+    }
+
+
+def recomendar(resultados, alvo_ms):
+    '''
+    Retorna o resultado de maior custo (maior latência) dentro do alvo, ou None.
+    '''
+
+    dentro_do_alvo = [r for r in resultados if r['p50_ms'] <= alvo_ms]
+    return max(dentro_do_alvo, key=lambda r: r['p50_ms'], default=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--alvo-ms', type=float, default=250, help='latência máxima desejada por verificação')
+    parser.add_argument('--rounds', default='8,9,10,11,12,13,14', help='custos do bcrypt a medir')
+    parser.add_argument('--repeticoes', type=int, default=5, help='verificações medidas por custo')
+    args = parser.parse_args()
+
+    hash_workers = pegar_settings().hash_workers
+    resultados = {'bcrypt': [], 'argon2': []}
+
+    for rounds in [int(r) for r in args.rounds.split(',')]:
+        contexto = CryptContext(schemes=['bcrypt'], bcrypt__rounds=rounds)
+        p50, maximo = medir(contexto, args.repeticoes)
+        resultados['bcrypt'].append(resultado(
+            'bcrypt', {'rounds': rounds},
+            {'SENHA_ESQUEMAS': 'bcrypt', 'SENHA_BCRYPT_ROUNDS': rounds},
+            p50, maximo, hash_workers,
+        ))
+        print(json.dumps(resultados['bcrypt'][-1]), flush=True)
+
+    # O argon2 é opcional (pip install argon2-cffi).
+    if importlib.util.find_spec('argon2'):
+        for time_cost, memory_cost, parallelism in COMBINACOES_ARGON2:
+            contexto = CryptContext(schemes=['argon2'], argon2__time_cost=time_cost,
+                                    argon2__memory_cost=memory_cost, argon2__parallelism=parallelism)
+            p50, maximo = medir(contexto, args.repeticoes)
+            resultados['argon2'].append(resultado(
+                'argon2', {'time_cost': time_cost, 'memory_cost': memory_cost, 'parallelism': parallelism},
+                {
+                    'SENHA_ESQUEMAS': 'argon2,bcrypt',
+                    'SENHA_ARGON2_TIME_COST': time_cost,
+                    'SENHA_ARGON2_MEMORY_COST': memory_cost,
+                    'SENHA_ARGON2_PARALLELISM': parallelism,
+                },
+                p50, maximo, hash_workers,
+            ))
+            print(json.dumps(resultados['argon2'][-1]), flush=True)
+    else:
+        print(json.dumps({'argon2': 'pacote argon2-cffi não instalado; apenas o bcrypt foi medido'}), flush=True)
+
+    for algoritmo, medidos in resultados.items():
+        if not medidos:
+            continue
+        escolhido = recomendar(medidos, args.alvo_ms)
+        print(f'\n# Recomendação {algoritmo} (alvo de {args.alvo_ms:g} ms por verificação):')
+        if escolhido is None:
+            print(f'# nenhum custo medido ficou dentro do alvo; o menor levou {medidos[0]["p50_ms"]} ms')
+            continue
+        for nome, valor in escolhido['env'].items():
+            print(f'{nome}={valor}')
+        print(f'# ~{escolhido["p50_ms"]} ms por login, ~{escolhido["logins_por_segundo"]} logins/s '
+              f'por worker com HASH_WORKERS={hash_workers}')
+
+
+if __name__ == '__main__':
+    main()
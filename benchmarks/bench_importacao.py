@@ -0,0 +1,184 @@
+'''
+Benchmark do tempo de inicialização (cold start) da aplicação.
+
+Cada repetição roda em um processo Python novo, como um worker recém-criado ou uma
+função serverless, e mede:
+
+- importacao:     tempo de 'import main'
+- montagem:       tempo de create_app() (rotas, middlewares e os módulos que elas importam)
+- inicializacao:  tempo do lifespan até a aplicação estar pronta (engine e criptografia)
+- primeira_resposta: tempo da primeira requisição (GET /metrics)
+- processo:       tempo total do processo, incluindo a inicialização do interpretador
+
+Os resultados (mediana e máximo de cada fase, em ms) são impressos como JSON e podem ser
+gravados em arquivo com --saida. Com --comparar, os resultados são comparados com uma
+execução anterior e o comando termina com erro se alguma mediana piorar além da tolerância.
+Com --modulos, lista também os módulos mais lentos de importar.
+
+Uso:
+    python -m benchmarks.bench_importacao --repeticoes 10 --modulos 15
+    python -m benchmarks.bench_importacao --saida atual.json --comparar base.json --tolerancia 0.25
+'''
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+
+FASES = ('importacao', 'montagem', 'inicializacao', 'primeira_resposta', 'processo')
+
+# Script executado em cada processo novo; imprime o tempo de cada fase em JSON.
+SCRIPT_PROCESSO = '''
+import asyncio, json, time
+inicio = time.perf_counter()
+import main
+importacao = time.perf_counter()
+app = main.create_app()
+montagem = time.perf_counter()
+
+async def iniciar_e_requisitar():
+    import httpx
+    async with app.router.lifespan_context(app):
+        pronto = time.perf_counter()
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url='http://bench') as cliente:
+            (await cliente.get('/metrics')).raise_for_status()
+        return pronto, time.perf_counter()
+
+pronto, resposta = asyncio.run(iniciar_e_requisitar())
+print(json.dumps({
+    'importacao': (importacao - inicio) * 1000,
+    'montagem': (montagem - importacao) * 1000,
+    'inicializacao': (pronto - montagem) * 1000,
+    'primeira_resposta': (resposta - pronto) * 1000,
+}))
+'''
+
+
+def ambiente():
+    return dict(
+        os.environ,
+        SECRET_KEY=os.environ.get('SECRET_KEY', 'chave-do-benchmark'),
+        DATABASE_URL=os.environ.get('DATABASE_URL', 'sqlite://'),
+    )
+
+
+def medir_processo():
+    '''
+    Executa uma repetição em um processo novo e retorna o tempo de cada fase (ms).
+    '''
+
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, '-c', SCRIPT_PROCESSO], env=ambiente(),
+                              stdout=subprocess.PIPE, text=True, check=True)
+    fases = json.loads(processo.stdout.strip().splitlines()[-1])
+    fases['processo'] = (time.perf_counter() - inicio) * 1000
+    return fases
+
+
+def modulos_mais_lentos(quantidade):
+    '''
+    Importa e monta a aplicação com 'python -X importtime' e retorna os módulos
+    com maior tempo de importação próprio (sem contar os módulos que eles importam).
+    '''
+
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main; main.create_app()'],
+        env=ambiente(), stderr=subprocess.PIPE, text=True, check=True
+    )
+
+    modulos = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        proprio, acumulado, nome = linha[len('import time:'):].split('|')
+        modulos.append({
+            'modulo': nome.strip(),
+            'proprio_ms': round(int(proprio) / 1000, 2),
+            'acumulado_ms': round(int(acumulado) / 1000, 2),
+        })
+
+    return sorted(modulos, key=lambda m: m['proprio_ms'], reverse=True)[:quantidade]
+
+
+# ===========================
+# 📏 Comparação com uma execução anterior
+# ===========================
+def comparar(resultados, caminho_base, tolerancia):
+    '''
+    Compara a mediana de cada fase com a execução de referência.
+    Retorna a lista de fases que pioraram além da tolerância.
+    '''
+
+    with open(caminho_base) as arquivo:
+        base = {r['fase']: r for r in json.load(arquivo)['resultados']}
+
+    regressoes = []
+    for resultado in resultados:
+        anterior = base.get(resultado['fase'])
+        if anterior and resultado['p50_ms'] > anterior['p50_ms'] * (1 + tolerancia):
+            regressoes.append({
+                'fase': resultado['fase'],
+                'p50_ms_anterior': anterior['p50_ms'],
+                'p50_ms_atual': resultado['p50_ms'],
+            })
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=10, help='processos novos medidos')
+    parser.add_argument('--modulos', type=int, default=0, help='quantidade de módulos mais lentos a listar')
+    parser.add_argument('--saida', help='arquivo JSON onde gravar os resultados')
+    parser.add_argument('--comparar', help='arquivo JSON de uma execução anterior, usado como referência')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='piora máxima aceita na mediana (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    # Um processo de aquecimento: compila os .pyc e carrega o cache de disco do sistema operacional.
+    medir_processo()
+    medicoes = [medir_processo() for _ in range(args.repeticoes)]
+
+    resultados = []
+    for fase in FASES:
+        valores = [m[fase] for m in medicoes]
+        resultado = {
+            'fase': fase,
+            'repeticoes': len(valores),
+            'p50_ms': round(statistics.median(valores), 2),
+            'max_ms': round(max(valores), 2),
+        }
+        resultados.append(resultado)
+        print(json.dumps(resultado), flush=True)
+
+    relatorio = {
+        'benchmark': 'importacao',
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'resultados': resultados,
+    }
+
+    if args.modulos:
+        relatorio['modulos_mais_lentos'] = modulos_mais_lentos(args.modulos)
+        for modulo in relatorio['modulos_mais_lentos']:
+            print(json.dumps(modulo), flush=True)
+
+    if args.saida:
+        with open(args.saida, 'w') as arquivo:
+            json.dump(relatorio, arquivo, indent=2)
+
+    if args.comparar:
+        regressoes = comparar(resultados, args.comparar, args.tolerancia)
+        for regressao in regressoes:
+            print('REGRESSÃO:', json.dumps(regressao), file=sys.stderr)
+        if regressoes:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+'''
+Benchmark da busca de usuário por e-mail usada no login.
+
+Para cada tamanho de tabela, cria um banco SQLite temporário com o schema da aplicação,
+insere N usuários e mede a latência (p50/p99) da consulta 'buscar_usuario_por_email',
+a mesma executada pela rota /auth/login antes da verificação da senha.
+
+Com o índice único em lower(email), a latência deve ficar praticamente constante
+conforme a tabela cresce. Use --sem-indice para comparar com a busca sequencial.
+
+Uso:
+    python -m benchmarks.bench_login --tamanhos 10000,100000,1000000 --consultas 2000
+'''
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from auth_routes import buscar_usuario_por_email
+from database import criar_engine
+from models import Base
+
+from benchmarks.estatisticas import percentil
+
+
+# Hash fixo usado para todos os usuários: o benchmark mede apenas a busca no banco.
+HASH_FICTICIO = '$2b$12$' + 'x' * 53
+
+
+def popular(caminho, quantidade, sem_indice):
+    # Cria as tabelas com o mesmo schema da aplicação (incluindo o índice de e-mail).
+    engine = criar_engine(f'sqlite:///{caminho}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    conexao = sqlite3.connect(caminho)
+    if sem_indice:
+        conexao.execute('DROP INDEX ix_usuarios_email_lower')
+
+    linhas = ((f'Usuário {i}', f'usuario{i}@exemplo.com', HASH_FICTICIO, True, False) for i in range(quantidade))
+    conexao.executemany('INSERT INTO usuarios (nome, email, senha, ativo, admin) VALUES (?, ?, ?, ?, ?)', linhas)
+    conexao.commit()
+    conexao.close()
+
+
+async def medir(caminho, quantidade, consultas):
+    engine = criar_engine(f'sqlite:///{caminho}', assincrono=True)
+    fabrica = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    # Aquece o pool de conexões e o cache de páginas.
+    async with fabrica() as session:
+        await buscar_usuario_por_email(session, 'usuario0@exemplo.com')
+
+    latencias = []
+    for _ in range(consultas):
+        email = f'usuario{random.randrange(quantidade)}@exemplo.com'
+        inicio = time.perf_counter()
+        async with fabrica() as session:
+            usuario = await buscar_usuario_por_email(session, email)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        assert usuario is not None
+
+    await engine.dispose()
+
+    return {
+        'usuarios': quantidade,
+        'consultas': consultas,
+        'p50_ms': round(statistics.median(latencias), 4),
+        'p99_ms': round(percentil(latencias, 0.99), 4),
+        'media_ms': round(statistics.fmean(latencias), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', default='10000,100000,1000000',
+                        help='tamanhos da tabela de usuários, separados por vírgula')
+    parser.add_argument('--consultas', type=int, default=2000, help='consultas medidas por tamanho')
+    parser.add_argument('--sem-indice', action='store_true', help='remove o índice de e-mail (comparação)')
+    parser.add_argument('--saida', help='arquivo JSON onde gravar os resultados (padrão: apenas stdout)')
+    args = parser.parse_args()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for quantidade in (int(t) for t in args.tamanhos.split(',')):
+            caminho = os.path.join(diretorio, f'usuarios_{quantidade}.db')
+            popular(caminho, quantidade, args.sem_indice)
+            resultado = asyncio.run(medir(caminho, quantidade, args.consultas))
+            resultado['indice'] = not args.sem_indice
+            resultados.append(resultado)
+            print(json.dumps(resultado), flush=True)
+
+    if args.saida:
+        with open(args.saida, 'w') as arquivo:
+            json.dump({'benchmark': 'login_lookup', 'resultados': resultados}, arquivo, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+'''
+Funções estatísticas compartilhadas pelos benchmarks.
+'''
+
+
+def percentil(valores, p):
+    '''
+    Percentil 'p' (0 a 1) das latências medidas, pelo método do vizinho mais próximo.
+    '''
+
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
@@ -0,0 +1,164 @@
+# Importa o 'json', o 'os' e o 'sqlite3', usados pelo cache em arquivo compartilhado entre processos.
+import json
+import os
+import sqlite3
+import threading
+
+# Importa o OrderedDict, que mantém a ordem de uso das chaves (base do LRU).
+from collections import OrderedDict
+
+# Importa o relógio monotônico, usado para controlar a expiração das entradas em memória,
+# e o relógio de parede, usado no cache em arquivo (comum a todos os processos).
+from time import monotonic, time
+
+# Importa o 'Protocol', usado para descrever a interface esperada de um backend de cache.
+from typing import Protocol
+
+
+# ===========================
+# 🔌 Interface de backend de cache
+# ===========================
+class BackendCache(Protocol):
+    '''
+    Operações que um backend de cache precisa oferecer para ser usado pela aplicação
+    (ex: pelo cache de respostas). O CacheTTL abaixo satisfaz essa interface em memória;
+    um backend compartilhado entre processos (ex: Redis) pode ser usado no lugar dele.
+
+    - get(chave, padrao=None): valor armazenado, ou 'padrao' se ausente/expirado.
+    - set(chave, valor, ttl=None): armazena o valor por 'ttl' segundos (ou o padrão do backend).
+    - delete(chave): remove a chave, se existir.
+    '''
+
+    def get(self, chave, padrao=None): ...
+
+    def set(self, chave, valor, ttl=None): ...
+
+    def delete(self, chave): ...
+
+
+# ===========================
+# 🗃️ Cache em memória (LRU + TTL)
+# ===========================
+class CacheTTL:
+    '''
+    Cache em memória com expiração por tempo (TTL) e descarte do item menos usado (LRU).
+
+    - tamanho_maximo: quantidade máxima de entradas; ao ultrapassar, a entrada usada
+      há mais tempo é descartada, mantendo o consumo de memória limitado.
+    - ttl: tempo de vida padrão (em segundos) de cada entrada.
+
+    O cache é local ao processo e não usa locks: deve ser acessado apenas a partir
+    do event loop (como fazem as rotas 'async').
+    '''
+
+    def __init__(self, tamanho_maximo, ttl):
+        self._tamanho_maximo = tamanho_maximo
+        self._ttl = ttl
+        self._dados = OrderedDict()
+
+    def __len__(self):
+        return len(self._dados)
+
+    def get(self, chave, padrao=None):
+        '''
+        Retorna o valor da chave, ou 'padrao' se ela não existir ou já tiver expirado.
+        '''
+
+        entrada = self._dados.get(chave)
+        if entrada is None:
+            return padrao
+
+        valor, expira_em = entrada
+        if expira_em <= monotonic():
+            del self._dados[chave]
+            return padrao
+
+        # Marca a chave como usada recentemente.
+        self._dados.move_to_end(chave)
+        return valor
+
+    def set(self, chave, valor, ttl=None):
+        '''
+        Armazena o valor; 'ttl' permite uma expiração diferente da padrão para esta entrada.
+        '''
+
+        ttl = self._ttl if ttl is None else min(ttl, self._ttl)
+        self._dados[chave] = (valor, monotonic() + ttl)
+        self._dados.move_to_end(chave)
+
+        while len(self._dados) > self._tamanho_maximo:
+            self._dados.popitem(last=False)
+
+    def delete(self, chave):
+        self._dados.pop(chave, None)
+
+    def clear(self):
+        self._dados.clear()
+
+
+# ===========================
+# 🗄️ Cache em arquivo (SQLite), compartilhado entre processos
+# ===========================
+class CacheSQLite:
+    '''
+    Cache em um arquivo SQLite, compartilhado por todos os processos da mesma máquina
+    (ex: os workers do server.py), sem serviço externo. Satisfaz a interface BackendCache.
+
+    - caminho: arquivo do cache (criado se não existir).
+    - ttl: tempo de vida padrão (em segundos) de cada entrada.
+
+    Os valores são gravados em JSON (tuplas voltam como listas). As entradas expiradas
+    são ignoradas na leitura e removidas periodicamente nas gravações.
+
+    As operações são síncronas e podem esperar (até 'timeout' segundos) enquanto outro
+    processo grava no arquivo: por isso o backend se declara 'bloqueante', e quem o usa a
+    partir do event loop deve chamá-lo em uma thread (ex: asyncio.to_thread). Cada thread
+    de cada processo usa a própria conexão (inclusive após um fork). Se a espera acabar,
+    a operação levanta sqlite3.OperationalError ("database is locked").
+    '''
+
+    bloqueante = True
+
+    # Gravações entre duas limpezas das entradas expiradas.
+    LIMPEZA_A_CADA = 1000
+
+    def __init__(self, caminho, ttl, timeout=1):
+        self._caminho = caminho
+        self._ttl = ttl
+        self._timeout = timeout
+        self._local = threading.local()
+        self._gravacoes = 0
+
+    def _conectar(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # 'isolation_level=None': cada comando é confirmado sozinho (autocommit).
+            conexao = sqlite3.connect(self._caminho, timeout=self._timeout, isolation_level=None)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=OFF')
+            conexao.execute(
+                'CREATE TABLE IF NOT EXISTS cache (chave TEXT PRIMARY KEY, valor TEXT NOT NULL, expira_em REAL NOT NULL)'
+            )
+            local.conexao, local.pid = conexao, os.getpid()
+        return local.conexao
+
+    def get(self, chave, padrao=None):
+        linha = self._conectar().execute(
+            'SELECT valor FROM cache WHERE chave = ? AND expira_em > ?', (chave, time())
+        ).fetchone()
+        return padrao if linha is None else json.loads(linha[0])
+
+    def set(self, chave, valor, ttl=None):
+        ttl = self._ttl if ttl is None else min(ttl, self._ttl)
+        conexao = self._conectar()
+        conexao.execute(
+            'INSERT OR REPLACE INTO cache (chave, valor, expira_em) VALUES (?, ?, ?)',
+            (chave, json.dumps(valor), time() + ttl)
+        )
+
+        self._gravacoes += 1
+        if self._gravacoes % self.LIMPEZA_A_CADA == 0:
+            conexao.execute('DELETE FROM cache WHERE expira_em <= ?', (time(),))
+
+    def delete(self, chave):
+        self._conectar().execute('DELETE FROM cache WHERE chave = ?', (chave,))
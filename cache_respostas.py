@@ -0,0 +1,196 @@
+# Importa o 'hashlib', usado para gerar o ETag a partir do corpo da resposta.
+import hashlib
+
+# Importa o 'secrets', usado para gerar identificadores de geração que nunca se repetem.
+import secrets
+
+# Importa o módulo de eventos do SQLAlchemy e a classe Session, usados para
+# invalidar o cache quando uma transação que alterou pedidos é confirmada.
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Importa a classe Response do FastAPI, usada para devolver o corpo já serializado (ou 304).
+from fastapi import Response
+
+# Importa as configurações da aplicação (tamanho e validade do cache de respostas).
+from config import pegar_settings
+
+# Importa o cache em memória usado como backend padrão.
+from cache import CacheTTL
+
+# Importa os modelos cujas alterações invalidam as respostas em cache.
+from models import Pedido, ItensPedido
+
+
+# Escopo incluído em todas as chaves: invalidá-lo descarta todas as respostas em cache.
+ESCOPO_GLOBAL = 'pedidos'
+
+# Escopo das listagens que não filtram por usuário (ex: administrador listando todos os pedidos).
+ESCOPO_TODOS = 'pedidos:todos'
+
+# Tempo de vida padrão do backend em memória, usado pelas gerações dos escopos.
+# As respostas são gravadas com a validade própria (CACHE_RESPOSTAS_TTL), bem menor.
+TTL_GERACOES = 3600
+
+
+def escopo_usuario(id_usuario):
+    return f'pedidos:usuario:{id_usuario}'
+
+
+def escopo_pedido(id_pedido):
+    return f'pedidos:pedido:{id_pedido}'
+
+
+# ===========================
+# 🗂️ Cache de respostas
+# ===========================
+class CacheRespostas:
+    '''
+    Guarda o corpo JSON já serializado (e seu ETag) das respostas de leitura.
+
+    - backend: onde as entradas ficam guardadas (qualquer objeto com a interface BackendCache).
+    - ttl: segundos que uma resposta permanece válida (0 desativa o cache, mantendo o ETag/304).
+
+    Invalidação por gerações: cada escopo (ex: os pedidos de um usuário) tem uma geração,
+    e a chave de cada resposta inclui as gerações dos escopos dos quais ela depende.
+    Invalidar um escopo é apenas trocar a sua geração: as respostas antigas deixam de
+    ser encontradas (e saem do backend pelo TTL/LRU), sem precisar percorrer as chaves.
+    Como a geração também fica no backend, um backend compartilhado invalida as
+    respostas de todos os processos; com o backend em memória, cada worker tem o seu cache.
+    '''
+
+    def __init__(self, backend, ttl):
+        self._backend = backend
+        self._ttl = ttl
+
+    def _geracao(self, escopo):
+        chave = f'geracao:{escopo}'
+        geracao = self._backend.get(chave)
+        if geracao is None:
+            geracao = secrets.token_hex(8)
+            self._backend.set(chave, geracao)
+        return geracao
+
+    def _chave(self, escopos, chave):
+        geracoes = ':'.join(self._geracao(escopo) for escopo in (ESCOPO_GLOBAL, *escopos))
+        return f'resposta:{chave}:{geracoes}'
+
+    def buscar(self, escopos, chave):
+        '''
+        Retorna (corpo, etag) da resposta em cache, ou None.
+        '''
+
+        if self._ttl <= 0:
+            return None
+        return self._backend.get(self._chave(escopos, chave))
+
+    def guardar(self, escopos, chave, corpo):
+        '''
+        Calcula o ETag do corpo, guarda a resposta e retorna (corpo, etag).
+        '''
+
+        entrada = (corpo, f'"{hashlib.blake2b(corpo, digest_size=16).hexdigest()}"')
+        if self._ttl > 0:
+            self._backend.set(self._chave(escopos, chave), entrada, ttl=self._ttl)
+        return entrada
+
+    def invalidar(self, escopos):
+        '''
+        Descarta as respostas que dependem de qualquer um dos escopos informados.
+        '''
+
+        for escopo in escopos:
+            self._backend.set(f'geracao:{escopo}', secrets.token_hex(8))
+
+
+# Cache de respostas do processo (criado no primeiro uso).
+_cache_respostas = None
+
+
+def pegar_cache_respostas():
+    global _cache_respostas
+    if _cache_respostas is None:
+        settings = pegar_settings()
+        backend = CacheTTL(tamanho_maximo=settings.cache_respostas_tamanho, ttl=TTL_GERACOES)
+        _cache_respostas = CacheRespostas(backend, ttl=settings.cache_respostas_ttl)
+    return _cache_respostas
+
+
+def definir_cache_respostas(cache):
+    '''
+    Substitui o cache de respostas do processo (ex: por um CacheRespostas com backend compartilhado).
+    '''
+
+    global _cache_respostas
+    _cache_respostas = cache
+
+
+async def responder_com_cache(request, escopos, chave, gerar_corpo):
+    '''
+    Responde a uma leitura usando o cache de respostas.
+
+    - escopos: escopos dos quais a resposta depende (ex: [escopo_usuario(1)]).
+    - chave: identifica a leitura (rota, usuário autenticado e parâmetros).
+    - gerar_corpo: função assíncrona que consulta o banco e retorna o corpo JSON (bytes);
+      só é chamada quando a resposta não está em cache.
+
+    Se o cliente enviar If-None-Match com o ETag atual, a resposta é 304 sem corpo.
+    '''
+
+    cache = pegar_cache_respostas()
+    entrada = cache.buscar(escopos, chave)
+    if entrada is None:
+        entrada = cache.guardar(escopos, chave, await gerar_corpo())
+
+    corpo, etag = entrada
+    # 'private': a resposta depende do usuário autenticado; 'no-cache': o cliente deve revalidar (If-None-Match).
+    cabecalhos = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match and (if_none_match.strip() == '*' or etag in [v.strip() for v in if_none_match.split(',')]):
+        return Response(status_code=304, headers=cabecalhos)
+
+    return Response(content=corpo, media_type='application/json', headers=cabecalhos)
+
+
+# ===========================
+# 🔄 Invalidação pelas transações
+# ===========================
+def marcar_alteracao(session, usuarios=(), pedidos=()):
+    '''
+    Registra, na sessão, os usuários e pedidos alterados pela transação em andamento.
+    As respostas correspondentes são invalidadas quando a transação é confirmada (commit);
+    em caso de rollback, as marcações são descartadas.
+
+    Alterações feitas pelo ORM (session.add) são marcadas automaticamente no flush;
+    comandos em lote (insert/update/delete) devem chamar esta função.
+    Aceita tanto a AsyncSession quanto a Session síncrona.
+    '''
+
+    escopos = session.info.setdefault('cache_escopos', set())
+    escopos.update(escopo_usuario(u) for u in usuarios)
+    escopos.update(escopo_pedido(p) for p in pedidos)
+
+
+@event.listens_for(Session, 'after_flush')
+def _marcar_objetos_alterados(session, flush_context):
+    # Pedidos e itens gravados pelo ORM no flush.
+    # Os itens marcam apenas o próprio pedido: toda alteração de itens também atualiza
+    # o total do pedido (_ajustar_total), que marca o usuário dono do pedido.
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(objeto, Pedido):
+            marcar_alteracao(session, usuarios=[objeto.usuario], pedidos=[objeto.id])
+        elif isinstance(objeto, ItensPedido):
+            marcar_alteracao(session, pedidos=[objeto.pedido])
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_apos_commit(session):
+    escopos = session.info.pop('cache_escopos', None)
+    if escopos:
+        pegar_cache_respostas().invalidar([ESCOPO_TODOS, *escopos])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_apos_rollback(session):
+    session.info.pop('cache_escopos', None)
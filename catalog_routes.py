@@ -0,0 +1,81 @@
+# Importa o APIRouter (para organizar rotas), Depends (para injeção de dependências)
+# e HTTPException (para erros HTTP), e o AsyncSession (para gerenciar a conexão assíncrona com o banco).
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Importa a dependência de sessão e a que identifica o usuário autenticado.
+from dependencies import pegar_sessao, pegar_usuario_atual
+
+# Importa a função que prende a sessão ao banco principal (a alteração lê e grava o mesmo item).
+from database import usar_primario
+
+# Importa a representação do usuário autenticado (extraída do token).
+from security import UsuarioAutenticado
+
+# Importa o schema usado na alteração de um item do catálogo.
+from schemas import ItemCatalogoSchema
+
+# Importa o modelo da tabela do catálogo.
+from models import ItemCatalogo
+
+# Importa o índice de preços em memória e a carga do catálogo.
+from catalogo import normalizar, carregar_catalogo, pegar_ou_carregar_indice
+
+
+# Cria um roteador específico para o catálogo de produtos.
+# - prefix: todas as rotas começam com "/catalog".
+# - tags: define o agrupamento no Swagger UI (/docs).
+catalog_router = APIRouter(prefix='/catalog', tags=['catalog'])
+
+
+# ==========================================================
+# 📋 ROTA GET — Itens do catálogo
+# ==========================================================
+@catalog_router.get('/')
+async def listar_catalogo(usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)):
+    '''
+    Lista os sabores/tamanhos ativos e seus preços.
+    A resposta vem do índice de preços em memória, sem consulta ao banco.
+    '''
+
+    indice = await pegar_ou_carregar_indice()
+    return [item._asdict() for item in indice.itens()]
+
+
+# ==========================================================
+# ✏️ ROTA PUT — Cadastro/alteração de um item do catálogo
+# ==========================================================
+@catalog_router.put('/{sabor}/{tamanho}')
+async def definir_item_catalogo(
+    sabor: str,
+    tamanho: str,
+    item_schema: ItemCatalogoSchema,
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Cadastra ou altera o preço de um sabor/tamanho (exige token de administrador).
+    'ativo=false' retira o item do catálogo sem apagar o histórico.
+
+    Após o commit, o índice de preços deste worker é reconstruído e trocado de uma vez;
+    os demais workers recebem a alteração na próxima recarga (CATALOGO_RECARGA_SEGUNDOS).
+    '''
+
+    if not usuario_atual.admin:
+        raise HTTPException(status_code=403, detail='Apenas administradores podem alterar o catálogo.')
+
+    sabor, tamanho = normalizar(sabor), normalizar(tamanho)
+    if not sabor or not tamanho:
+        raise HTTPException(status_code=422, detail='Sabor e tamanho não podem ser vazios.')
+
+    usar_primario(session)
+    item = await session.get(ItemCatalogo, (sabor, tamanho))
+    if item is None:
+        item = ItemCatalogo(sabor=sabor, tamanho=tamanho)
+        session.add(item)
+    item.preco = item_schema.preco
+    item.ativo = item_schema.ativo
+    await session.commit()
+
+    await carregar_catalogo(session)
+    return {'sabor': sabor, 'tamanho': tamanho, 'preco': item.preco, 'ativo': item.ativo}
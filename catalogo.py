@@ -0,0 +1,161 @@
+# Importa o 'asyncio', usado na tarefa de recarga periódica do catálogo.
+import asyncio
+
+# Importa o 'logging', usado para registrar falhas de carga do catálogo (que roda fora das requisições).
+import logging
+
+# Importa o MappingProxyType, que expõe o dicionário de preços apenas para leitura,
+# e o NamedTuple, usado nas entradas do índice.
+from types import MappingProxyType
+from typing import NamedTuple
+
+# Importa o construtor de consultas do SQLAlchemy e o SQLAlchemyError, base de todos os erros de banco.
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+# Importa a fábrica de sessões, usada para carregar o catálogo fora de uma requisição.
+from database import pegar_fabrica_sessoes
+
+# Importa o modelo da tabela do catálogo.
+from models import ItemCatalogo
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar(valor):
+    # Sabor e tamanho são comparados sem diferenciar maiúsculas nem espaços nas pontas.
+    return valor.strip().lower()
+
+
+class PrecoCatalogo(NamedTuple):
+    sabor: str
+    tamanho: str
+    preco: float
+
+
+# ===========================
+# 🏷️ Índice de preços em memória
+# ===========================
+class IndicePrecos:
+    '''
+    Índice imutável sabor × tamanho -> preço, montado a partir dos itens ativos do catálogo.
+
+    Cada consulta é um acesso a dicionário (O(1)), sem consulta ao banco por item.
+    O índice nunca é alterado depois de criado: uma mudança no catálogo monta um índice
+    novo, que substitui o anterior em uma única atribuição (definir_indice_precos).
+    Uma requisição em andamento continua usando o índice que já tinha em mãos.
+
+    Com o catálogo vazio (nenhum item cadastrado, ativo ou não), os itens são aceitos com
+    o preço enviado pelo cliente (comportamento anterior ao catálogo). Com qualquer item
+    cadastrado ('cadastrado=True'), só os itens ativos são aceitos, mesmo que nenhum esteja
+    ativo: desativar itens nunca desliga a precificação pelo servidor.
+    '''
+
+    __slots__ = ('_precos', '_cadastrado')
+
+    def __init__(self, itens=(), cadastrado=False):
+        self._precos = MappingProxyType({
+            (item.sabor, item.tamanho): PrecoCatalogo(item.sabor, item.tamanho, item.preco)
+            for item in itens
+        })
+        self._cadastrado = cadastrado or bool(self._precos)
+
+    def __len__(self):
+        return len(self._precos)
+
+    def itens(self):
+        return sorted(self._precos.values())
+
+    def buscar(self, sabor, tamanho):
+        '''
+        Retorna o PrecoCatalogo do sabor/tamanho, ou None se ele não estiver no catálogo.
+        '''
+
+        return self._precos.get((normalizar(sabor), normalizar(tamanho)))
+
+    def precificar(self, itens):
+        '''
+        Valida e precifica os itens de um pedido (ItemPedidoSchema).
+        Retorna (itens com sabor, tamanho e preço do catálogo, None) ou (None, mensagem de erro).
+        '''
+
+        if not self._cadastrado:
+            sem_preco = [item for item in itens if item.preco_unitario is None]
+            if sem_preco:
+                return None, 'preco_unitario: obrigatório enquanto o catálogo de preços estiver vazio'
+            return itens, None
+
+        precificados = []
+        for item in itens:
+            preco = self.buscar(item.sabor, item.tamanho)
+            if preco is None:
+                return None, f'Item fora do catálogo: {item.sabor} ({item.tamanho}).'
+            precificados.append(item.model_copy(update={
+                'sabor': preco.sabor, 'tamanho': preco.tamanho, 'preco_unitario': preco.preco,
+            }))
+        return precificados, None
+
+
+# Índice do processo: None até a primeira carga do catálogo.
+_indice_precos = None
+
+
+def pegar_indice_precos():
+    return _indice_precos
+
+
+def definir_indice_precos(indice):
+    '''
+    Substitui o índice do processo (troca atômica: uma única atribuição).
+    '''
+
+    global _indice_precos
+    _indice_precos = indice
+
+
+async def carregar_catalogo(session=None):
+    '''
+    Lê o catálogo, monta um novo índice (com os itens ativos) e o coloca no lugar do atual.
+    Retorna o novo índice.
+    '''
+
+    if session is None:
+        async with pegar_fabrica_sessoes()() as session:
+            return await carregar_catalogo(session)
+
+    # Lê também os inativos (o catálogo é pequeno): basta um item cadastrado para que a
+    # precificação pelo servidor fique ligada.
+    itens = (await session.execute(
+        select(ItemCatalogo.sabor, ItemCatalogo.tamanho, ItemCatalogo.preco, ItemCatalogo.ativo)
+    )).all()
+    indice = IndicePrecos([item for item in itens if item.ativo], cadastrado=bool(itens))
+    definir_indice_precos(indice)
+    return indice
+
+
+async def pegar_ou_carregar_indice():
+    '''
+    Retorna o índice do processo, carregando o catálogo se ele ainda não foi carregado
+    (ex: o banco estava indisponível na inicialização).
+    '''
+
+    indice = pegar_indice_precos()
+    if indice is None:
+        indice = await carregar_catalogo()
+    return indice
+
+
+async def recarregar_catalogo_periodicamente(intervalo):
+    '''
+    Recarrega o catálogo a cada 'intervalo' segundos (tarefa iniciada no lifespan), para que
+    as alterações feitas por outros workers cheguem a este.
+    '''
+
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            await carregar_catalogo()
+        except SQLAlchemyError:
+            # Mantém o índice atual; a próxima rodada tenta de novo.
+            logger.exception('Falha ao recarregar o catálogo de preços.')
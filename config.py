@@ -0,0 +1,291 @@
+# Importa o módulo 'os' para acessar variáveis de ambiente do sistema.
+import os
+
+# Importa o decorador 'dataclass', usado para declarar a classe de configurações de forma enxuta.
+from dataclasses import dataclass, field
+
+# Importa o tipo Optional, que permite indicar que um valor pode ser None.
+from typing import Optional
+
+
+def _ler_int(nome, padrao):
+    '''
+    Lê uma variável de ambiente inteira, usando 'padrao' quando ela não estiver definida.
+    '''
+
+    valor = os.getenv(nome)
+    return int(valor) if valor not in (None, '') else padrao
+
+
+def _ler_bool(nome, padrao):
+    '''
+    Lê uma variável de ambiente booleana ('1', 'true', 'sim', 'on' são considerados verdadeiros).
+    '''
+
+    valor = os.getenv(nome)
+    if valor in (None, ''):
+        return padrao
+    return valor.strip().lower() in ('1', 'true', 'sim', 'yes', 'on')
+
+
+# ===========================
+# ⚙️ Configurações da aplicação
+# ===========================
+@dataclass(frozen=True)
+class Settings:
+    # Chave usada para assinar tokens (lida da variável SECRET_KEY).
+    secret_key: Optional[str] = None
+
+    # Número de threads dedicadas ao hash/verificação de senhas.
+    # Por padrão, uma por núcleo de CPU: o bcrypt libera o GIL durante o cálculo.
+    hash_workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+
+    # Quantidade máxima de operações de hash aguardando uma thread livre.
+    # Acima disso, novas requisições recebem 429 (Too Many Requests).
+    hash_fila: int = 64
+
+    # Hash de senhas (veja security.criar_contexto_senhas e benchmarks/bench_hash.py).
+    # - senha_esquemas: algoritmos aceitos; o primeiro é usado nos novos hashes (ex: "argon2,bcrypt").
+    # - senha_bcrypt_rounds: custo do bcrypt; calibre com o benchmark para a latência desejada.
+    # - senha_argon2_*: custo de tempo, memória (KiB) e paralelismo do argon2 (requer argon2-cffi).
+    # Ao alterar esses valores, os hashes existentes são refeitos no próximo login de cada usuário.
+    senha_esquemas: str = 'bcrypt'
+    senha_bcrypt_rounds: int = 12
+    senha_argon2_time_cost: int = 2
+    senha_argon2_memory_cost: int = 65536
+    senha_argon2_parallelism: int = 2
+
+    # URL do banco de dados no formato do SQLAlchemy (driver síncrono).
+    # É a mesma URL usada pelo alembic; a versão assíncrona é derivada dela.
+    database_url: str = 'sqlite:///banco.db'
+
+    # Réplicas de leitura (URLs no formato de 'database_url', separadas por vírgula).
+    # As consultas somente leitura (SELECT) vão para as réplicas, em rodízio; escritas e as
+    # leituras da mesma requisição após uma escrita vão para o banco principal.
+    # - db_replica_quarentena_segundos: tempo que uma réplica com erro de conexão fica fora do rodízio.
+    # Ex. local: DATABASE_REPLICAS=sqlite:///replica1.db,sqlite:///replica2.db (cópias do banco.db).
+    database_replicas: str = ''
+    db_replica_quarentena_segundos: int = 30
+
+    # Driver assíncrono usado pela aplicação (ex: 'aiosqlite', 'asyncpg').
+    # Quando omitido, é escolhido a partir do banco informado em 'database_url'.
+    database_async_driver: Optional[str] = None
+
+    # Pool de conexões de cada engine.
+    # - db_pool_size: conexões mantidas abertas permanentemente.
+    # - db_max_overflow: conexões extras abertas em picos (fechadas ao serem devolvidas).
+    # - db_pool_timeout: segundos aguardando uma conexão livre antes de falhar.
+    # - db_pool_recycle: segundos até uma conexão ser reaberta (evita conexões derrubadas pelo servidor).
+    # - db_pool_pre_ping: testa a conexão antes de usá-la, descartando conexões mortas.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # PRAGMAs aplicados a cada conexão SQLite.
+    # - WAL permite leituras simultâneas a uma escrita e reduz o custo de cada commit.
+    # - synchronous=NORMAL é seguro com WAL (só o último commit pode se perder em queda de energia).
+    # - busy_timeout faz a conexão aguardar o lock de escrita em vez de falhar com "database is locked".
+    # - mmap_size e cache_size (em KiB quando negativo) mantêm as páginas quentes em memória.
+    sqlite_journal_mode: str = 'WAL'
+    sqlite_synchronous: str = 'NORMAL'
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268435456
+    sqlite_cache_size: int = -65536
+
+    # Quantidade de pedidos gravados por transação na importação em lote.
+    lote_tamanho_chunk: int = 500
+
+    # Tokens de acesso (JWT).
+    # - token_algoritmo: algoritmo de assinatura (HS256 usa a SECRET_KEY como chave).
+    # - token_acesso_minutos / token_refresh_dias: validade dos tokens de acesso e de renovação.
+    # - token_cache_tamanho / token_cache_ttl: tokens já verificados mantidos em memória
+    #   (quantidade e segundos), evitando repetir a verificação da assinatura a cada requisição.
+    token_algoritmo: str = 'HS256'
+    token_acesso_minutos: int = 30
+    token_refresh_dias: int = 7
+    token_cache_tamanho: int = 10000
+    token_cache_ttl: int = 60
+
+    # Segundos que um pedido reservado na fila de preparo fica com quem o reservou.
+    # Se não for finalizado nesse tempo (ex: o worker caiu), o pedido volta para a fila.
+    fila_reserva_segundos: int = 300
+
+    # Linhas buscadas do banco a cada lote na exportação de pedidos (cursor no servidor).
+    exportacao_tamanho_lote: int = 1000
+
+    # Limites de tentativas de login (força bruta / credential stuffing).
+    # - login_ip_* / login_email_*: balde de tokens por IP e por e-mail
+    #   (capacidade = rajada máxima; por_minuto = ritmo sustentado).
+    # - login_bloqueio_falhas: falhas seguidas de um e-mail que disparam o bloqueio.
+    # - login_bloqueio_segundos / login_bloqueio_maximo: duração do primeiro bloqueio,
+    #   dobrada a cada novo bloqueio, até o máximo.
+    # - login_bloqueio_janela: segundos sem falhas após os quais o histórico do e-mail é esquecido.
+    # - login_limitador_tamanho: entradas mantidas em memória (as menos usadas são descartadas).
+    # - login_limitador_arquivo: arquivo SQLite que guarda os limites, compartilhado pelos workers
+    #   da máquina (vazio = memória de cada worker: com N workers, até N vezes os limites).
+    login_ip_capacidade: int = 20
+    login_ip_por_minuto: int = 10
+    login_email_capacidade: int = 5
+    login_email_por_minuto: int = 2
+    login_bloqueio_falhas: int = 5
+    login_bloqueio_segundos: int = 30
+    login_bloqueio_maximo: int = 900
+    login_bloqueio_janela: int = 900
+    login_limitador_tamanho: int = 100000
+    login_limitador_arquivo: str = ''
+
+    # Cache das respostas de leitura de pedidos (GET /orders/...).
+    # - cache_respostas_ttl: segundos que uma resposta fica em cache (0 desativa; o ETag/304 continua valendo).
+    #   Com vários workers e o backend em memória, cada worker tem o seu cache: uma alteração feita
+    #   em um worker só aparece nos demais após esse tempo, por isso o padrão é curto.
+    # - cache_respostas_tamanho: quantidade máxima de entradas em memória (LRU).
+    cache_respostas_ttl: int = 5
+    cache_respostas_tamanho: int = 10000
+
+    # Chaves de idempotência da criação de pedidos (cabeçalho Idempotency-Key).
+    # - idempotencia_ttl: segundos que a resposta de uma chave fica disponível para repetições.
+    # - idempotencia_cache_tamanho: chaves recentes mantidas em memória (evitam a consulta ao banco).
+    # - idempotencia_limpeza_intervalo: segundos entre as remoções das chaves expiradas do banco.
+    idempotencia_ttl: int = 86400
+    idempotencia_cache_tamanho: int = 10000
+    idempotencia_limpeza_intervalo: int = 300
+
+    # Gravação em grupo dos pedidos criados em POST /orders/pedido (group commit).
+    # - pedidos_gravacao_em_grupo: ativa o modo (desligado, cada pedido tem o próprio commit).
+    # - pedidos_grupo_tamanho: pedidos gravados por transação.
+    # - pedidos_grupo_espera_ms: espera máxima do primeiro pedido de um grupo por outros pedidos.
+    pedidos_gravacao_em_grupo: bool = False
+    pedidos_grupo_tamanho: int = 100
+    pedidos_grupo_espera_ms: int = 5
+
+    # Segundos entre as recargas do catálogo de preços em memória (cada worker tem o seu índice;
+    # uma alteração feita em um worker chega aos demais em até esse tempo).
+    catalogo_recarga_segundos: int = 60
+
+    # Arquivamento de pedidos encerrados (python -m arquivamento).
+    # - arquivamento_dias: idade mínima (pela data de criação) dos pedidos FINALIZADOS/CANCELADOS arquivados.
+    # - arquivamento_lote: pedidos movidos por transação (cada lote é confirmado separadamente).
+    # - arquivamento_pausa_ms: pausa entre os lotes, liberando o banco para as requisições.
+    arquivamento_dias: int = 180
+    arquivamento_lote: int = 1000
+    arquivamento_pausa_ms: int = 50
+
+    # Servidor de produção (server.py).
+    # - servidor_workers: processos atendendo requisições (padrão: um por núcleo de CPU).
+    # - servidor_loop / servidor_http: implementação do event loop e do parser HTTP
+    #   ('auto' usa uvloop e httptools quando instalados).
+    # - servidor_keep_alive: segundos que uma conexão ociosa fica aberta para reuso.
+    # - servidor_backlog: conexões aguardando aceite na fila do sistema operacional.
+    # - servidor_timeout_desligamento: segundos para concluir as requisições em andamento ao desligar.
+    # - servidor_limite_concorrencia: conexões simultâneas por worker antes de responder 503 (0 = sem limite).
+    servidor_host: str = '0.0.0.0'
+    servidor_porta: int = 8000
+    servidor_workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    servidor_loop: str = 'auto'
+    servidor_http: str = 'auto'
+    servidor_keep_alive: int = 5
+    servidor_backlog: int = 2048
+    servidor_timeout_desligamento: int = 30
+    servidor_limite_concorrencia: int = 0
+
+    @classmethod
+    def do_ambiente(cls):
+        '''
+        Constrói as configurações a partir das variáveis de ambiente (e do arquivo .env).
+        '''
+
+        # Importa e carrega o arquivo .env apenas quando as configurações são lidas do ambiente
+        # (configurações passadas diretamente para create_app não dependem do .env).
+        from dotenv import load_dotenv
+        load_dotenv()
+
+        padrao = cls()
+        return cls(
+            secret_key=os.getenv('SECRET_KEY'),
+            hash_workers=_ler_int('HASH_WORKERS', padrao.hash_workers),
+            hash_fila=_ler_int('HASH_FILA', padrao.hash_fila),
+            senha_esquemas=os.getenv('SENHA_ESQUEMAS', padrao.senha_esquemas),
+            senha_bcrypt_rounds=_ler_int('SENHA_BCRYPT_ROUNDS', padrao.senha_bcrypt_rounds),
+            senha_argon2_time_cost=_ler_int('SENHA_ARGON2_TIME_COST', padrao.senha_argon2_time_cost),
+            senha_argon2_memory_cost=_ler_int('SENHA_ARGON2_MEMORY_COST', padrao.senha_argon2_memory_cost),
+            senha_argon2_parallelism=_ler_int('SENHA_ARGON2_PARALLELISM', padrao.senha_argon2_parallelism),
+            database_url=os.getenv('DATABASE_URL', padrao.database_url),
+            database_async_driver=os.getenv('DATABASE_ASYNC_DRIVER') or None,
+            database_replicas=os.getenv('DATABASE_REPLICAS', padrao.database_replicas),
+            db_replica_quarentena_segundos=_ler_int('DB_REPLICA_QUARENTENA_SEGUNDOS', padrao.db_replica_quarentena_segundos),
+            db_pool_size=_ler_int('DB_POOL_SIZE', padrao.db_pool_size),
+            db_max_overflow=_ler_int('DB_MAX_OVERFLOW', padrao.db_max_overflow),
+            db_pool_timeout=_ler_int('DB_POOL_TIMEOUT', padrao.db_pool_timeout),
+            db_pool_recycle=_ler_int('DB_POOL_RECYCLE', padrao.db_pool_recycle),
+            db_pool_pre_ping=_ler_bool('DB_POOL_PRE_PING', padrao.db_pool_pre_ping),
+            sqlite_journal_mode=os.getenv('SQLITE_JOURNAL_MODE', padrao.sqlite_journal_mode),
+            sqlite_synchronous=os.getenv('SQLITE_SYNCHRONOUS', padrao.sqlite_synchronous),
+            sqlite_busy_timeout_ms=_ler_int('SQLITE_BUSY_TIMEOUT_MS', padrao.sqlite_busy_timeout_ms),
+            sqlite_mmap_size=_ler_int('SQLITE_MMAP_SIZE', padrao.sqlite_mmap_size),
+            sqlite_cache_size=_ler_int('SQLITE_CACHE_SIZE', padrao.sqlite_cache_size),
+            lote_tamanho_chunk=_ler_int('LOTE_TAMANHO_CHUNK', padrao.lote_tamanho_chunk),
+            token_algoritmo=os.getenv('TOKEN_ALGORITMO', padrao.token_algoritmo),
+            token_acesso_minutos=_ler_int('TOKEN_ACESSO_MINUTOS', padrao.token_acesso_minutos),
+            token_refresh_dias=_ler_int('TOKEN_REFRESH_DIAS', padrao.token_refresh_dias),
+            token_cache_tamanho=_ler_int('TOKEN_CACHE_TAMANHO', padrao.token_cache_tamanho),
+            token_cache_ttl=_ler_int('TOKEN_CACHE_TTL', padrao.token_cache_ttl),
+            fila_reserva_segundos=_ler_int('FILA_RESERVA_SEGUNDOS', padrao.fila_reserva_segundos),
+            exportacao_tamanho_lote=_ler_int('EXPORTACAO_TAMANHO_LOTE', padrao.exportacao_tamanho_lote),
+            login_ip_capacidade=_ler_int('LOGIN_IP_CAPACIDADE', padrao.login_ip_capacidade),
+            login_ip_por_minuto=_ler_int('LOGIN_IP_POR_MINUTO', padrao.login_ip_por_minuto),
+            login_email_capacidade=_ler_int('LOGIN_EMAIL_CAPACIDADE', padrao.login_email_capacidade),
+            login_email_por_minuto=_ler_int('LOGIN_EMAIL_POR_MINUTO', padrao.login_email_por_minuto),
+            login_bloqueio_falhas=_ler_int('LOGIN_BLOQUEIO_FALHAS', padrao.login_bloqueio_falhas),
+            login_bloqueio_segundos=_ler_int('LOGIN_BLOQUEIO_SEGUNDOS', padrao.login_bloqueio_segundos),
+            login_bloqueio_maximo=_ler_int('LOGIN_BLOQUEIO_MAXIMO', padrao.login_bloqueio_maximo),
+            login_bloqueio_janela=_ler_int('LOGIN_BLOQUEIO_JANELA', padrao.login_bloqueio_janela),
+            login_limitador_tamanho=_ler_int('LOGIN_LIMITADOR_TAMANHO', padrao.login_limitador_tamanho),
+            login_limitador_arquivo=os.getenv('LOGIN_LIMITADOR_ARQUIVO', padrao.login_limitador_arquivo),
+            cache_respostas_ttl=_ler_int('CACHE_RESPOSTAS_TTL', padrao.cache_respostas_ttl),
+            cache_respostas_tamanho=_ler_int('CACHE_RESPOSTAS_TAMANHO', padrao.cache_respostas_tamanho),
+            idempotencia_ttl=_ler_int('IDEMPOTENCIA_TTL', padrao.idempotencia_ttl),
+            idempotencia_cache_tamanho=_ler_int('IDEMPOTENCIA_CACHE_TAMANHO', padrao.idempotencia_cache_tamanho),
+            idempotencia_limpeza_intervalo=_ler_int('IDEMPOTENCIA_LIMPEZA_INTERVALO', padrao.idempotencia_limpeza_intervalo),
+            pedidos_gravacao_em_grupo=_ler_bool('PEDIDOS_GRAVACAO_EM_GRUPO', padrao.pedidos_gravacao_em_grupo),
+            pedidos_grupo_tamanho=_ler_int('PEDIDOS_GRUPO_TAMANHO', padrao.pedidos_grupo_tamanho),
+            pedidos_grupo_espera_ms=_ler_int('PEDIDOS_GRUPO_ESPERA_MS', padrao.pedidos_grupo_espera_ms),
+            catalogo_recarga_segundos=_ler_int('CATALOGO_RECARGA_SEGUNDOS', padrao.catalogo_recarga_segundos),
+            arquivamento_dias=_ler_int('ARQUIVAMENTO_DIAS', padrao.arquivamento_dias),
+            arquivamento_lote=_ler_int('ARQUIVAMENTO_LOTE', padrao.arquivamento_lote),
+            arquivamento_pausa_ms=_ler_int('ARQUIVAMENTO_PAUSA_MS', padrao.arquivamento_pausa_ms),
+            servidor_host=os.getenv('SERVIDOR_HOST', padrao.servidor_host),
+            servidor_porta=_ler_int('SERVIDOR_PORTA', padrao.servidor_porta),
+            servidor_workers=_ler_int('SERVIDOR_WORKERS', padrao.servidor_workers),
+            servidor_loop=os.getenv('SERVIDOR_LOOP', padrao.servidor_loop),
+            servidor_http=os.getenv('SERVIDOR_HTTP', padrao.servidor_http),
+            servidor_keep_alive=_ler_int('SERVIDOR_KEEP_ALIVE', padrao.servidor_keep_alive),
+            servidor_backlog=_ler_int('SERVIDOR_BACKLOG', padrao.servidor_backlog),
+            servidor_timeout_desligamento=_ler_int('SERVIDOR_TIMEOUT_DESLIGAMENTO', padrao.servidor_timeout_desligamento),
+            servidor_limite_concorrencia=_ler_int('SERVIDOR_LIMITE_CONCORRENCIA', padrao.servidor_limite_concorrencia),
+        )
+
+
+# Configurações do processo atual (None até a primeira leitura).
+_settings = None
+
+
+def pegar_settings():
+    '''
+    Retorna as configurações do processo atual (lidas do ambiente apenas uma vez).
+    '''
+
+    global _settings
+    if _settings is None:
+        _settings = Settings.do_ambiente()
+    return _settings
+
+
+def definir_settings(settings):
+    '''
+    Substitui as configurações do processo atual (ex: create_app(settings) em testes e benchmarks).
+    '''
+
+    global _settings
+    _settings = settings
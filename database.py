@@ -0,0 +1,377 @@
+# Importa o módulo 'os', usado para registrar o descarte dos engines em processos filhos (fork).
+import os
+
+# Importa o 'itertools', usado no rodízio (round-robin) entre as réplicas de leitura.
+import itertools
+
+# Importa o relógio monotônico, usado na quarentena das réplicas com erro de conexão.
+from time import monotonic
+
+# Importa a função que cria o engine síncrono (usado pelo alembic e por scripts utilitários)
+# e o módulo de eventos, usado para configurar cada nova conexão.
+from sqlalchemy import create_engine, event
+
+# Importa o 'make_url', usado para ler e ajustar URLs de conexão do SQLAlchemy.
+from sqlalchemy.engine import make_url
+
+# Importa as versões assíncronas do engine e da fábrica de sessões.
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+# Importa o 'sessionmaker' síncrono e a classe Session, base da sessão que separa leituras e escritas.
+from sqlalchemy.orm import sessionmaker, Session
+
+# Importa o tipo de comando SELECT, usado para reconhecer as consultas somente leitura.
+from sqlalchemy.sql import Select
+
+# Importa o DBAPIError, base dos erros levantados pelo driver do banco (ex: falha de conexão).
+from sqlalchemy.exc import DBAPIError
+
+# Importa as configurações da aplicação (URL do banco, pool e PRAGMAs do SQLite).
+from config import pegar_settings
+
+# Importa os eventos que contam as consultas e medem o tempo gasto no banco por requisição.
+from instrumentacao import instrumentar_engine
+
+
+# Driver assíncrono padrão de cada banco suportado.
+# Outro driver pode ser escolhido pela variável de ambiente DATABASE_ASYNC_DRIVER.
+DRIVERS_ASSINCRONOS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+    'mysql': 'aiomysql',
+}
+
+# Valores aceitos nos PRAGMAs configuráveis (PRAGMAs não aceitam parâmetros, então os valores são validados).
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SYNCHRONOUS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+
+def url_assincrona(url, driver=None):
+    '''
+    Converte uma URL síncrona (ex: 'sqlite:///banco.db') na URL equivalente
+    com driver assíncrono (ex: 'sqlite+aiosqlite:///banco.db').
+    '''
+
+    url = make_url(url)
+    backend = url.get_backend_name()
+    driver = driver or DRIVERS_ASSINCRONOS.get(backend)
+
+    if driver is None:
+        raise ValueError(f'Nenhum driver assíncrono conhecido para o banco "{backend}". '
+                         'Defina DATABASE_ASYNC_DRIVER.')
+
+    return url.set(drivername=f'{backend}+{driver}')
+
+
+def _sqlite_em_memoria(url):
+    # Bancos SQLite em memória usam um pool próprio (sem tamanho configurável) e não suportam WAL.
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def _configurar_sqlite(engine, settings):
+    '''
+    Registra um evento que aplica os PRAGMAs de desempenho a cada nova conexão SQLite.
+    '''
+
+    journal_mode = settings.sqlite_journal_mode.upper()
+    synchronous = settings.sqlite_synchronous.upper()
+
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f'SQLITE_JOURNAL_MODE inválido: {settings.sqlite_journal_mode}')
+    if synchronous not in SYNCHRONOUS:
+        raise ValueError(f'SQLITE_SYNCHRONOUS inválido: {settings.sqlite_synchronous}')
+
+    em_memoria = _sqlite_em_memoria(engine.url)
+
+    @event.listens_for(engine, 'connect')
+    def aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if not em_memoria:
+                cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+                cursor.execute(f'PRAGMA mmap_size={int(settings.sqlite_mmap_size)}')
+            cursor.execute(f'PRAGMA synchronous={synchronous}')
+            cursor.execute(f'PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}')
+            cursor.execute(f'PRAGMA cache_size={int(settings.sqlite_cache_size)}')
+        finally:
+            cursor.close()
+
+
+def criar_engine(url=None, assincrono=False, settings=None):
+    '''
+    Fábrica de engines da aplicação.
+
+    Parâmetros:
+    - url: URL síncrona do banco (padrão: DATABASE_URL).
+    - assincrono: quando True, cria um AsyncEngine com o driver assíncrono correspondente.
+    - settings: configurações a usar (padrão: as lidas do ambiente).
+
+    O pool de conexões é configurado a partir das variáveis DB_POOL_* e, no SQLite,
+    cada conexão recebe os PRAGMAs SQLITE_* (WAL, synchronous, busy_timeout, mmap e cache).
+    Todo engine criado aqui é instrumentado (quantidade e tempo das consultas por requisição).
+    '''
+
+    settings = settings or pegar_settings()
+    url = make_url(url or settings.database_url)
+
+    opcoes = {}
+    if not _sqlite_em_memoria(url):
+        opcoes.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+        )
+
+    if assincrono:
+        engine = create_async_engine(url_assincrona(url, settings.database_async_driver), **opcoes)
+        # Os eventos de conexão são registrados no engine síncrono que o AsyncEngine encapsula.
+        engine_sync = engine.sync_engine
+    else:
+        engine = create_engine(url, **opcoes)
+        engine_sync = engine
+
+    if url.get_backend_name() == 'sqlite':
+        _configurar_sqlite(engine_sync, settings)
+
+    instrumentar_engine(engine_sync)
+
+    return engine
+
+
+# ===========================
+# 🔀 Réplicas de leitura
+# ===========================
+# Chaves em session.info: a que prende a sessão ao banco principal (ex: após uma escrita)
+# e a réplica escolhida para as leituras da sessão.
+USAR_PRIMARIO = 'usar_primario'
+REPLICA = 'replica'
+
+
+class RoteadorReplicas:
+    '''
+    Escolhe a réplica de leitura de cada consulta, em rodízio (round-robin).
+
+    - engines: engines assíncronos das réplicas.
+    - quarentena: segundos que uma réplica fica fora do rodízio após um erro de conexão.
+
+    Uma réplica que falha ao conectar (ou perde a conexão) é marcada e pulada até o fim
+    da quarentena; depois disso, volta ao rodízio e é testada pela próxima consulta.
+    A consulta que encontrou a falha é repetida no banco principal (SessaoRoteada.execute);
+    as seguintes usam as demais réplicas.
+    Sem nenhuma réplica disponível, as leituras vão para o banco principal.
+    '''
+
+    def __init__(self, engines, quarentena):
+        self.engines = engines
+        self._quarentena = quarentena
+        self._indices = itertools.cycle(range(len(engines)))
+        self._indisponivel_ate = [0.0] * len(engines)
+
+        for indice, engine in enumerate(engines):
+            self._monitorar(indice, engine.sync_engine)
+
+    def _monitorar(self, indice, engine_sync):
+        @event.listens_for(engine_sync, 'handle_error')
+        def marcar_falha(contexto):
+            # Erro ao abrir a conexão (sem conexão no contexto) ou conexão perdida.
+            if contexto.connection is None or contexto.is_disconnect:
+                self._indisponivel_ate[indice] = monotonic() + self._quarentena
+
+    def disponivel(self, indice):
+        return self._indisponivel_ate[indice] <= monotonic()
+
+    def escolher(self):
+        '''
+        Retorna o índice da próxima réplica disponível, ou None se todas estiverem em quarentena.
+        '''
+
+        for _ in range(len(self.engines)):
+            indice = next(self._indices)
+            if self.disponivel(indice):
+                return indice
+        return None
+
+
+class SessaoRoteada(Session):
+    '''
+    Sessão que envia as consultas somente leitura para as réplicas e o resto para o banco principal.
+
+    - Vão para uma réplica: SELECTs sem FOR UPDATE, enquanto a sessão ainda não escreveu nada.
+      A réplica é escolhida na primeira leitura e usada em toda a sessão (as leituras de uma
+      requisição enxergam o mesmo estado), a menos que entre em quarentena.
+    - Vão para o principal: INSERT/UPDATE/DELETE, o flush do ORM, SELECT ... FOR UPDATE e
+      comandos em texto (text()).
+    - Read-your-writes: após a primeira escrita, todas as consultas da sessão (ou seja, da
+      requisição) vão para o principal, mesmo depois do commit, e enxergam o que foi gravado.
+      Uma rota pode chamar 'usar_primario(session)' para ler do principal desde o início.
+
+    As réplicas podem estar alguns instantes atrasadas em relação ao principal; leituras que
+    não toleram esse atraso devem usar o principal.
+
+    Se a réplica falhar ao conectar (ou perder a conexão), ela entra em quarentena e a
+    consulta é repetida uma vez no principal, sem chegar ao cliente como erro.
+    '''
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if _roteador is not None and not self.info.get(USAR_PRIMARIO):
+            if not self._flushing and isinstance(clause, Select) and clause._for_update_arg is None:
+                indice = self.info.get(REPLICA)
+                if indice is None or not _roteador.disponivel(indice):
+                    indice = self.info[REPLICA] = _roteador.escolher()
+                if indice is not None:
+                    return _roteador.engines[indice].sync_engine
+            else:
+                self.info[USAR_PRIMARIO] = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def execute(self, statement, *args, **kw):
+        try:
+            return super().execute(statement, *args, **kw)
+        except DBAPIError as erro:
+            # Só repete leituras que foram a uma réplica agora em quarentena (falha de conexão);
+            # erros do principal, ou da própria consulta, seguem para a rota.
+            indice = self.info.get(REPLICA)
+            if self.info.get(USAR_PRIMARIO) or indice is None or _roteador.disponivel(indice):
+                raise
+            self.info[USAR_PRIMARIO] = True
+            if erro.connection_invalidated:
+                # A conexão perdida faz parte da transação da sessão, que até aqui só leu dados
+                # (a primeira escrita leva a sessão ao principal): o rollback a descarta.
+                self.rollback()
+            return super().execute(statement, *args, **kw)
+
+
+def usar_primario(session):
+    '''
+    Faz todas as consultas seguintes da sessão irem ao banco principal (ex: leituras
+    que precisam enxergar uma escrita recém-confirmada por outra requisição).
+    Aceita tanto a AsyncSession quanto a Session síncrona.
+    '''
+
+    session.info[USAR_PRIMARIO] = True
+
+
+def _criar_roteador(settings):
+    urls = [url.strip() for url in settings.database_replicas.split(',') if url.strip()]
+    if not urls:
+        return None
+    engines = [criar_engine(url, assincrono=True, settings=settings) for url in urls]
+    return RoteadorReplicas(engines, settings.db_replica_quarentena_segundos)
+
+
+# ===========================
+# 🛢️ Engines e sessões do processo
+# ===========================
+# Os engines não são criados na importação do módulo: a aplicação cria o engine assíncrono
+# no início do lifespan (iniciar_banco) e o fecha no desligamento (encerrar_banco).
+# Scripts fora da API obtêm os engines sob demanda (pegar_engine / pegar_engine_async).
+_engine_sync = None
+_sessoes_sync = None
+_engine_async = None
+_sessoes_async = None
+_roteador = None
+
+
+def iniciar_banco(settings=None):
+    '''
+    Cria o engine assíncrono (banco principal), os engines das réplicas de leitura
+    (DATABASE_REPLICAS) e a fábrica de sessões usados pelas rotas.
+    Chamado no início do lifespan da aplicação.
+    '''
+
+    global _engine_async, _sessoes_async, _roteador
+    if _engine_async is None:
+        settings = settings or pegar_settings()
+        _engine_async = criar_engine(assincrono=True, settings=settings)
+        _roteador = _criar_roteador(settings)
+
+        # 'expire_on_commit=False' mantém os atributos dos objetos acessíveis após o commit
+        # (ex: o id de um pedido recém-criado), sem disparar uma nova consulta ao banco.
+        # 'SessaoRoteada' envia as leituras para as réplicas, quando configuradas.
+        _sessoes_async = async_sessionmaker(bind=_engine_async, expire_on_commit=False,
+                                            sync_session_class=SessaoRoteada)
+    return _engine_async
+
+
+async def encerrar_banco():
+    '''
+    Fecha as conexões dos engines abertos (chamado no desligamento da aplicação).
+    '''
+
+    global _engine_sync, _sessoes_sync, _engine_async, _sessoes_async, _roteador
+    if _engine_async is not None:
+        await _engine_async.dispose()
+    if _roteador is not None:
+        for engine in _roteador.engines:
+            await engine.dispose()
+    if _engine_sync is not None:
+        _engine_sync.dispose()
+    _engine_sync = _sessoes_sync = _engine_async = _sessoes_async = _roteador = None
+
+
+def pegar_engine_async():
+    # Engine assíncrono: usado pelas rotas da API.
+    # Com ele, as consultas ao banco não bloqueiam o event loop enquanto aguardam o I/O.
+    return iniciar_banco()
+
+
+def pegar_fabrica_sessoes():
+    # Fábrica de sessões assíncronas usada pelas rotas.
+    iniciar_banco()
+    return _sessoes_async
+
+
+def pegar_engine():
+    # Engine síncrono: mantido para scripts fora da API (benchmarks, manutenção).
+    global _engine_sync, _sessoes_sync
+    if _engine_sync is None:
+        _engine_sync = criar_engine()
+        _sessoes_sync = sessionmaker(bind=_engine_sync)
+    return _engine_sync
+
+
+def pegar_fabrica_sessoes_sync():
+    # Fábrica de sessões síncronas, associada ao engine síncrono.
+    pegar_engine()
+    return _sessoes_sync
+
+
+# Nomes antigos do módulo (db, db_async, SessionLocal, AsyncSessionLocal),
+# resolvidos sob demanda para que a importação continue sem abrir nenhum engine.
+_NOMES_SOB_DEMANDA = {
+    'db': pegar_engine,
+    'db_async': pegar_engine_async,
+    'SessionLocal': pegar_fabrica_sessoes_sync,
+    'AsyncSessionLocal': pegar_fabrica_sessoes,
+}
+
+
+def __getattr__(nome):
+    if nome in _NOMES_SOB_DEMANDA:
+        return _NOMES_SOB_DEMANDA[nome]()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+def _descartar_conexoes_herdadas():
+    '''
+    Executado no processo filho logo após um fork (ex: gunicorn com --preload).
+
+    As conexões abertas pelo processo pai não podem ser usadas pelo filho: os dois
+    processos compartilhariam o mesmo socket/arquivo. 'dispose(close=False)' descarta
+    o pool herdado sem fechar as conexões do pai, e o filho abre as suas sob demanda.
+    '''
+
+    if _engine_sync is not None:
+        _engine_sync.dispose(close=False)
+    if _engine_async is not None:
+        _engine_async.sync_engine.dispose(close=False)
+    if _roteador is not None:
+        for engine in _roteador.engines:
+            engine.sync_engine.dispose(close=False)
+
+
+# Registra o descarte automático das conexões em cada processo filho criado por fork.
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_descartar_conexoes_herdadas)
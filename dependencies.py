@@ -1,34 +1,50 @@
-# Importa o objeto 'db' (conexão com o banco de dados) definido no módulo models.
-from models import db
-
-# Importa o 'sessionmaker' do SQLAlchemy, responsável por criar fábricas de sessão.
-# Cada sessão representa uma conexão temporária com o banco para executar operações (SELECT, INSERT, UPDATE, DELETE).
-from sqlalchemy.orm import sessionmaker
+# Importa o Depends, o HTTPException e o esquema de autenticação "Bearer" do FastAPI.
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+# Importa a verificação de tokens de acesso.
+from security import verificar_token
 
-# Cria uma fábrica de sessões chamada 'SessionLocal', associada ao banco de dados 'db'.
-# Isso permite criar novas sessões sem precisar configurar a conexão toda vez.
-SessionLocal = sessionmaker(bind=db)
+# Importa a função que retorna a fábrica de sessões assíncronas definida no módulo database.
+# Cada sessão representa uma conexão temporária com o banco para executar operações (SELECT, INSERT, UPDATE, DELETE).
+from database import pegar_fabrica_sessoes
 
 
-def pegar_sessao():
+async def pegar_sessao():
     """
     Função usada como dependência no FastAPI para fornecer uma sessão de banco de dados por requisição.
 
-    Essa função é do tipo generator (usa 'yield') e segue o padrão recomendado pelo FastAPI:
-    - Cria a sessão no início.
+    Essa função é do tipo generator assíncrono (usa 'yield') e segue o padrão recomendado pelo FastAPI:
+    - Cria a sessão assíncrona no início.
     - Entrega (yield) a sessão para a rota que a solicitou.
-    - Fecha a sessão automaticamente no final da requisição (no bloco 'finally').
+    - Fecha a sessão automaticamente no final da requisição (ao sair do bloco 'async with').
+
+    Como a sessão é assíncrona, as rotas devem aguardar (await) as operações no banco,
+    liberando o event loop para atender outras requisições durante o I/O.
     """
 
-    # Cria uma nova sessão a partir da fábrica definida acima.
-    session = SessionLocal()
-    
-    try:
+    # Cria uma nova sessão a partir da fábrica assíncrona.
+    async with pegar_fabrica_sessoes()() as session:
         # Entrega a sessão para o endpoint que solicitou a dependência.
         # Durante o uso, o FastAPI injeta essa sessão na rota.
         yield session
-    finally:
-        # Esse bloco é executado após o término da requisição, com ou sem erro.
-        # Fecha a sessão para liberar recursos e evitar conexões abertas.
-        session.close()
+
+
+# Lê o cabeçalho "Authorization: Bearer <token>".
+# 'auto_error=False' permite responder 401 (em vez de 403) quando o cabeçalho não é enviado.
+esquema_bearer = HTTPBearer(auto_error=False)
+
+
+async def pegar_usuario_atual(credenciais: HTTPAuthorizationCredentials = Depends(esquema_bearer)):
+    """
+    Dependência que identifica o usuário autenticado a partir do token de acesso.
+
+    O usuário é obtido das informações assinadas no token (id e se é administrador),
+    sem nenhuma consulta ao banco de dados. Tokens já verificados ficam em cache,
+    então a autenticação de cada requisição é uma checagem em memória.
+    """
+
+    if credenciais is None:
+        raise HTTPException(status_code=401, detail='Não autenticado.', headers={'WWW-Authenticate': 'Bearer'})
+
+    return verificar_token(credenciais.credentials)
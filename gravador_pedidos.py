@@ -0,0 +1,199 @@
+# Importa o 'asyncio', base da fila de gravação e da tarefa que grava os grupos de pedidos.
+import asyncio
+
+# Importa o 'logging', usado para registrar falhas inesperadas da tarefa de gravação.
+import logging
+
+# Importa o relógio monotônico, usado para limitar a espera de cada grupo.
+from time import monotonic
+
+# Importa o construtor de INSERT do SQLAlchemy.
+from sqlalchemy import insert
+
+# Importa as configurações da aplicação (tamanho e espera máxima de cada grupo).
+from config import pegar_settings
+
+# Importa a fábrica de sessões: o gravador usa as próprias sessões, fora das requisições.
+from database import pegar_fabrica_sessoes
+
+# Importa o modelo de pedidos e o status inicial de todo pedido.
+from models import Pedido, STATUS_PENDENTE
+
+# Importa a marcação das alterações que invalidam o cache de respostas no commit.
+from cache_respostas import marcar_alteracao
+
+
+logger = logging.getLogger(__name__)
+
+
+# ===========================
+# 🧺 Gravação de pedidos em grupo (group commit)
+# ===========================
+class GravadorPedidos:
+    '''
+    Agrupa os pedidos criados por requisições simultâneas e grava cada grupo com um único
+    INSERT em lote e um único commit.
+
+    - tamanho_grupo: pedidos por transação; um grupo cheio é gravado imediatamente.
+    - espera_ms: tempo máximo que o primeiro pedido de um grupo aguarda outros chegarem.
+
+    No SQLite, cada commit custa uma escrita síncrona em disco (fsync) e só uma transação
+    de escrita acontece por vez; com um commit por grupo, esse custo é dividido entre todos
+    os pedidos do grupo. Em troca, cada pedido espera até 'espera_ms' a mais (sob carga
+    baixa) antes de ser confirmado.
+
+    Cada requisição aguarda um Future, resolvido com o ID do pedido após o commit do grupo
+    (ou com o erro, se o pedido não puder ser gravado). Nenhum Future fica sem resposta:
+    um erro inesperado ou o cancelamento da tarefa falha os pedidos pendentes, e a tarefa
+    é recriada no próximo pedido. Deve ser usado a partir de um único event loop (cada
+    worker tem o seu gravador).
+    '''
+
+    def __init__(self, tamanho_grupo, espera_ms):
+        self._tamanho_grupo = tamanho_grupo
+        self._espera = espera_ms / 1000
+        self._fila = None
+        self._tarefa = None
+
+    def iniciar(self):
+        '''
+        Cria a fila e a tarefa que grava os grupos (no event loop atual).
+        '''
+
+        if self._tarefa is None or self._tarefa.done():
+            # Uma tarefa encerrada não grava mais nada: os pedidos que ficaram na fila antiga falham.
+            self._falhar_pendentes(RuntimeError('A gravação de pedidos foi interrompida.'))
+            self._fila = asyncio.Queue()
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def encerrar(self):
+        '''
+        Grava os pedidos que ainda estão na fila e encerra a tarefa.
+        '''
+
+        if self._tarefa is None:
+            return
+        if not self._tarefa.done():
+            await self._fila.put(None)
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+        self._falhar_pendentes(RuntimeError('A gravação de pedidos foi encerrada.'))
+        self._tarefa = None
+
+    async def gravar(self, usuario):
+        '''
+        Enfileira um novo pedido do usuário e aguarda o commit do grupo.
+        Retorna o ID gerado do pedido.
+        '''
+
+        if self._tarefa is None or self._tarefa.done():
+            self.iniciar()
+
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((usuario, futuro))
+        return await futuro
+
+    async def _executar(self):
+        encerrando = False
+        while not encerrando:
+            grupo = []
+            try:
+                primeiro = await self._fila.get()
+                if primeiro is None:
+                    break
+
+                # Junta os pedidos que chegarem até o grupo encher ou a espera máxima acabar.
+                grupo.append(primeiro)
+                limite = monotonic() + self._espera
+                while len(grupo) < self._tamanho_grupo:
+                    restante = limite - monotonic()
+                    try:
+                        proximo = self._fila.get_nowait() if restante <= 0 else await asyncio.wait_for(self._fila.get(), restante)
+                    except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                        break
+                    if proximo is None:
+                        encerrando = True
+                        break
+                    grupo.append(proximo)
+
+                await self._gravar_grupo(grupo)
+            except Exception as erro:
+                # Erro fora do banco (ex: um bug ao montar o grupo): só este grupo falha, e a tarefa continua.
+                logger.exception('Falha inesperada ao gravar um grupo de pedidos.')
+                for _, futuro in grupo:
+                    _resolver(futuro, erro=erro)
+            except asyncio.CancelledError:
+                # Tarefa cancelada: o grupo em andamento e os pedidos na fila falham, e o cancelamento segue.
+                erro = RuntimeError('A gravação de pedidos foi interrompida.')
+                for _, futuro in grupo:
+                    _resolver(futuro, erro=erro)
+                self._falhar_pendentes(erro)
+                raise
+
+    def _falhar_pendentes(self, erro):
+        # Resolve com erro os pedidos que ainda estão na fila (nenhuma requisição fica esperando).
+        while self._fila is not None and not self._fila.empty():
+            pedido = self._fila.get_nowait()
+            if pedido is not None:
+                _resolver(pedido[1], erro=erro)
+
+    async def _inserir(self, grupo):
+        async with pegar_fabrica_sessoes()() as session:
+            # INSERT em lote; 'sort_by_parameter_order' garante que os IDs retornados
+            # estejam na mesma ordem dos pedidos do grupo.
+            resultado = await session.execute(
+                insert(Pedido).returning(Pedido.id, sort_by_parameter_order=True),
+                [{'usuario': usuario, 'status': STATUS_PENDENTE, 'preco': 0} for usuario, _ in grupo]
+            )
+            ids = resultado.scalars().all()
+
+            # O commit também invalida as listagens em cache dos usuários do grupo.
+            marcar_alteracao(session, usuarios={usuario for usuario, _ in grupo}, pedidos=ids)
+            await session.commit()
+            return ids
+
+    async def _gravar_grupo(self, grupo):
+        try:
+            ids = await self._inserir(grupo)
+        except Exception as erro:
+            if len(grupo) == 1:
+                _resolver(grupo[0][1], erro=erro)
+                return
+            # Um pedido inválido não pode derrubar o grupo inteiro:
+            # grava os pedidos um a um, e só os que falharem recebem o erro.
+            for pedido in grupo:
+                await self._gravar_grupo([pedido])
+            return
+
+        for (_, futuro), id_pedido in zip(grupo, ids):
+            _resolver(futuro, id_pedido)
+
+
+def _resolver(futuro, resultado=None, erro=None):
+    # A requisição pode ter sido cancelada (ex: o cliente desconectou) enquanto aguardava.
+    if futuro.done():
+        return
+    if erro is not None:
+        futuro.set_exception(erro)
+    else:
+        futuro.set_result(resultado)
+
+
+# Gravador do processo (criado no primeiro uso).
+_gravador_pedidos = None
+
+
+def pegar_gravador_pedidos():
+    global _gravador_pedidos
+    if _gravador_pedidos is None:
+        settings = pegar_settings()
+        _gravador_pedidos = GravadorPedidos(settings.pedidos_grupo_tamanho, settings.pedidos_grupo_espera_ms)
+    return _gravador_pedidos
+
+
+def definir_gravador_pedidos(gravador):
+    '''
+    Substitui o gravador do processo (ex: por um GravadorPedidos com outros limites).
+    '''
+
+    global _gravador_pedidos
+    _gravador_pedidos = gravador
@@ -0,0 +1,173 @@
+# Importa o 'asyncio', usado na tarefa de limpeza periódica das chaves expiradas.
+import asyncio
+
+# Importa o 'hashlib' e o 'json', usados para calcular o hash do corpo da requisição.
+import hashlib
+import json
+
+# Importa o 'logging', usado para registrar falhas da limpeza periódica (que roda fora das requisições).
+import logging
+
+# Importa o 'timedelta', usado na validade das chaves.
+from datetime import timedelta
+
+# Importa o HTTPException (chave reutilizada com outra requisição) e a Response (resposta gravada).
+from fastapi import HTTPException, Response
+
+# Importa os construtores de comandos do SQLAlchemy e o SQLAlchemyError, base de todos os erros de banco.
+from sqlalchemy import select, delete
+from sqlalchemy.exc import SQLAlchemyError
+
+# Importa as configurações da aplicação (validade e tamanho do cache das chaves).
+from config import pegar_settings
+
+# Importa o cache em memória usado como backend padrão.
+from cache import CacheTTL
+
+# Importa a fábrica de sessões, usada pela limpeza periódica (fora de uma requisição).
+from database import pegar_fabrica_sessoes
+
+# Importa o modelo da tabela de chaves de idempotência.
+from models import ChaveIdempotencia, agora_utc
+
+
+logger = logging.getLogger(__name__)
+
+
+def hash_requisicao(dados):
+    '''
+    Hash do corpo da requisição (já validado), usado para recusar a mesma chave com outro corpo.
+    '''
+
+    serializado = json.dumps(dados, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(serializado.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def responder_repeticao(entrada, hash_atual):
+    '''
+    Devolve a resposta gravada para uma chave já usada.
+    Se a chave foi usada com outro corpo, responde 422 (o cliente reutilizou a chave por engano).
+    '''
+
+    hash_original, status_code, corpo = entrada
+    if hash_original != hash_atual:
+        raise HTTPException(status_code=422, detail='Idempotency-Key já utilizada com outra requisição.')
+
+    # 'Idempotent-Replayed' indica ao cliente que a resposta veio de uma requisição anterior.
+    return Response(content=corpo, status_code=status_code, media_type='application/json',
+                    headers={'Idempotent-Replayed': 'true'})
+
+
+# ===========================
+# 🔁 Registro de chaves de idempotência
+# ===========================
+class RegistroIdempotencia:
+    '''
+    Guarda a resposta de cada requisição enviada com o cabeçalho Idempotency-Key.
+
+    - backend: cache das chaves recentes (qualquer objeto com a interface BackendCache).
+    - ttl: segundos que a resposta de uma chave fica disponível para repetições.
+
+    A tabela 'chaves_idempotencia' é a fonte da verdade: a linha da chave é gravada na mesma
+    transação do pedido, então o pedido e a resposta gravada existem juntos (ou nenhum dos dois),
+    e duas requisições simultâneas com a mesma chave não criam dois pedidos (a chave primária
+    recusa a segunda). O backend em memória apenas evita a consulta ao banco nas repetições
+    recebidas pelo mesmo worker, como em uma rajada de retries.
+    '''
+
+    def __init__(self, backend, ttl):
+        self._backend = backend
+        self._ttl = ttl
+
+    async def buscar(self, session, usuario, chave):
+        '''
+        Retorna (hash_requisicao, status_code, corpo) da chave, ou None se ela não foi usada (ou expirou).
+        '''
+
+        entrada = self._backend.get((usuario, chave))
+        if entrada is not None:
+            return entrada
+
+        agora = agora_utc()
+        linha = (await session.execute(
+            select(ChaveIdempotencia.hash_requisicao, ChaveIdempotencia.status_code,
+                   ChaveIdempotencia.corpo, ChaveIdempotencia.expira_em)
+            .where(ChaveIdempotencia.usuario == usuario, ChaveIdempotencia.chave == chave,
+                   ChaveIdempotencia.expira_em > agora)
+        )).first()
+        if linha is None:
+            return None
+
+        entrada = (linha.hash_requisicao, linha.status_code, linha.corpo.encode('utf-8'))
+        self._backend.set((usuario, chave), entrada, ttl=(linha.expira_em - agora).total_seconds())
+        return entrada
+
+    def gravar(self, session, usuario, chave, hash_atual, status_code, corpo):
+        '''
+        Adiciona a resposta da chave à transação em andamento (gravada no commit, junto com o pedido).
+        Retorna a entrada a ser passada para 'lembrar' após o commit.
+        '''
+
+        session.add(ChaveIdempotencia(
+            usuario=usuario,
+            chave=chave,
+            hash_requisicao=hash_atual,
+            status_code=status_code,
+            corpo=corpo.decode('utf-8'),
+            expira_em=agora_utc() + timedelta(seconds=self._ttl),
+        ))
+        return (hash_atual, status_code, corpo)
+
+    def lembrar(self, usuario, chave, entrada):
+        '''
+        Guarda a entrada no backend em memória (chamado após o commit que gravou a chave).
+        '''
+
+        self._backend.set((usuario, chave), entrada, ttl=self._ttl)
+
+    async def remover_expiradas(self, session):
+        '''
+        Remove do banco as chaves expiradas e retorna quantas foram removidas.
+        '''
+
+        resultado = await session.execute(delete(ChaveIdempotencia).where(ChaveIdempotencia.expira_em <= agora_utc()))
+        await session.commit()
+        return resultado.rowcount
+
+
+# Registro do processo (criado no primeiro uso).
+_registro_idempotencia = None
+
+
+def pegar_registro_idempotencia():
+    global _registro_idempotencia
+    if _registro_idempotencia is None:
+        settings = pegar_settings()
+        backend = CacheTTL(tamanho_maximo=settings.idempotencia_cache_tamanho, ttl=settings.idempotencia_ttl)
+        _registro_idempotencia = RegistroIdempotencia(backend, ttl=settings.idempotencia_ttl)
+    return _registro_idempotencia
+
+
+def definir_registro_idempotencia(registro):
+    '''
+    Substitui o registro do processo (ex: por um RegistroIdempotencia com backend compartilhado).
+    '''
+
+    global _registro_idempotencia
+    _registro_idempotencia = registro
+
+
+async def limpar_chaves_periodicamente(intervalo):
+    '''
+    Remove as chaves expiradas a cada 'intervalo' segundos (tarefa iniciada no lifespan).
+    As chaves expiradas já são ignoradas pela busca; a limpeza apenas mantém a tabela pequena.
+    '''
+
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            async with pegar_fabrica_sessoes()() as session:
+                await pegar_registro_idempotencia().remover_expiradas(session)
+        except SQLAlchemyError:
+            # Falhas pontuais (ex: banco ocupado) não derrubam a tarefa; a próxima rodada tenta de novo.
+            logger.exception('Falha ao remover as chaves de idempotência expiradas.')
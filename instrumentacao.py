@@ -0,0 +1,224 @@
+# Importa o ContextVar, que guarda as métricas da requisição em andamento
+# (cada requisição atendida pelo event loop enxerga apenas as suas).
+from contextvars import ContextVar
+
+# Importa o relógio de alta resolução usado nas medições.
+from time import perf_counter
+
+# Importa o 'bisect', usado para localizar o bucket do histograma de cada medição.
+from bisect import bisect_left
+
+# Importa o módulo de eventos do SQLAlchemy, usado para medir cada consulta ao banco.
+from sqlalchemy import event
+
+# Importa o APIRouter e a resposta em texto puro, usados no endpoint /metrics.
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+
+# Limites (em segundos) dos buckets do histograma de latência.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricasRequisicao:
+    '''
+    Contadores da requisição em andamento: quantidade de consultas e tempo gasto no banco.
+    '''
+
+    __slots__ = ('consultas', 'tempo_db')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_db = 0.0
+
+
+# Métricas da requisição atual (None fora de uma requisição, ex: scripts e migrações).
+metricas_requisicao: ContextVar = ContextVar('metricas_requisicao', default=None)
+
+
+# ===========================
+# 📊 Registro das métricas
+# ===========================
+class Histograma:
+    '''
+    Histograma cumulativo no formato do Prometheus (buckets, soma e contagem).
+    '''
+
+    __slots__ = ('buckets', 'soma', 'contagem')
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.soma = 0.0
+        self.contagem = 0
+
+    def observar(self, valor):
+        posicao = bisect_left(BUCKETS, valor)
+        if posicao < len(BUCKETS):
+            self.buckets[posicao] += 1
+        self.soma += valor
+        self.contagem += 1
+
+
+class RegistroMetricas:
+    '''
+    Agrega as métricas de todas as requisições atendidas por este processo.
+
+    - Latência por rota (histograma), com o caminho da rota como rótulo
+      (ex: "/orders/pedido/{id_pedido}"), e não a URL real, para não criar
+      uma série nova para cada ID.
+    - Total de requisições por rota e status HTTP.
+    - Consultas ao banco e tempo gasto no banco por rota.
+    '''
+
+    def __init__(self):
+        self.latencia = {}
+        self.requisicoes = {}
+        self.consultas = {}
+        self.tempo_db = {}
+
+    def registrar(self, metodo, rota, status, duracao, metricas: MetricasRequisicao):
+        chave = (metodo, rota)
+
+        histograma = self.latencia.get(chave)
+        if histograma is None:
+            histograma = self.latencia[chave] = Histograma()
+        histograma.observar(duracao)
+
+        chave_status = (metodo, rota, status)
+        self.requisicoes[chave_status] = self.requisicoes.get(chave_status, 0) + 1
+        self.consultas[chave] = self.consultas.get(chave, 0) + metricas.consultas
+        self.tempo_db[chave] = self.tempo_db.get(chave, 0.0) + metricas.tempo_db
+
+    def exportar(self):
+        '''
+        Gera o texto no formato de exposição do Prometheus.
+        '''
+
+        linhas = [
+            '# HELP http_request_duration_seconds Latência das requisições HTTP por rota.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (metodo, rota), histograma in sorted(self.latencia.items()):
+            rotulos = f'method="{_escapar(metodo)}",route="{_escapar(rota)}"'
+            acumulado = 0
+            for limite, quantidade in zip(BUCKETS, histograma.buckets):
+                acumulado += quantidade
+                linhas.append(f'http_request_duration_seconds_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+            linhas.append(f'http_request_duration_seconds_bucket{{{rotulos},le="+Inf"}} {histograma.contagem}')
+            linhas.append(f'http_request_duration_seconds_sum{{{rotulos}}} {histograma.soma}')
+            linhas.append(f'http_request_duration_seconds_count{{{rotulos}}} {histograma.contagem}')
+
+        linhas += [
+            '# HELP http_requests_total Requisições HTTP por rota e status.',
+            '# TYPE http_requests_total counter',
+        ]
+        for (metodo, rota, status), total in sorted(self.requisicoes.items()):
+            linhas.append(
+                f'http_requests_total{{method="{_escapar(metodo)}",route="{_escapar(rota)}",status="{status}"}} {total}'
+            )
+
+        linhas += [
+            '# HELP db_queries_total Consultas executadas no banco por rota.',
+            '# TYPE db_queries_total counter',
+        ]
+        for (metodo, rota), total in sorted(self.consultas.items()):
+            linhas.append(f'db_queries_total{{method="{_escapar(metodo)}",route="{_escapar(rota)}"}} {total}')
+
+        linhas += [
+            '# HELP db_query_duration_seconds_total Tempo gasto em consultas ao banco por rota.',
+            '# TYPE db_query_duration_seconds_total counter',
+        ]
+        for (metodo, rota), total in sorted(self.tempo_db.items()):
+            linhas.append(f'db_query_duration_seconds_total{{method="{_escapar(metodo)}",route="{_escapar(rota)}"}} {total}')
+
+        return '\n'.join(linhas) + '\n'
+
+
+def _escapar(valor):
+    # Escapa os caracteres especiais dos rótulos do Prometheus.
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Registro único do processo (com vários workers, cada processo expõe as próprias métricas).
+registro = RegistroMetricas()
+
+
+# ===========================
+# 🛢️ Medição das consultas ao banco
+# ===========================
+def instrumentar_engine(engine):
+    '''
+    Registra eventos no engine (síncrono) que contam as consultas e medem o tempo
+    gasto no banco, acumulando os valores nas métricas da requisição atual.
+    '''
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+        context._inicio_consulta = perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+        metricas = metricas_requisicao.get()
+        if metricas is not None:
+            metricas.consultas += 1
+            metricas.tempo_db += perf_counter() - context._inicio_consulta
+
+
+# ===========================
+# ⏱️ Middleware de instrumentação
+# ===========================
+class MiddlewareInstrumentacao:
+    '''
+    Middleware ASGI que mede cada requisição HTTP.
+
+    - Registra a latência, o status e as consultas ao banco da rota no registro de métricas.
+    - Adiciona o cabeçalho 'Server-Timing' à resposta, com o tempo total da aplicação
+      e o tempo/quantidade de consultas ao banco (visível nas ferramentas do navegador).
+    '''
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        metricas = MetricasRequisicao()
+        token = metricas_requisicao.set(metricas)
+        inicio = perf_counter()
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem['type'] == 'http.response.start':
+                status = mensagem['status']
+                duracao_ms = (perf_counter() - inicio) * 1000
+                valor = (f'app;dur={duracao_ms:.2f}, '
+                         f'db;dur={metricas.tempo_db * 1000:.2f};desc="{metricas.consultas} consultas"')
+                mensagem['headers'] = list(mensagem.get('headers', [])) + [(b'server-timing', valor.encode('latin-1'))]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            metricas_requisicao.reset(token)
+            # A rota correspondente é registrada no escopo pelo roteador do FastAPI.
+            rota = scope.get('route')
+            caminho = getattr(rota, 'path', None) or 'sem_rota'
+            registro.registrar(scope['method'], caminho, status, perf_counter() - inicio, metricas)
+
+
+# ===========================
+# 📈 Endpoint /metrics
+# ===========================
+metrics_router = APIRouter(tags=['metrics'])
+
+
+@metrics_router.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    '''
+    Exposição das métricas do processo no formato texto do Prometheus.
+    '''
+
+    return PlainTextResponse(registro.exportar(), media_type='text/plain; version=0.0.4')
@@ -0,0 +1,176 @@
+# Importa o 'asyncio', usado para consultar o backend em arquivo fora do event loop.
+import asyncio
+
+# Importa o 'logging', usado para registrar as falhas do backend (o login segue sem o limite).
+import logging
+
+# Importa o 'math', usado para arredondar o tempo de espera informado no cabeçalho Retry-After.
+import math
+
+# Importa o 'sqlite3', cujos erros (ex: "database is locked") podem vir do backend em arquivo.
+import sqlite3
+
+# Importa o relógio de parede: os instantes gravados no backend precisam fazer sentido
+# para todos os processos que o compartilham (o relógio monotônico é local a cada processo).
+from time import time
+
+# Importa o HTTPException, usado para recusar as tentativas acima do limite (HTTP 429).
+from fastapi import HTTPException
+
+# Importa as configurações da aplicação (limites de tentativas e bloqueio de login).
+from config import pegar_settings
+
+# Importa o cache em memória (backend padrão) e o cache em arquivo, compartilhado pelos workers.
+from cache import CacheTTL, CacheSQLite
+
+
+# Tempo de vida padrão das entradas no backend em memória; cada entrada é gravada
+# com a validade própria (tempo até o balde encher de novo ou fim da janela de falhas).
+TTL_MAXIMO = 86400
+
+
+logger = logging.getLogger(__name__)
+
+
+# ===========================
+# 🚦 Limitador de tentativas de login
+# ===========================
+class LimitadorLogin:
+    '''
+    Protege o login contra força bruta e credential stuffing, recusando as tentativas
+    acima do limite ANTES da consulta ao banco e da verificação da senha (bcrypt).
+
+    - Balde de tokens por IP e por e-mail: cada tentativa consome um token; os tokens
+      são repostos continuamente (N por minuto) até a capacidade do balde. Rajadas curtas
+      são aceitas, mas o ritmo sustentado fica limitado.
+    - Bloqueio com backoff exponencial: após LOGIN_BLOQUEIO_FALHAS falhas seguidas de um
+      mesmo e-mail, ele fica bloqueado por LOGIN_BLOQUEIO_SEGUNDOS; cada novo bloqueio
+      dentro da janela dobra o tempo (até LOGIN_BLOQUEIO_MAXIMO). Um login bem-sucedido
+      zera o histórico.
+
+    O estado fica no 'backend' (interface BackendCache) como tuplas pequenas, com validade
+    própria. O backend padrão fica na memória do worker e descarta as entradas menos usadas
+    ao atingir o tamanho máximo; com N workers, cada um aplica os limites separadamente
+    (até N vezes o limite no total). Com LOGIN_LIMITADOR_ARQUIVO, o estado fica em um
+    arquivo SQLite compartilhado pelos workers da máquina (CacheSQLite), e todos aplicam os
+    mesmos limites (a leitura e a gravação de cada balde não são atômicas entre processos,
+    então o limite é aproximado sob concorrência).
+
+    Com um backend bloqueante (atributo 'bloqueante', como o CacheSQLite), cada operação
+    roda em uma thread (asyncio.to_thread), sem travar o event loop enquanto o arquivo
+    estiver ocupado por outro worker. Se o backend falhar (sqlite3.Error), o limitador
+    falha aberto: a falha é registrada no log e o login segue sem o limite, protegido
+    ainda pelo limite de concorrência do serviço de hash (429 quando saturado).
+    '''
+
+    def __init__(self, backend, settings):
+        self._backend = backend
+        self._settings = settings
+
+    def _recusar(self, espera, detalhe):
+        raise HTTPException(status_code=429, detail=detalhe, headers={'Retry-After': str(max(1, math.ceil(espera)))})
+
+    def _saldo(self, chave, capacidade, por_minuto, agora):
+        # Tokens disponíveis no balde (com a reposição desde a última tentativa) e a taxa por segundo.
+        taxa = por_minuto / 60
+        tokens, instante = self._backend.get(chave) or (capacidade, agora)
+        return min(capacidade, tokens + (agora - instante) * taxa), taxa
+
+    async def _executar(self, funcao, *args):
+        try:
+            if getattr(self._backend, 'bloqueante', False):
+                return await asyncio.to_thread(funcao, *args)
+            return funcao(*args)
+        except sqlite3.Error:
+            logger.exception('Falha no backend do limitador de login; a tentativa segue sem o limite.')
+
+    async def verificar(self, ip, email):
+        '''
+        Verifica (e consome) o limite de tentativas do IP e do e-mail.
+        Lança HTTPException 429, com Retry-After, se a tentativa deve ser recusada.
+
+        Os dois baldes são verificados antes de qualquer consumo: uma tentativa recusada
+        (pelo IP, pelo e-mail ou pelo bloqueio) não gasta tokens, então um e-mail no limite
+        não esgota o balde de um IP compartilhado (ex: vários usuários atrás do mesmo NAT).
+        '''
+
+        await self._executar(self._verificar, ip, email)
+
+    async def registrar_falha(self, email):
+        '''
+        Conta uma tentativa inválida do e-mail e o bloqueia ao atingir o limite de falhas.
+        '''
+
+        await self._executar(self._registrar_falha, email)
+
+    async def registrar_sucesso(self, email):
+        '''
+        Zera as falhas e o histórico de bloqueios do e-mail após um login válido.
+        '''
+
+        await self._executar(self._backend.delete, f'falhas:{email}')
+
+    def _verificar(self, ip, email):
+        settings = self._settings
+        agora = time()
+
+        # E-mail bloqueado: recusa sem consumir tokens.
+        estado = self._backend.get(f'falhas:{email}')
+        if estado is not None and estado[2] > agora:
+            self._recusar(estado[2] - agora, 'Login bloqueado temporariamente após várias tentativas inválidas.')
+
+        baldes = []
+        for chave, capacidade, por_minuto in (
+            (f'ip:{ip}', settings.login_ip_capacidade, settings.login_ip_por_minuto),
+            (f'email:{email}', settings.login_email_capacidade, settings.login_email_por_minuto),
+        ):
+            tokens, taxa = self._saldo(chave, capacidade, por_minuto, agora)
+            if tokens < 1:
+                self._recusar((1 - tokens) / taxa, 'Muitas tentativas de login. Tente novamente em instantes.')
+            baldes.append((chave, capacidade, tokens, taxa))
+
+        # A entrada de cada balde só precisa existir até ele encher de novo.
+        for chave, capacidade, tokens, taxa in baldes:
+            self._backend.set(chave, (tokens - 1, agora), ttl=capacidade / taxa)
+
+    def _registrar_falha(self, email):
+        settings = self._settings
+        agora = time()
+
+        # Estado por e-mail: (falhas seguidas, bloqueios na janela, bloqueado até).
+        falhas, bloqueios, bloqueado_ate = self._backend.get(f'falhas:{email}') or (0, 0, 0.0)
+        falhas += 1
+
+        if falhas >= settings.login_bloqueio_falhas:
+            duracao = min(settings.login_bloqueio_segundos * 2 ** bloqueios, settings.login_bloqueio_maximo)
+            bloqueado_ate = agora + duracao
+            bloqueios += 1
+            falhas = 0
+
+        ttl = max(settings.login_bloqueio_janela, bloqueado_ate - agora)
+        self._backend.set(f'falhas:{email}', (falhas, bloqueios, bloqueado_ate), ttl=ttl)
+
+
+# Limitador do processo (criado no primeiro uso).
+_limitador_login = None
+
+
+def pegar_limitador_login():
+    global _limitador_login
+    if _limitador_login is None:
+        settings = pegar_settings()
+        if settings.login_limitador_arquivo:
+            backend = CacheSQLite(settings.login_limitador_arquivo, ttl=TTL_MAXIMO)
+        else:
+            backend = CacheTTL(tamanho_maximo=settings.login_limitador_tamanho, ttl=TTL_MAXIMO)
+        _limitador_login = LimitadorLogin(backend, settings)
+    return _limitador_login
+
+
+def definir_limitador_login(limitador):
+    '''
+    Substitui o limitador do processo (ex: por um LimitadorLogin com backend compartilhado).
+    '''
+
+    global _limitador_login
+    _limitador_login = limitador
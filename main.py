@@ -2,58 +2,152 @@
 # Ela é responsável por criar a aplicação web e gerenciar todo o ciclo de vida das requisições HTTP.
 from fastapi import FastAPI
 
-# Importa o contexto de criptografia do Passlib.
-# O 'CryptContext' é utilizado para gerenciar algoritmos de hash de senhas (como bcrypt),
-# facilitando a verificação e atualização de senhas com segurança.
-from passlib.context import CryptContext
-
-# Importa a função 'load_dotenv', que carrega variáveis de ambiente
-# definidas em um arquivo .env para o ambiente de execução.
-# Isso é útil para armazenar credenciais e chaves secretas fora do código-fonte.
-from dotenv import load_dotenv
-
-# Importa o módulo 'os' para acessar variáveis de ambiente do sistema.
-import os
-
-
-# Carrega todas as variáveis do arquivo .env.
-# Esse passo deve ser feito o mais cedo possível no ciclo de inicialização da aplicação.
-load_dotenv()
-
-# Lê a variável de ambiente 'SECRET_KEY' definida no arquivo .env.
-# Essa chave é frequentemente usada para assinar tokens JWT ou criptografar dados sensíveis.
-SECRET_KEY = os.getenv('SECRET_KEY')
-
-
-# Instancia a aplicação FastAPI.
-# Essa variável 'app' é o ponto central do projeto — todas as rotas, middlewares e eventos são registrados nela.
-app = FastAPI(
-    title="API de Pedidos e Autenticação",  # (opcional) Define um nome exibido na documentação interativa (Swagger/Redoc)
-    version="1.0.0",                        # (opcional) Define a versão da API
-    description="Uma API exemplo com rotas de autenticação e gerenciamento de pedidos."  # (opcional)
-)
-
-
-# Cria um contexto de criptografia utilizando o algoritmo bcrypt.
-# O parâmetro 'deprecated="auto"' indica que, se um algoritmo for considerado obsoleto,
-# o Passlib avisará automaticamente, permitindo atualizações seguras.
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
-
-
-# Importa os módulos que contêm os "routers" da aplicação.
-# Cada módulo define um conjunto de rotas agrupadas por área de responsabilidade:
-# - auth_routes: rotas relacionadas à autenticação (login, registro, etc.)
-# - order_routes: rotas relacionadas ao gerenciamento de pedidos
-from auth_routes import auth_router
-from order_routes import order_router
-
-
-# Registra os routers importados na aplicação principal.
-# Isso permite dividir as rotas em módulos separados, tornando o projeto mais organizado e escalável.
-# O FastAPI combina automaticamente os prefixos definidos em cada router (ex: "/auth", "/order")
-# com o caminho base da aplicação.
-app.include_router(auth_router)   # Inclui as rotas de autenticação
-app.include_router(order_router)  # Inclui as rotas de pedidos
+# Importa o 'asynccontextmanager', usado para declarar o ciclo de vida (lifespan) da aplicação,
+# e o 'asyncio', usado para executar tarefas periódicas em segundo plano durante esse ciclo.
+from contextlib import asynccontextmanager
+import asyncio
+
+# Importa o 'logging', usado para registrar falhas da inicialização que não impedem a aplicação de subir.
+import logging
+
+# Importa as configurações da aplicação.
+# O módulo 'config' lê as variáveis de ambiente (e o arquivo .env) apenas quando as configurações são usadas.
+from config import pegar_settings, definir_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    '''
+    Ciclo de vida da aplicação.
+
+    Tudo antes do 'yield' roda na inicialização; tudo depois, no desligamento.
+    '''
+
+    # Importa o engine, o serviço de hash e a limpeza das chaves de idempotência
+    # apenas quando a aplicação é iniciada.
+    from database import iniciar_banco, encerrar_banco
+    from security import servico_hash
+    from idempotencia import limpar_chaves_periodicamente
+    from catalogo import carregar_catalogo, recarregar_catalogo_periodicamente
+    from sqlalchemy.exc import SQLAlchemyError
+
+    settings = app.state.settings
+
+    # Tarefas periódicas, criadas durante a inicialização.
+    tarefas = []
+
+    # O desligamento fica no 'finally': se a inicialização ou o servidor falharem, as tarefas,
+    # o pool de threads do hash, o gravador e os engines (e as threads do aiosqlite) são
+    # encerrados mesmo assim, e o processo não fica preso na saída.
+    try:
+        # Cria o engine assíncrono (pool de conexões) e o contexto de criptografia + pool
+        # de threads do hash de senhas, antes da primeira requisição.
+        iniciar_banco(settings)
+        servico_hash.iniciar(settings)
+
+        # Carrega o índice de preços do catálogo em memória. Se o banco estiver indisponível,
+        # a aplicação sobe assim mesmo: o catálogo é carregado no primeiro uso ou na próxima recarga.
+        try:
+            await carregar_catalogo()
+        except SQLAlchemyError:
+            logger.exception('Falha ao carregar o catálogo de preços na inicialização.')
+        tarefas.append(asyncio.create_task(recarregar_catalogo_periodicamente(settings.catalogo_recarga_segundos)))
+
+        # Remove periodicamente as chaves de idempotência expiradas (Idempotency-Key).
+        tarefas.append(asyncio.create_task(limpar_chaves_periodicamente(settings.idempotencia_limpeza_intervalo)))
+
+        # Gravação dos novos pedidos em grupo (um commit por grupo), se ativada.
+        if settings.pedidos_gravacao_em_grupo:
+            from gravador_pedidos import pegar_gravador_pedidos
+            pegar_gravador_pedidos().iniciar()
+
+        yield
+
+    finally:
+        # Interrompe a limpeza e a recarga periódicas.
+        for tarefa in tarefas:
+            tarefa.cancel()
+        # Aguarda o cancelamento antes de fechar o banco: uma limpeza ou recarga interrompida
+        # no meio de uma consulta termina antes de os engines serem descartados.
+        await asyncio.gather(*tarefas, return_exceptions=True)
+
+        # Grava os pedidos que ainda aguardam na fila do gravador antes de fechar o banco.
+        if settings.pedidos_gravacao_em_grupo:
+            from gravador_pedidos import pegar_gravador_pedidos
+            await pegar_gravador_pedidos().encerrar()
+
+        # Encerra o pool de threads usado no hash de senhas.
+        servico_hash.encerrar()
+
+        # Fecha as conexões abertas pelo engine assíncrono.
+        await encerrar_banco()
+
+
+def create_app(settings=None):
+    '''
+    Fábrica da aplicação: monta a instância do FastAPI com as rotas e middlewares.
+
+    - settings: configurações a usar (padrão: as lidas do ambiente e do arquivo .env).
+
+    Importar este módulo não abre o banco nem carrega as rotas: tudo é montado aqui,
+    e o engine e a criptografia são criados no lifespan. Ex:
+        uvicorn main:create_app --factory
+    '''
+
+    if settings is not None:
+        definir_settings(settings)
+
+    # Instancia a aplicação FastAPI.
+    # Essa variável 'app' é o ponto central do projeto — todas as rotas, middlewares e eventos são registrados nela.
+    app = FastAPI(
+        title="API de Pedidos e Autenticação",  # (opcional) Define um nome exibido na documentação interativa (Swagger/Redoc)
+        version="1.0.0",                        # (opcional) Define a versão da API
+        description="Uma API exemplo com rotas de autenticação e gerenciamento de pedidos.",  # (opcional)
+        lifespan=lifespan                       # Inicialização e desligamento dos recursos compartilhados
+    )
+    app.state.settings = pegar_settings()
+
+    # Importa os módulos que contêm os "routers" da aplicação.
+    # Cada módulo define um conjunto de rotas agrupadas por área de responsabilidade:
+    # - auth_routes: rotas relacionadas à autenticação (login, registro, etc.)
+    # - order_routes: rotas relacionadas ao gerenciamento de pedidos
+    # - report_routes: relatórios (lidos dos resumos de vendas pré-calculados)
+    # - catalog_routes: catálogo de produtos (sabores, tamanhos e preços)
+    from auth_routes import auth_router
+    from order_routes import order_router
+    from report_routes import report_router
+    from catalog_routes import catalog_router
+
+    # Importa o middleware que mede cada requisição e o router do endpoint /metrics.
+    from instrumentacao import MiddlewareInstrumentacao, metrics_router
+
+    # Registra o middleware de instrumentação: latência por rota, consultas ao banco
+    # e cabeçalho 'Server-Timing' em todas as respostas.
+    app.add_middleware(MiddlewareInstrumentacao)
+
+    # Registra os routers importados na aplicação principal.
+    # Isso permite dividir as rotas em módulos separados, tornando o projeto mais organizado e escalável.
+    # O FastAPI combina automaticamente os prefixos definidos em cada router (ex: "/auth", "/order")
+    # com o caminho base da aplicação.
+    app.include_router(auth_router)   # Inclui as rotas de autenticação
+    app.include_router(order_router)  # Inclui as rotas de pedidos
+    app.include_router(report_router)  # Inclui as rotas de relatórios
+    app.include_router(catalog_router)  # Inclui as rotas do catálogo
+    app.include_router(metrics_router)  # Inclui o endpoint /metrics (formato Prometheus)
+
+    return app
+
+
+def __getattr__(nome):
+    # Compatibilidade com 'uvicorn main:app' e 'from main import app':
+    # a aplicação é montada no primeiro acesso a 'main.app', e não na importação do módulo.
+    if nome == 'app':
+        app = globals()['app'] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
 
 
 # ➕ Dica profissional:
@@ -1,24 +1,34 @@
-# Importa os principais componentes do SQLAlchemy.
-# - create_engine: cria a conexão com o banco de dados.
-# - Column, String, Integer, Boolean, Float, ForeignKey: usados para definir colunas nas tabelas.
-from sqlalchemy import create_engine, Column, String, Integer, Boolean, Float, ForeignKey
-
-# Importa o 'declarative_base', usado para criar classes mapeadas como tabelas do banco.
-from sqlalchemy.orm import declarative_base
+# Importa as classes de data/hora usadas em agora_utc.
+from datetime import datetime, timezone
 
-# Importa o tipo ChoiceType (opcional), útil para criar colunas com valores limitados (como enums).
-from sqlalchemy_utils.types import ChoiceType
+# Importa os principais componentes do SQLAlchemy.
+# - Column, String, Integer, Boolean, Float, Date, DateTime, ForeignKey: usados para definir colunas nas tabelas.
+# A conexão com o banco (engines e sessões) fica no módulo 'database'.
+# - Index: usado para declarar índices compostos (também criados pelas migrações do alembic).
+# - func: usado em índices sobre expressões (ex: lower(email)).
+# - text: usado na condição de índices parciais (ex: apenas pedidos PENDENTES).
+# - true: valor padrão booleano no banco, escrito de acordo com cada banco (1 no SQLite, true no PostgreSQL).
+from sqlalchemy import Column, String, Integer, Boolean, Float, Date, DateTime, ForeignKey, Index, func, text, true
 
+# Importa o 'declarative_base', usado para criar classes mapeadas como tabelas do banco,
+# e o 'relationship', usado para navegar entre tabelas ligadas por chave estrangeira.
+from sqlalchemy.orm import declarative_base, relationship
 
-# Cria a conexão com o banco de dados SQLite chamado 'banco.db'.
-# O formato 'sqlite:///banco.db' indica que o banco será criado/localizado no mesmo diretório do projeto.
-db = create_engine('sqlite:///banco.db')
 
 # Cria a classe base para todas as tabelas do banco.
 # Todas as classes que herdarem de 'Base' serão mapeadas como tabelas.
 Base = declarative_base()
 
 
+def agora_utc():
+    '''
+    Data/hora atual em UTC, sem fuso: o formato das colunas de data/hora das tabelas
+    (o mesmo de CURRENT_TIMESTAMP, usado no 'criado_em' dos pedidos).
+    '''
+
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 # ===========================
 # 🧑‍💻 Tabela: USUARIOS
 # ===========================
@@ -34,6 +44,13 @@ class Usuario(Base):
     ativo = Column('ativo', Boolean)                                  # Indica se o usuário está ativo
     admin = Column('admin', Boolean, default=False)                   # Indica se é administrador
 
+    # Índice único sobre o e-mail normalizado (minúsculas).
+    # Garante que não existam dois usuários com o mesmo e-mail (mesmo com cadastros simultâneos)
+    # e permite que o login encontre o usuário sem percorrer a tabela inteira.
+    __table_args__ = (
+        Index('ix_usuarios_email_lower', func.lower(email), unique=True),
+    )
+
     # Construtor da classe: define os atributos ao criar um novo objeto.
     def __init__(self, nome, email, senha, ativo, admin):
         self.nome = nome
@@ -46,22 +63,57 @@ class Usuario(Base):
 # ===========================
 # 📦 Tabela: PEDIDOS
 # ===========================
+# Valores possíveis para o status de um pedido.
+# Todo pedido nasce PENDENTE; FINALIZADO e CANCELADO são status finais.
+STATUS_PENDENTE = 'PENDENTE'
+STATUS_FINALIZADO = 'FINALIZADO'
+STATUS_CANCELADO = 'CANCELADO'
+STATUS_PEDIDOS = (STATUS_PENDENTE, STATUS_FINALIZADO, STATUS_CANCELADO)
+
+# Transições permitidas: status de destino -> status de origem aceitos.
+# As rotas só alteram o status com um UPDATE condicional (WHERE status IN origens).
+TRANSICOES_STATUS = {
+    STATUS_FINALIZADO: (STATUS_PENDENTE,),
+    STATUS_CANCELADO: (STATUS_PENDENTE,),
+}
+
+
 class Pedido(Base):
     __tablename__ = 'pedidos'
 
-    # Exemplo de valores possíveis para status (comentado por enquanto).
-    # Útil quando se quer restringir os valores possíveis da coluna.
-    # STATUS_PEDIDOS = (
-    #     ('PENDENTE', 'PENDENTE'),
-    #     ('CANCELADO', 'CANCELADO'),
-    #     ('FINALIZADO', 'FINALIZADO')
-    # )
-
     id = Column('id', Integer, primary_key=True, autoincrement=True)
-    # status = Column('status', ChoiceType(choices=STATUS_PEDIDOS))  # Exemplo usando ChoiceType
-    status = Column('status', String)                                 # Status do pedido (texto simples)
+    status = Column('status', String)                                 # Status do pedido (um de STATUS_PEDIDOS)
     usuario = Column('usuario', ForeignKey('usuarios.id'))            # FK: referência ao usuário que fez o pedido
     preco = Column('preco', Float)                                    # Valor total do pedido
+    versao = Column('versao', Integer, nullable=False, default=0, server_default='0')  # Incrementada a cada alteração (concorrência otimista)
+    criado_em = Column('criado_em', DateTime, default=func.current_timestamp())       # Data/hora de criação (UTC), preenchida no INSERT
+    reservado_por = Column('reservado_por', ForeignKey('usuarios.id', name='fk_pedidos_reservado_por_usuarios'))  # Quem reservou o pedido na fila de preparo
+    reservado_ate = Column('reservado_ate', DateTime)                                  # Fim da reserva (UTC); depois disso, o pedido volta à fila
+
+    # Itens do pedido (tabela itens_pedido).
+    # 'lazy="raise"' impede o carregamento implícito, item a item (o problema N+1):
+    # as consultas que precisam dos itens devem carregá-los explicitamente com 'selectinload',
+    # que busca os itens de todos os pedidos da página em uma única consulta.
+    itens = relationship('ItensPedido', lazy='raise', order_by='ItensPedido.id')
+
+    # Índice composto usado na listagem de pedidos: filtra por usuário e status e
+    # pagina pelo id (keyset), lendo apenas as entradas da página pedida.
+    __table_args__ = (
+        Index('ix_pedidos_usuario_status_id', 'usuario', 'status', 'id'),
+        # Filtro por período da exportação de pedidos.
+        Index('ix_pedidos_criado_em', 'criado_em'),
+        # Fila de preparo: índice parcial apenas com os pedidos PENDENTES, em ordem de id.
+        # Fica pequeno (os pedidos finalizados/cancelados não entram) e já traz o fim da
+        # reserva, então a busca dos próximos pedidos livres não precisa ler a tabela.
+        Index(
+            'ix_pedidos_fila', 'id', 'reservado_ate',
+            sqlite_where=text("status = 'PENDENTE'"),
+            postgresql_where=text("status = 'PENDENTE'")
+        ),
+        # No SQLite, AUTOINCREMENT impede que o ID de um pedido removido ou arquivado seja
+        # reutilizado (sem ele, o próximo ID é o maior ID existente + 1).
+        {'sqlite_autoincrement': True},
+    )
 
     # Construtor da classe Pedido.
     # Define o usuário que fez o pedido, o status e o preço (por padrão, "PENDENTE" e 0).
@@ -83,6 +135,13 @@ class ItensPedido(Base):
     tamanho = Column('tamanho', String)                               # Tamanho do item (ex: grande, média)
     preco_unitario = Column('preco_unitario', Float)                  # Preço de uma unidade
     pedido = Column('pedido', ForeignKey('pedidos.id'))               # FK: identifica a qual pedido pertence
+
+    # Índice na FK, para buscar os itens de um pedido sem percorrer a tabela inteira.
+    __table_args__ = (
+        Index('ix_itens_pedido_pedido', 'pedido'),
+        # IDs nunca reutilizados no SQLite (ver Pedido).
+        {'sqlite_autoincrement': True},
+    )
     
     # Construtor que define os dados de um item do pedido.
     def __init__(self, quantidade, sabor, tamanho, preco_unitario, pedido):
@@ -91,3 +150,110 @@ class ItensPedido(Base):
         self.tamanho = tamanho
         self.preco_unitario = preco_unitario
         self.pedido = pedido
+
+
+# ===========================
+# 🔁 Tabela: CHAVES DE IDEMPOTÊNCIA
+# ===========================
+class ChaveIdempotencia(Base):
+    '''
+    Resposta gravada para cada cabeçalho Idempotency-Key recebido na criação de pedidos.
+    Uma requisição repetida com a mesma chave (ex: o cliente reenviou após um timeout)
+    recebe a resposta gravada, sem criar outro pedido.
+    '''
+
+    __tablename__ = 'chaves_idempotencia'
+
+    usuario = Column('usuario', ForeignKey('usuarios.id'), primary_key=True)  # Dono da chave (as chaves são por usuário)
+    chave = Column('chave', String(255), primary_key=True)                    # Valor do cabeçalho Idempotency-Key
+    hash_requisicao = Column('hash_requisicao', String(32), nullable=False)   # Hash do corpo da requisição original
+    status_code = Column('status_code', Integer, nullable=False)              # Status HTTP da resposta gravada
+    corpo = Column('corpo', String, nullable=False)                           # Corpo JSON da resposta gravada
+    expira_em = Column('expira_em', DateTime, nullable=False)                 # Fim da validade (UTC); depois disso, a linha é removida
+
+    # Limpeza das chaves expiradas sem percorrer a tabela inteira.
+    __table_args__ = (
+        Index('ix_chaves_idempotencia_expira_em', 'expira_em'),
+    )
+
+
+# ===========================
+# 📊 Tabela: RESUMO DE VENDAS DIÁRIAS
+# ===========================
+class VendasDiarias(Base):
+    '''
+    Totais de vendas pré-calculados por dia × sabor × tamanho, lidos pelos relatórios
+    (GET /reports/vendas) sem percorrer os pedidos e itens.
+
+    Atualizada incrementalmente quando um pedido é finalizado (resumos_vendas.acumular_vendas_pedido)
+    e reconstruída por período com 'python -m resumos_vendas' (ex: após uma importação de histórico).
+    '''
+
+    __tablename__ = 'vendas_diarias'
+
+    dia = Column('dia', Date, primary_key=True)                       # Dia do pedido (data de criação, UTC)
+    sabor = Column('sabor', String, primary_key=True)                 # Sabor do item
+    tamanho = Column('tamanho', String, primary_key=True)             # Tamanho do item
+    unidades = Column('unidades', Integer, nullable=False)            # Soma das quantidades vendidas
+    receita = Column('receita', Float, nullable=False)                # Soma de quantidade × preço unitário
+    pedidos = Column('pedidos', Integer, nullable=False)              # Pedidos finalizados com esse sabor/tamanho
+
+
+# ===========================
+# 📋 Tabela: CATÁLOGO DE PRODUTOS
+# ===========================
+class ItemCatalogo(Base):
+    '''
+    Combinações de sabor × tamanho vendidas e o preço de cada uma.
+
+    Os itens dos pedidos são validados e precificados por um índice em memória montado
+    a partir desta tabela (catalogo.IndicePrecos), e não pelo preço enviado pelo cliente.
+    Sabor e tamanho são gravados normalizados (minúsculas, sem espaços nas pontas).
+    '''
+
+    __tablename__ = 'catalogo'
+
+    sabor = Column('sabor', String, primary_key=True)                             # Sabor (ex: "calabresa")
+    tamanho = Column('tamanho', String, primary_key=True)                         # Tamanho (ex: "grande")
+    preco = Column('preco', Float, nullable=False)                                # Preço de uma unidade
+    ativo = Column('ativo', Boolean, nullable=False, default=True, server_default=true())  # Itens inativos não podem ser pedidos
+
+
+# ===========================
+# 🗄️ Tabelas: PEDIDOS E ITENS ARQUIVADOS
+# ===========================
+# Pedidos FINALIZADOS/CANCELADOS antigos são movidos para estas tabelas pelo arquivamento
+# (python -m arquivamento), mantendo as tabelas 'pedidos' e 'itens_pedido' (e seus índices)
+# apenas com os pedidos recentes. Os IDs originais são preservados, e a consulta de um pedido
+# pelo ID busca no arquivo quando ele não está mais na tabela principal.
+class PedidoArquivado(Base):
+    __tablename__ = 'pedidos_arquivados'
+
+    id = Column('id', Integer, primary_key=True, autoincrement=False)  # Mesmo ID da tabela 'pedidos'
+    status = Column('status', String)
+    usuario = Column('usuario', ForeignKey('usuarios.id'))
+    preco = Column('preco', Float)
+    versao = Column('versao', Integer, nullable=False, default=0)
+    criado_em = Column('criado_em', DateTime)
+    arquivado_em = Column('arquivado_em', DateTime, nullable=False)   # Data/hora (UTC) em que o pedido foi arquivado
+
+    itens = relationship('ItemPedidoArquivado', lazy='raise', order_by='ItemPedidoArquivado.id')
+
+    __table_args__ = (
+        Index('ix_pedidos_arquivados_usuario_id', 'usuario', 'id'),
+    )
+
+
+class ItemPedidoArquivado(Base):
+    __tablename__ = 'itens_pedido_arquivados'
+
+    id = Column('id', Integer, primary_key=True, autoincrement=False)  # Mesmo ID da tabela 'itens_pedido'
+    quantidade = Column('quantidade', Integer)
+    sabor = Column('sabor', String)
+    tamanho = Column('tamanho', String)
+    preco_unitario = Column('preco_unitario', Float)
+    pedido = Column('pedido', ForeignKey('pedidos_arquivados.id'))
+
+    __table_args__ = (
+        Index('ix_itens_pedido_arquivados_pedido', 'pedido'),
+    )
@@ -1,16 +1,77 @@
-# Importa o APIRouter (para organizar rotas), Depends (para injeção de dependências)
-# e Session (para gerenciar a conexão com o banco de dados via SQLAlchemy).
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+# Importa o módulo json, usado para ler o corpo das importações em lote
+# e para serializar as listagens guardadas no cache de respostas.
+import json
 
-# Importa a função que cria uma nova sessão de banco a cada requisição.
-from dependencies import pegar_sessao
+# Importa os módulos csv e io, usados para gerar a exportação de pedidos em CSV.
+import csv
+import io
 
-# Importa os esquemas Pydantic usados para validação de entrada.
-from schemas import PedidoSchema, LoginSchema
+# Importa as classes de data/hora usadas nos filtros por período da exportação.
+from datetime import datetime, timedelta, timezone
 
-# Importa o modelo Pedido, que representa a tabela de pedidos no banco de dados.
-from models import Pedido
+# Importa o tipo Optional, usado nos filtros opcionais da listagem.
+from typing import Optional
+
+# Importa o APIRouter (para organizar rotas), Depends (para injeção de dependências),
+# Header (para ler cabeçalhos), HTTPException (para erros HTTP), Query (para validar parâmetros da URL),
+# Request/Response (para ler o corpo bruto da requisição e ajustar cabeçalhos da resposta)
+# e AsyncSession (para gerenciar a conexão assíncrona com o banco de dados via SQLAlchemy).
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Importa a StreamingResponse, usada para enviar a exportação aos poucos, conforme é gerada.
+from fastapi.responses import StreamingResponse
+
+# Importa os construtores de comandos do SQLAlchemy (insert, select, update, delete, func,
+# or_ e literal_column),
+# o SQLAlchemyError, base de todos os erros de banco, e o IntegrityError, lançado quando
+# duas requisições gravam a mesma chave de idempotência.
+from sqlalchemy import insert, select, update, delete, func, or_, literal_column
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+
+# Importa o 'selectinload', que carrega os itens de vários pedidos em uma única consulta extra.
+from sqlalchemy.orm import selectinload
+
+# Importa o ValidationError do Pydantic, lançado quando um pedido do lote é inválido.
+from pydantic import ValidationError
+
+# Importa a função que cria uma nova sessão de banco a cada requisição
+# e a que identifica o usuário autenticado pelo token de acesso.
+from dependencies import pegar_sessao, pegar_usuario_atual
+
+# Importa a fábrica de sessões, usada pela exportação (a sessão precisa durar todo o streaming).
+from database import pegar_fabrica_sessoes
+
+# Importa a representação do usuário autenticado (extraída do token).
+from security import UsuarioAutenticado
+
+# Importa as configurações da aplicação (tamanho do chunk da importação em lote e do lote da exportação).
+from config import pegar_settings
+
+# Importa os esquemas Pydantic usados para validação de entrada
+# e os modelos de resposta (pedido com itens).
+from schemas import PedidoSchema, PedidoLoteSchema, ItemPedidoSchema, PedidoResposta, PaginaPedidosResposta
+
+# Importa os modelos que representam as tabelas de pedidos, itens e usuários no banco de dados.
+from models import Pedido, ItensPedido, Usuario, PedidoArquivado, agora_utc
+
+# Importa os status de pedido e as transições permitidas entre eles.
+from models import STATUS_PENDENTE, STATUS_FINALIZADO, STATUS_CANCELADO, TRANSICOES_STATUS
+
+# Importa o cache das respostas de leitura e a marcação das alterações que o invalidam.
+from cache_respostas import responder_com_cache, marcar_alteracao, escopo_usuario, escopo_pedido, ESCOPO_TODOS
+
+# Importa o registro das chaves de idempotência (cabeçalho Idempotency-Key na criação de pedidos).
+from idempotencia import pegar_registro_idempotencia, hash_requisicao, responder_repeticao
+
+# Importa a atualização dos resumos de vendas, feita quando um pedido é finalizado.
+from resumos_vendas import acumular_vendas_pedido
+
+# Importa o índice de preços do catálogo, usado para validar e precificar os itens.
+from catalogo import pegar_ou_carregar_indice
+
+# Importa o gravador que agrupa os novos pedidos em um único commit (PEDIDOS_GRAVACAO_EM_GRUPO).
+from gravador_pedidos import pegar_gravador_pedidos
 
 
 # Cria um roteador específico para rotas de pedidos.
@@ -19,32 +80,357 @@ from models import Pedido
 order_router = APIRouter(prefix='/orders', tags=['orders'])
 
 
+def _pode_acessar(usuario_atual: UsuarioAutenticado, id_usuario):
+    '''
+    Indica se o usuário autenticado pode ler/criar pedidos do usuário 'id_usuario'.
+    Administradores acessam pedidos de qualquer usuário; os demais, apenas os próprios.
+    '''
+
+    return usuario_atual.admin or usuario_atual.id == id_usuario
+
+
+def _usuario_permitido(usuario_atual: UsuarioAutenticado, usuario):
+    '''
+    Retorna o filtro de usuário efetivo de uma listagem/exportação.
+    Usuários comuns sempre acessam apenas os próprios pedidos (403 se pedirem os de outro).
+    '''
+
+    if not usuario_atual.admin:
+        if usuario is not None and usuario != usuario_atual.id:
+            raise HTTPException(status_code=403, detail='Sem permissão para listar pedidos de outro usuário.')
+        return usuario_atual.id
+    return usuario
+
+
+def _filtrar_pedidos(consulta, usuario_atual: UsuarioAutenticado, usuario, status, cursor, limite):
+    '''
+    Aplica à consulta os filtros da listagem, a permissão do usuário e a paginação por cursor.
+
+    A consulta resultante busca um registro a mais que o limite, apenas para saber
+    se existe uma próxima página.
+    '''
+
+    usuario = _usuario_permitido(usuario_atual, usuario)
+
+    if usuario is not None:
+        consulta = consulta.where(Pedido.usuario == usuario)
+    if status is not None:
+        consulta = consulta.where(Pedido.status == status)
+    if cursor is not None:
+        consulta = consulta.where(Pedido.id < cursor)
+
+    return consulta.order_by(Pedido.id.desc()).limit(limite + 1)
+
+
+def _escopos_listagem(usuario_atual: UsuarioAutenticado, usuario):
+    '''
+    Escopos de cache dos quais uma listagem depende: os pedidos de um usuário
+    ou, para administradores listando sem filtro de usuário, todos os pedidos.
+    '''
+
+    if not usuario_atual.admin:
+        return [escopo_usuario(usuario_atual.id)]
+    if usuario is not None:
+        return [escopo_usuario(usuario)]
+    return [ESCOPO_TODOS]
+
+
 # ==========================================================
-# 📦 ROTA GET — Rota padrão (exemplo) para pedidos
+# 📦 ROTA GET — Listagem paginada de pedidos
 # ==========================================================
 @order_router.get('/')
-async def pedidos():
+async def pedidos(
+    request: Request,
+    usuario: Optional[int] = None,
+    status: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limite: int = Query(default=50, ge=1, le=200),
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
     '''
-    Essa é a rota padrão de pedidos do nosso sistema.
+    Lista os pedidos, do mais recente para o mais antigo.
 
-    Em um cenário real, esta rota poderia:
-      - retornar todos os pedidos de um usuário autenticado;
-      - permitir filtros (por status, data, cliente, etc.);
-      - exigir autenticação (com JWT ou OAuth2).
+    Parâmetros (query string):
+    - usuario (opcional): retorna apenas os pedidos desse usuário.
+    - status (opcional): retorna apenas os pedidos com esse status (ex: "PENDENTE").
+    - cursor (opcional): valor de 'proximo_cursor' devolvido pela página anterior.
+    - limite: quantidade máxima de pedidos por página (1 a 200).
 
-    Aqui, é apenas um ponto de entrada ilustrativo.
+    Usuários comuns só enxergam os próprios pedidos; administradores podem listar todos.
+
+    A paginação é feita por cursor (keyset): em vez de OFFSET, que obriga o banco a
+    percorrer e descartar todas as linhas das páginas anteriores, a consulta filtra
+    por 'id < cursor'. Com o índice (usuario, status, id), cada página custa apenas
+    a leitura das suas próprias linhas, independentemente do tamanho da tabela.
+
+    A resposta fica no cache de respostas (por usuário e parâmetros) até expirar ou até
+    um pedido do usuário ser alterado; leituras repetidas não consultam o banco nem
+    serializam o JSON novamente. O ETag permite ao cliente revalidar com If-None-Match (304).
     '''
 
-    return {
-        'messagem': 'Você acessou a rota de pedidos.'
-    }
+    consulta = _filtrar_pedidos(
+        select(Pedido.id, Pedido.usuario, Pedido.status, Pedido.preco),
+        usuario_atual, usuario, status, cursor, limite
+    )
+
+    async def gerar_corpo():
+        linhas = (await session.execute(consulta)).all()
+
+        pagina = [dict(linha._mapping) for linha in linhas[:limite]]
+        proximo_cursor = pagina[-1]['id'] if len(linhas) > limite else None
+
+        return json.dumps({
+            'pedidos': pagina,
+            'proximo_cursor': proximo_cursor
+        }).encode()
+
+    chave = f'pedidos:{usuario_atual.id}:{usuario}:{status}:{cursor}:{limite}'
+    return await responder_com_cache(request, _escopos_listagem(usuario_atual, usuario), chave, gerar_corpo)
+
+
+# ==========================================================
+# 📋 ROTA GET — Listagem paginada de pedidos com itens
+# ==========================================================
+@order_router.get('/detalhados', response_model=PaginaPedidosResposta)
+async def pedidos_detalhados(
+    request: Request,
+    usuario: Optional[int] = None,
+    status: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limite: int = Query(default=50, ge=1, le=200),
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Lista os pedidos com seus itens, com os mesmos filtros e paginação de GET /orders/.
+
+    Os itens são carregados com 'selectinload': uma consulta busca a página de pedidos
+    e uma segunda busca os itens de todos eles (WHERE pedido IN (...)). São sempre
+    duas consultas, qualquer que seja o tamanho da página, em vez de uma por pedido.
+
+    A resposta usa o mesmo cache de respostas (e ETag) de GET /orders/.
+    '''
+
+    consulta = _filtrar_pedidos(
+        select(Pedido).options(selectinload(Pedido.itens)),
+        usuario_atual, usuario, status, cursor, limite
+    )
+
+    async def gerar_corpo():
+        resultado = (await session.execute(consulta)).scalars().all()
+
+        pagina = resultado[:limite]
+        proximo_cursor = pagina[-1].id if len(resultado) > limite else None
+
+        resposta = PaginaPedidosResposta.model_validate(
+            {'pedidos': pagina, 'proximo_cursor': proximo_cursor}, from_attributes=True
+        )
+        return resposta.model_dump_json().encode()
+
+    chave = f'detalhados:{usuario_atual.id}:{usuario}:{status}:{cursor}:{limite}'
+    return await responder_com_cache(request, _escopos_listagem(usuario_atual, usuario), chave, gerar_corpo)
+
+
+# ==========================================================
+# 🔎 ROTA GET — Pedido com seus itens
+# ==========================================================
+@order_router.get('/pedido/{id_pedido}', response_model=PedidoResposta)
+async def pedido(
+    id_pedido: int,
+    request: Request,
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Retorna um pedido com seus itens.
+
+    O pedido e os itens são carregados em duas consultas (pedido + 'selectinload' dos itens).
+    Pedidos que já foram arquivados (python -m arquivamento) são buscados nas tabelas de arquivo.
+    Usuários comuns só podem consultar os próprios pedidos.
+
+    A resposta fica no cache de respostas até expirar ou até o pedido ser alterado.
+    '''
+
+    async def gerar_corpo():
+        consulta = select(Pedido).where(Pedido.id == id_pedido).options(selectinload(Pedido.itens))
+        pedido = (await session.execute(consulta)).scalars().first()
+
+        if pedido is None:
+            consulta = (
+                select(PedidoArquivado)
+                .where(PedidoArquivado.id == id_pedido)
+                .options(selectinload(PedidoArquivado.itens))
+            )
+            pedido = (await session.execute(consulta)).scalars().first()
+
+        # Pedidos de outros usuários são tratados como inexistentes, para não revelar quais IDs existem.
+        if pedido is None or not _pode_acessar(usuario_atual, pedido.usuario):
+            raise HTTPException(status_code=404, detail='Pedido não encontrado.')
+
+        return PedidoResposta.model_validate(pedido).model_dump_json().encode()
+
+    chave = f'pedido:{usuario_atual.id}:{id_pedido}'
+    return await responder_com_cache(request, [escopo_pedido(id_pedido)], chave, gerar_corpo)
+
+
+# ==========================================================
+# 📤 ROTA GET — Exportação de pedidos (NDJSON/CSV)
+# ==========================================================
+
+# Colunas da exportação em CSV: uma linha por item, repetindo os dados do pedido.
+# Pedidos sem itens aparecem em uma única linha, com as colunas do item vazias.
+COLUNAS_EXPORTACAO = (
+    'id', 'usuario', 'status', 'preco', 'versao', 'criado_em',
+    'item', 'quantidade', 'sabor', 'tamanho', 'preco_unitario',
+)
+
+
+def _utc(valor):
+    # As datas são gravadas em UTC, sem fuso; datas informadas com fuso são convertidas.
+    if valor is not None and valor.tzinfo is not None:
+        valor = valor.astimezone(timezone.utc).replace(tzinfo=None)
+    return valor
+
+
+async def _particoes_exportacao(consulta, tamanho_lote):
+    '''
+    Executa a consulta com um cursor no servidor e gera as linhas em lotes de 'tamanho_lote'.
+
+    A sessão é aberta aqui, e não via Depends, porque precisa continuar aberta enquanto
+    a resposta é enviada; ela é fechada ao fim da exportação (ou se o cliente desconectar).
+    '''
+
+    async with pegar_fabrica_sessoes()() as session:
+        resultado = await session.stream(consulta.execution_options(yield_per=tamanho_lote))
+        async for particao in resultado.partitions():
+            yield particao
+
+
+async def _exportar_ndjson(consulta, tamanho_lote):
+    '''
+    Gera um pedido por linha, com seus itens. As linhas chegam ordenadas por pedido,
+    então apenas o pedido em montagem fica em memória.
+    '''
+
+    atual = None
+    async for particao in _particoes_exportacao(consulta, tamanho_lote):
+        prontos = []
+        for linha in particao:
+            if atual is None or atual['id'] != linha.id:
+                if atual is not None:
+                    prontos.append(json.dumps(atual))
+                atual = {
+                    'id': linha.id,
+                    'usuario': linha.usuario,
+                    'status': linha.status,
+                    'preco': linha.preco,
+                    'versao': linha.versao,
+                    'criado_em': linha.criado_em.isoformat() if linha.criado_em else None,
+                    'itens': [],
+                }
+            if linha.item is not None:
+                atual['itens'].append({
+                    'id': linha.item,
+                    'quantidade': linha.quantidade,
+                    'sabor': linha.sabor,
+                    'tamanho': linha.tamanho,
+                    'preco_unitario': linha.preco_unitario,
+                })
+        if prontos:
+            yield ('\n'.join(prontos) + '\n').encode()
+
+    if atual is not None:
+        yield (json.dumps(atual) + '\n').encode()
+
+
+async def _exportar_csv(consulta, tamanho_lote):
+    '''
+    Gera o CSV com cabeçalho, enviando um bloco de texto a cada lote de linhas.
+    '''
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    escritor.writerow(COLUNAS_EXPORTACAO)
+    async for particao in _particoes_exportacao(consulta, tamanho_lote):
+        escritor.writerows(particao)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+@order_router.get('/exportar')
+async def exportar_pedidos(
+    formato: str = Query(default='ndjson', pattern='^(ndjson|csv)$'),
+    usuario: Optional[int] = None,
+    status: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Exporta os pedidos com seus itens, para conciliação e relatórios.
+
+    Parâmetros (query string):
+    - formato: "ndjson" (um pedido por linha, com a lista de itens) ou "csv" (uma linha por item).
+    - usuario, status (opcionais): mesmos filtros de GET /orders/.
+    - desde, ate (opcionais): período de criação do pedido (ISO 8601; 'ate' não incluso).
+
+    A resposta é enviada em streaming: as linhas são lidas do banco em lotes
+    (EXPORTACAO_TAMANHO_LOTE, com cursor no servidor via 'yield_per') e escritas na
+    resposta conforme chegam. O consumo de memória é constante, qualquer que seja
+    a quantidade de pedidos exportados.
+
+    Usuários comuns exportam apenas os próprios pedidos; administradores, todos.
+    '''
+
+    usuario = _usuario_permitido(usuario_atual, usuario)
+
+    consulta = (
+        select(
+            Pedido.id, Pedido.usuario, Pedido.status, Pedido.preco, Pedido.versao, Pedido.criado_em,
+            ItensPedido.id.label('item'), ItensPedido.quantidade, ItensPedido.sabor,
+            ItensPedido.tamanho, ItensPedido.preco_unitario
+        )
+        .outerjoin(ItensPedido, ItensPedido.pedido == Pedido.id)
+        .order_by(Pedido.id, ItensPedido.id)
+    )
+    if usuario is not None:
+        consulta = consulta.where(Pedido.usuario == usuario)
+    if status is not None:
+        consulta = consulta.where(Pedido.status == status)
+    if desde is not None:
+        consulta = consulta.where(Pedido.criado_em >= _utc(desde))
+    if ate is not None:
+        consulta = consulta.where(Pedido.criado_em < _utc(ate))
+
+    tamanho_lote = pegar_settings().exportacao_tamanho_lote
+    if formato == 'csv':
+        conteudo, tipo = _exportar_csv(consulta, tamanho_lote), 'text/csv; charset=utf-8'
+    else:
+        conteudo, tipo = _exportar_ndjson(consulta, tamanho_lote), 'application/x-ndjson'
+
+    return StreamingResponse(
+        conteudo,
+        media_type=tipo,
+        headers={'Content-Disposition': f'attachment; filename="pedidos.{formato}"'}
+    )
 
 
 # ==========================================================
 # 🧾 ROTA POST — Criação de um novo pedido
 # ==========================================================
 @order_router.post('/pedido')
-async def criar_pedido(pedido_schema: PedidoSchema, session: Session = Depends(pegar_sessao)):
+async def criar_pedido(
+    pedido_schema: PedidoSchema,
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual),
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255)
+):
     '''
     Cria um novo pedido no banco de dados.
 
@@ -55,16 +441,576 @@ async def criar_pedido(pedido_schema: PedidoSchema, session: Session = Depends(p
 
     A sessão de banco é injetada automaticamente via Depends(pegar_sessao),
     garantindo abertura e fechamento corretos da conexão.
+
+    Exige um token de acesso; usuários comuns só podem criar pedidos para si mesmos.
+
+    Com o cabeçalho Idempotency-Key (ex: um UUID gerado pelo cliente para cada pedido),
+    repetir a requisição (ex: após um timeout) devolve a resposta original, com o cabeçalho
+    'Idempotent-Replayed: true', sem criar outro pedido. A mesma chave com outro corpo
+    responde 422. As chaves valem por IDEMPOTENCIA_TTL segundos.
     '''
 
+    if not _pode_acessar(usuario_atual, pedido_schema.usuario):
+        raise HTTPException(status_code=403, detail='Sem permissão para criar pedidos para outro usuário.')
+
+    if idempotency_key is not None:
+        # Repetição de uma requisição já processada: devolve a resposta gravada
+        # (da memória ou da tabela de chaves), sem gravar nada no banco.
+        registro = pegar_registro_idempotencia()
+        hash_atual = hash_requisicao(pedido_schema.model_dump())
+        entrada = await registro.buscar(session, usuario_atual.id, idempotency_key)
+        if entrada is not None:
+            return responder_repeticao(entrada, hash_atual)
+
+    if idempotency_key is None and pegar_settings().pedidos_gravacao_em_grupo:
+        # Gravação em grupo: o pedido é gravado junto com os de outras requisições
+        # simultâneas, em uma única transação, e a rota aguarda o ID gerado.
+        # (Com Idempotency-Key, o pedido segue o caminho abaixo: a chave precisa ser
+        # gravada na mesma transação do pedido.)
+        id_pedido = await pegar_gravador_pedidos().gravar(pedido_schema.usuario)
+        return {'message': f'Pedido criado com sucesso. ID do pedido: {id_pedido}'}
+
     # Cria uma nova instância de Pedido usando os dados do schema.
     novo_pedido = Pedido(usuario=pedido_schema.usuario)
 
     # Adiciona o pedido à sessão (ainda não grava no banco).
     session.add(novo_pedido)
 
-    # Grava as alterações no banco (INSERT efetivo).
-    session.commit()
+    if idempotency_key is None:
+        # Grava as alterações no banco (INSERT efetivo), sem bloquear o event loop.
+        # O commit também invalida as listagens em cache do usuário (evento da sessão).
+        await session.commit()
+
+        # Retorna uma resposta de sucesso com o ID gerado do pedido.
+        return {'message': f'Pedido criado com sucesso. ID do pedido: {novo_pedido.id}'}
+
+    # Com Idempotency-Key: o INSERT do pedido gera o ID, e a resposta é gravada
+    # junto com a chave, na mesma transação do pedido.
+    await session.flush()
+    corpo = json.dumps({'message': f'Pedido criado com sucesso. ID do pedido: {novo_pedido.id}'}).encode('utf-8')
+    entrada = registro.gravar(session, usuario_atual.id, idempotency_key, hash_atual, 200, corpo)
+
+    try:
+        await session.commit()
+    except IntegrityError:
+        # Outra requisição com a mesma chave foi confirmada primeiro: este pedido é descartado
+        # e a resposta da outra requisição é devolvida.
+        await session.rollback()
+        entrada = await registro.buscar(session, usuario_atual.id, idempotency_key)
+        if entrada is None:
+            raise HTTPException(status_code=409, detail='Requisição com a mesma Idempotency-Key em andamento.')
+        return responder_repeticao(entrada, hash_atual)
+
+    registro.lembrar(usuario_atual.id, idempotency_key, entrada)
+    return Response(content=corpo, media_type='application/json')
+
+
+# ==========================================================
+# ➕➖ ROTAS — Itens de um pedido (total mantido incrementalmente)
+# ==========================================================
+def _ler_versao(if_match):
+    '''
+    Lê a versão esperada do pedido a partir do cabeçalho If-Match (ex: '3' ou '"3"').
+    '''
+
+    if if_match is None:
+        return None
 
-    # Retorna uma resposta de sucesso com o ID gerado do pedido.
-    return {'message': f'Pedido criado com sucesso. ID do pedido: {novo_pedido.id}'}
+    valor = if_match.strip()
+    if valor.startswith('W/'):
+        valor = valor[2:]
+    try:
+        return int(valor.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Cabeçalho If-Match inválido: informe a versão do pedido.')
+
+
+async def _ajustar_total(session: AsyncSession, id_pedido, delta, usuario_atual: UsuarioAutenticado, versao):
+    '''
+    Soma 'delta' ao total do pedido e incrementa sua versão, em um único UPDATE condicional.
+
+    O total nunca é recalculado a partir de todos os itens: como a soma é feita pelo próprio
+    banco (preco = preco + delta), alterações simultâneas no mesmo pedido não se sobrescrevem.
+    O UPDATE só afeta o pedido se ele estiver PENDENTE, pertencer ao usuário (exceto admin) e,
+    quando informada, estiver na versão esperada pelo cliente (concorrência otimista).
+
+    Retorna (preco, versao) após a alteração, ou lança 404/409 quando o UPDATE não se aplica.
+    '''
+
+    condicoes = [Pedido.id == id_pedido, Pedido.status == STATUS_PENDENTE]
+    if not usuario_atual.admin:
+        condicoes.append(Pedido.usuario == usuario_atual.id)
+    if versao is not None:
+        condicoes.append(Pedido.versao == versao)
+
+    resultado = await session.execute(
+        update(Pedido)
+        .where(*condicoes)
+        .values(preco=func.coalesce(Pedido.preco, 0) + delta, versao=Pedido.versao + 1)
+        .returning(Pedido.usuario, Pedido.preco, Pedido.versao)
+    )
+    linha = resultado.first()
+    if linha is not None:
+        # As respostas em cache do pedido e do seu dono são invalidadas no commit.
+        marcar_alteracao(session, usuarios=[linha.usuario], pedidos=[id_pedido])
+        return float(linha.preco), linha.versao
+
+    # Nenhuma linha alterada: descobre o motivo para responder com o erro adequado.
+    await session.rollback()
+    atual = (await session.execute(
+        select(Pedido.usuario, Pedido.status, Pedido.versao).where(Pedido.id == id_pedido)
+    )).first()
+
+    if atual is None or not _pode_acessar(usuario_atual, atual.usuario):
+        raise HTTPException(status_code=404, detail='Pedido não encontrado.')
+    if atual.status != STATUS_PENDENTE:
+        raise HTTPException(status_code=409, detail=f'Pedido {atual.status}: os itens não podem mais ser alterados.')
+    raise HTTPException(status_code=409, detail=f'O pedido foi alterado por outra requisição (versão atual: {atual.versao}).',
+                        headers={'ETag': f'"{atual.versao}"'})
+
+
+@order_router.post('/pedido/{id_pedido}/itens')
+async def adicionar_item(
+    id_pedido: int,
+    item_schema: ItemPedidoSchema,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Adiciona um item a um pedido PENDENTE e atualiza o total do pedido na mesma transação.
+
+    - If-Match (opcional): versão do pedido conhecida pelo cliente. Se o pedido tiver sido
+      alterado desde então, nada é gravado e a rota responde 409.
+
+    O total é ajustado pela diferença (quantidade x preço unitário do novo item), então o
+    custo não depende da quantidade de itens já existentes no pedido.
+
+    O sabor/tamanho precisa existir no catálogo, e o preço unitário é o do catálogo
+    (consultado no índice em memória, sem acessar o banco); fora do catálogo, responde 422.
+    '''
+
+    indice = await pegar_ou_carregar_indice()
+    itens, erro = indice.precificar([item_schema])
+    if erro:
+        raise HTTPException(status_code=422, detail=erro)
+    item_schema = itens[0]
+
+    delta = item_schema.quantidade * item_schema.preco_unitario
+    preco, versao = await _ajustar_total(session, id_pedido, delta, usuario_atual, _ler_versao(if_match))
+
+    novo_item = ItensPedido(
+        quantidade=item_schema.quantidade,
+        sabor=item_schema.sabor,
+        tamanho=item_schema.tamanho,
+        preco_unitario=item_schema.preco_unitario,
+        pedido=id_pedido
+    )
+    session.add(novo_item)
+    await session.commit()
+
+    response.headers['ETag'] = f'"{versao}"'
+    return {'id': id_pedido, 'item': novo_item.id, 'preco': preco, 'versao': versao}
+
+
+@order_router.delete('/pedido/{id_pedido}/itens/{id_item}')
+async def remover_item(
+    id_pedido: int,
+    id_item: int,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Remove um item de um pedido PENDENTE e desconta seu valor do total, na mesma transação.
+
+    - If-Match (opcional): versão do pedido conhecida pelo cliente (veja POST .../itens).
+    '''
+
+    # O DELETE devolve a quantidade e o preço do item removido, usados para calcular o desconto.
+    resultado = await session.execute(
+        delete(ItensPedido)
+        .where(ItensPedido.id == id_item, ItensPedido.pedido == id_pedido)
+        .returning(ItensPedido.quantidade, ItensPedido.preco_unitario)
+    )
+    removido = resultado.first()
+    if removido is None:
+        await session.rollback()
+        raise HTTPException(status_code=404, detail='Item não encontrado neste pedido.')
+
+    # Itens antigos podem não ter quantidade ou preço unitário (colunas opcionais): contam como 0.
+    delta = -((removido.quantidade or 0) * (removido.preco_unitario or 0))
+    preco, versao = await _ajustar_total(session, id_pedido, delta, usuario_atual, _ler_versao(if_match))
+    await session.commit()
+
+    response.headers['ETag'] = f'"{versao}"'
+    return {'id': id_pedido, 'item': id_item, 'preco': preco, 'versao': versao}
+
+
+# ==========================================================
+# 🚦 ROTAS — Status do pedido e fila de preparo
+# ==========================================================
+def _reserva_livre(usuario_atual: UsuarioAutenticado, agora):
+    # O pedido não está reservado, a reserva expirou ou pertence ao próprio usuário.
+    return or_(Pedido.reservado_ate.is_(None), Pedido.reservado_ate < agora, Pedido.reservado_por == usuario_atual.id)
+
+
+async def _alterar_status(session: AsyncSession, id_pedido, novo_status, usuario_atual: UsuarioAutenticado, versao):
+    '''
+    Muda o status do pedido com um único UPDATE condicional, sem ler o pedido antes.
+
+    O UPDATE só se aplica se o status atual for uma origem permitida para 'novo_status'
+    (TRANSICOES_STATUS), se o pedido pertencer ao usuário (exceto admin), se não estiver
+    reservado por outro usuário e, quando informada, se estiver na versão esperada.
+    Assim, duas requisições simultâneas nunca aplicam transições conflitantes: a segunda
+    não encontra mais o pedido no status de origem.
+
+    Retorna a nova versão do pedido, ou lança 404/409 quando o UPDATE não se aplica.
+    '''
+
+    origens = TRANSICOES_STATUS[novo_status]
+    agora = agora_utc()
+
+    condicoes = [Pedido.id == id_pedido, Pedido.status.in_(origens), _reserva_livre(usuario_atual, agora)]
+    if not usuario_atual.admin:
+        condicoes.append(Pedido.usuario == usuario_atual.id)
+    if versao is not None:
+        condicoes.append(Pedido.versao == versao)
+
+    resultado = await session.execute(
+        update(Pedido)
+        .where(*condicoes)
+        .values(status=novo_status, versao=Pedido.versao + 1, reservado_por=None, reservado_ate=None)
+        .returning(Pedido.usuario, Pedido.versao, Pedido.criado_em)
+    )
+    linha = resultado.first()
+    if linha is not None:
+        marcar_alteracao(session, usuarios=[linha.usuario], pedidos=[id_pedido])
+        # Pedido finalizado: soma os itens aos resumos de vendas, na mesma transação.
+        if novo_status == STATUS_FINALIZADO:
+            await acumular_vendas_pedido(session, id_pedido, linha.criado_em)
+        await session.commit()
+        return linha.versao
+
+    # Nenhuma linha alterada: descobre o motivo para responder com o erro adequado.
+    await session.rollback()
+    atual = (await session.execute(
+        select(Pedido.usuario, Pedido.status, Pedido.versao, Pedido.reservado_por, Pedido.reservado_ate)
+        .where(Pedido.id == id_pedido)
+    )).first()
+
+    if atual is None or not _pode_acessar(usuario_atual, atual.usuario):
+        raise HTTPException(status_code=404, detail='Pedido não encontrado.')
+    if atual.status not in origens:
+        raise HTTPException(status_code=409, detail=f'Pedido {atual.status}: não pode passar para {novo_status}.')
+    if atual.reservado_ate is not None and atual.reservado_ate >= agora and atual.reservado_por != usuario_atual.id:
+        raise HTTPException(status_code=409, detail='Pedido reservado para preparo por outro usuário.')
+    raise HTTPException(status_code=409, detail=f'O pedido foi alterado por outra requisição (versão atual: {atual.versao}).',
+                        headers={'ETag': f'"{atual.versao}"'})
+
+
+@order_router.post('/pedido/{id_pedido}/finalizar')
+async def finalizar_pedido(
+    id_pedido: int,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Marca um pedido PENDENTE como FINALIZADO (exige token de administrador).
+
+    - If-Match (opcional): versão do pedido conhecida pelo cliente.
+
+    Um pedido reservado na fila de preparo só pode ser finalizado por quem o reservou
+    (ou por qualquer administrador depois que a reserva expirar).
+    '''
+
+    if not usuario_atual.admin:
+        raise HTTPException(status_code=403, detail='Apenas administradores podem finalizar pedidos.')
+
+    versao = await _alterar_status(session, id_pedido, STATUS_FINALIZADO, usuario_atual, _ler_versao(if_match))
+
+    response.headers['ETag'] = f'"{versao}"'
+    return {'id': id_pedido, 'status': STATUS_FINALIZADO, 'versao': versao}
+
+
+@order_router.post('/pedido/{id_pedido}/cancelar')
+async def cancelar_pedido(
+    id_pedido: int,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Cancela um pedido PENDENTE. Usuários comuns só podem cancelar os próprios pedidos.
+
+    - If-Match (opcional): versão do pedido conhecida pelo cliente.
+
+    Pedidos já reservados para preparo por outro usuário não podem ser cancelados (409).
+    '''
+
+    versao = await _alterar_status(session, id_pedido, STATUS_CANCELADO, usuario_atual, _ler_versao(if_match))
+
+    response.headers['ETag'] = f'"{versao}"'
+    return {'id': id_pedido, 'status': STATUS_CANCELADO, 'versao': versao}
+
+
+@order_router.post('/fila/reservar')
+async def reservar_pedidos(
+    quantidade: int = Query(default=1, ge=1, le=100),
+    duracao: Optional[int] = Query(default=None, ge=1, le=86400),
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Reserva os próximos pedidos PENDENTES da fila de preparo (do mais antigo para o mais novo).
+
+    Parâmetros (query string):
+    - quantidade: quantos pedidos reservar (1 a 100).
+    - duracao (opcional): segundos de reserva (padrão: FILA_RESERVA_SEGUNDOS). Se o pedido
+      não for finalizado nesse tempo, ele volta para a fila e pode ser reservado de novo.
+
+    A reserva é feita por um único UPDATE condicional sobre os primeiros pedidos livres
+    (sem reserva ou com a reserva expirada). Como o UPDATE repete a condição de pedido
+    livre, dois workers reservando ao mesmo tempo nunca recebem o mesmo pedido; no
+    PostgreSQL, 'FOR UPDATE SKIP LOCKED' faz cada worker pular as linhas que outro
+    está reservando, em vez de esperar por elas. A busca usa o índice parcial
+    'ix_pedidos_fila', que contém apenas os pedidos PENDENTES.
+
+    Exige token de administrador (ex: workers da cozinha). Retorna os pedidos reservados,
+    que podem ser menos que 'quantidade' (ou nenhum) se a fila estiver vazia.
+    '''
+
+    if not usuario_atual.admin:
+        raise HTTPException(status_code=403, detail='Apenas administradores podem reservar pedidos da fila.')
+
+    agora = agora_utc()
+    reservado_ate = agora + timedelta(seconds=duracao or pegar_settings().fila_reserva_segundos)
+    livre = or_(Pedido.reservado_ate.is_(None), Pedido.reservado_ate < agora)
+
+    # O status é comparado com um valor literal (e não um parâmetro) para que o
+    # banco reconheça a condição do índice parcial e o use na busca.
+    proximos = (
+        select(Pedido.id)
+        .where(Pedido.status == literal_column(f"'{STATUS_PENDENTE}'"), livre)
+        .order_by(Pedido.id)
+        .limit(quantidade)
+        .with_for_update(skip_locked=True)
+    )
+
+    resultado = await session.execute(
+        update(Pedido)
+        .where(Pedido.id.in_(proximos), Pedido.status == STATUS_PENDENTE, livre)
+        .values(reservado_por=usuario_atual.id, reservado_ate=reservado_ate)
+        .returning(Pedido.id, Pedido.usuario, Pedido.preco, Pedido.versao)
+    )
+    reservados = sorted(
+        ({'id': linha.id, 'usuario': linha.usuario, 'preco': float(linha.preco or 0), 'versao': linha.versao}
+         for linha in resultado),
+        key=lambda p: p['id']
+    )
+    await session.commit()
+
+    return {
+        'pedidos': reservados,
+        'reservado_ate': reservado_ate.isoformat()
+    }
+
+
+# ==========================================================
+# 📥 ROTA POST — Importação de pedidos em lote
+# ==========================================================
+
+# Tipos de conteúdo aceitos para o formato NDJSON (um pedido JSON por linha).
+TIPOS_NDJSON = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+async def _ler_registros(request: Request):
+    '''
+    Lê os pedidos enviados no corpo da requisição, gerando pares (índice, registro).
+
+    - NDJSON: o corpo é lido em blocos, conforme chega, e cada linha é um pedido.
+      Assim, lotes muito grandes não precisam ficar inteiros na memória.
+    - JSON: o corpo deve ser uma lista de pedidos.
+    '''
+
+    tipo = request.headers.get('content-type', '').split(';')[0].strip().lower()
+
+    if tipo in TIPOS_NDJSON:
+        indice = 0
+        resto = b''
+        async for bloco in request.stream():
+            resto += bloco
+            *linhas, resto = resto.split(b'\n')
+            for linha in linhas:
+                if linha.strip():
+                    yield indice, linha
+                    indice += 1
+        if resto.strip():
+            yield indice, resto
+        return
+
+    try:
+        corpo = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Corpo da requisição não é um JSON válido.')
+
+    if not isinstance(corpo, list):
+        raise HTTPException(status_code=400, detail='O corpo deve ser uma lista de pedidos.')
+
+    for indice, registro in enumerate(corpo):
+        yield indice, registro
+
+
+def _validar_registro(registro):
+    '''
+    Valida um pedido do lote, retornando (schema, None) ou (None, mensagem de erro).
+    '''
+
+    try:
+        if isinstance(registro, bytes):
+            return PedidoLoteSchema.model_validate_json(registro), None
+        return PedidoLoteSchema.model_validate(registro), None
+    except ValidationError as erro:
+        mensagens = [f"{'.'.join(str(parte) for parte in e['loc']) or 'pedido'}: {e['msg']}" for e in erro.errors()]
+        return None, '; '.join(mensagens)
+
+
+async def _gravar_chunk(session: AsyncSession, chunk, resultados):
+    '''
+    Grava um conjunto de pedidos válidos em uma única transação.
+
+    - Os usuários de todo o chunk são conferidos com uma única consulta.
+    - Os pedidos são inseridos com um INSERT em lote (executemany) que devolve os IDs gerados.
+    - Os itens de todos os pedidos são inseridos com outro INSERT em lote.
+    - Um único commit é feito para o chunk inteiro.
+    '''
+
+    usuarios = {pedido.usuario for _, pedido in chunk}
+    consulta = await session.execute(select(Usuario.id).where(Usuario.id.in_(usuarios)))
+    existentes = set(consulta.scalars())
+
+    validos = []
+    for indice, pedido in chunk:
+        if pedido.usuario in existentes:
+            validos.append((indice, pedido))
+        else:
+            resultados.append({'indice': indice, 'erro': f'Usuário {pedido.usuario} não encontrado.'})
+
+    if not validos:
+        return
+
+    try:
+        # INSERT em lote dos pedidos; 'sort_by_parameter_order' garante que os IDs
+        # retornados estejam na mesma ordem dos pedidos enviados.
+        resultado = await session.execute(
+            insert(Pedido).returning(Pedido.id, sort_by_parameter_order=True),
+            [
+                {
+                    'usuario': pedido.usuario,
+                    'status': STATUS_PENDENTE,
+                    'preco': sum(item.quantidade * item.preco_unitario for item in pedido.itens),
+                }
+                for _, pedido in validos
+            ]
+        )
+        ids = resultado.scalars().all()
+
+        # INSERT em lote de todos os itens do chunk, já ligados aos IDs gerados.
+        itens = [
+            {
+                'quantidade': item.quantidade,
+                'sabor': item.sabor,
+                'tamanho': item.tamanho,
+                'preco_unitario': item.preco_unitario,
+                'pedido': id_pedido,
+            }
+            for id_pedido, (_, pedido) in zip(ids, validos)
+            for item in pedido.itens
+        ]
+        if itens:
+            await session.execute(insert(ItensPedido), itens)
+
+        # As listagens em cache dos usuários do chunk são invalidadas no commit.
+        marcar_alteracao(session, usuarios={pedido.usuario for _, pedido in validos})
+        await session.commit()
+
+    except SQLAlchemyError:
+        # Se o chunk falhar, nada dele é gravado; os demais chunks seguem normalmente.
+        await session.rollback()
+        for indice, _ in validos:
+            resultados.append({'indice': indice, 'erro': 'Falha ao gravar o pedido no banco de dados.'})
+        return
+
+    for id_pedido, (indice, _) in zip(ids, validos):
+        resultados.append({'indice': indice, 'id': id_pedido})
+
+
+@order_router.post('/lote')
+async def criar_pedidos_em_lote(
+    request: Request,
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Importa vários pedidos (com seus itens) em uma única requisição.
+
+    Corpo da requisição:
+    - JSON: uma lista de pedidos, ex: [{"usuario": 1, "itens": [{"quantidade": 2, "sabor": "calabresa",
+      "tamanho": "grande", "preco_unitario": 45.0}]}];
+    - NDJSON (Content-Type: application/x-ndjson): um pedido por linha, lido conforme chega.
+
+    Processo:
+    1. Cada pedido é validado individualmente (inclusive os itens, pelo catálogo de preços);
+       pedidos inválidos recebem uma mensagem de erro.
+    2. Os pedidos válidos são agrupados em chunks (LOTE_TAMANHO_CHUNK) e cada chunk é gravado
+       com INSERTs em lote e um único commit, em vez de um commit por pedido.
+    3. O retorno traz, para cada pedido (pela posição no lote), o ID criado ou o erro encontrado.
+
+    Usuários comuns só podem importar pedidos próprios; a importação de pedidos de
+    vários usuários (ex: integrações) exige um token de administrador.
+    '''
+
+    tamanho_chunk = pegar_settings().lote_tamanho_chunk
+    resultados = []
+    chunk = []
+
+    indice_precos = await pegar_ou_carregar_indice()
+
+    async for indice, registro in _ler_registros(request):
+        pedido, erro = _validar_registro(registro)
+        if erro:
+            resultados.append({'indice': indice, 'erro': erro})
+            continue
+
+        # Valida os itens e aplica os preços do catálogo (índice em memória).
+        itens, erro = indice_precos.precificar(pedido.itens)
+        if erro:
+            resultados.append({'indice': indice, 'erro': erro})
+            continue
+        pedido = pedido.model_copy(update={'itens': itens})
+
+        if not _pode_acessar(usuario_atual, pedido.usuario):
+            resultados.append({'indice': indice, 'erro': 'Sem permissão para criar pedidos para outro usuário.'})
+            continue
+
+        chunk.append((indice, pedido))
+        if len(chunk) >= tamanho_chunk:
+            await _gravar_chunk(session, chunk, resultados)
+            chunk = []
+
+    if chunk:
+        await _gravar_chunk(session, chunk, resultados)
+
+    resultados.sort(key=lambda r: r['indice'])
+    criados = sum(1 for r in resultados if 'id' in r)
+
+    return {
+        'criados': criados,
+        'erros': len(resultados) - criados,
+        'resultados': resultados
+    }
@@ -0,0 +1,102 @@
+# Importa as classes de data usadas no período do relatório.
+from datetime import date, timedelta
+
+# Importa o tipo Optional, usado nos filtros opcionais do relatório.
+from typing import Optional
+
+# Importa o APIRouter (para organizar rotas), Depends (para injeção de dependências),
+# HTTPException (para erros HTTP) e Query (para validar parâmetros da URL),
+# e o AsyncSession (para gerenciar a conexão assíncrona com o banco de dados).
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Importa os construtores de consultas do SQLAlchemy.
+from sqlalchemy import select, func
+
+# Importa a dependência de sessão e a que identifica o usuário autenticado.
+from dependencies import pegar_sessao, pegar_usuario_atual
+
+# Importa a representação do usuário autenticado (extraída do token).
+from security import UsuarioAutenticado
+
+# Importa o modelo de resposta das linhas do relatório.
+from schemas import VendasResumoResposta
+
+# Importa a tabela de resumos de vendas (mantida por resumos_vendas).
+from models import VendasDiarias, agora_utc
+
+
+# Cria um roteador específico para os relatórios.
+# - prefix: todas as rotas começam com "/reports".
+# - tags: define o agrupamento no Swagger UI (/docs).
+report_router = APIRouter(prefix='/reports', tags=['reports'])
+
+
+# Dimensões pelas quais o relatório pode ser agrupado.
+DIMENSOES = {
+    'dia': VendasDiarias.dia,
+    'sabor': VendasDiarias.sabor,
+    'tamanho': VendasDiarias.tamanho,
+}
+
+
+# ==========================================================
+# 📊 ROTA GET — Relatório de vendas por dia, sabor e tamanho
+# ==========================================================
+@report_router.get('/vendas', response_model=list[VendasResumoResposta])
+async def relatorio_vendas(
+    desde: Optional[date] = None,
+    ate: Optional[date] = None,
+    sabor: Optional[str] = None,
+    tamanho: Optional[str] = None,
+    agrupar_por: str = Query('dia,sabor,tamanho', description='dimensões separadas por vírgula: dia, sabor, tamanho'),
+    session: AsyncSession = Depends(pegar_sessao),
+    usuario_atual: UsuarioAutenticado = Depends(pegar_usuario_atual)
+):
+    '''
+    Retorna as vendas (unidades, receita e pedidos) dos pedidos finalizados (exige token de administrador).
+
+    Parâmetros:
+    - desde / ate: período, pelo dia (UTC) de criação dos pedidos (padrão: os últimos 30 dias).
+    - sabor / tamanho: filtros opcionais.
+    - agrupar_por: dimensões do agrupamento (ex: "dia" para o total diário, "sabor" para o
+      ranking de sabores no período). As dimensões fora do agrupamento vêm como null.
+
+    A consulta lê apenas a tabela de resumos (uma linha por dia × sabor × tamanho), e não
+    os pedidos e itens: o tempo de resposta não cresce com o histórico de pedidos.
+
+    Ao agrupar sem sabor/tamanho, 'pedidos' soma os pedidos de cada sabor/tamanho
+    (um pedido com dois sabores conta uma vez em cada um).
+    '''
+
+    if not usuario_atual.admin:
+        raise HTTPException(status_code=403, detail='Apenas administradores podem consultar os relatórios.')
+
+    dimensoes = [nome.strip() for nome in agrupar_por.split(',') if nome.strip()]
+    invalidas = [nome for nome in dimensoes if nome not in DIMENSOES]
+    if invalidas:
+        raise HTTPException(status_code=422, detail=f'Dimensões inválidas em agrupar_por: {", ".join(invalidas)}.')
+
+    # Os resumos são separados pelo dia UTC de criação dos pedidos (criado_em é gravado em UTC).
+    ate = ate or agora_utc().date()
+    desde = desde or ate - timedelta(days=29)
+
+    colunas = [DIMENSOES[nome].label(nome) for nome in dimensoes]
+    consulta = (
+        select(
+            *colunas,
+            func.sum(VendasDiarias.unidades).label('unidades'),
+            func.sum(VendasDiarias.receita).label('receita'),
+            func.sum(VendasDiarias.pedidos).label('pedidos'),
+        )
+        .where(VendasDiarias.dia >= desde, VendasDiarias.dia <= ate)
+        .group_by(*colunas)
+        .order_by(*colunas)
+    )
+    if sabor is not None:
+        consulta = consulta.where(VendasDiarias.sabor == sabor)
+    if tamanho is not None:
+        consulta = consulta.where(VendasDiarias.tamanho == tamanho)
+
+    resultado = await session.execute(consulta)
+    return [linha._asdict() for linha in resultado]
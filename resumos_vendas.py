@@ -0,0 +1,195 @@
+'''
+Resumos de vendas pré-calculados (tabela vendas_diarias: dia × sabor × tamanho).
+
+Os resumos são atualizados incrementalmente a cada pedido finalizado e podem ser
+reconstruídos por período a partir dos pedidos (ex: após importar um histórico ou
+corrigir dados diretamente no banco):
+
+    python -m resumos_vendas                                  # todo o histórico
+    python -m resumos_vendas --desde 2026-01-01 --ate 2026-01-31
+'''
+
+# Importa o 'argparse' e o 'asyncio', usados pelo comando de reconstrução.
+import argparse
+import asyncio
+
+# Importa as classes de data usadas nos períodos dos resumos.
+from datetime import date, datetime, time, timedelta
+
+# Importa os construtores de comandos do SQLAlchemy e os INSERTs com "upsert" de cada banco.
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+# Importa os modelos de pedidos, itens e do resumo de vendas, e o status de pedido finalizado.
+from models import Pedido, ItensPedido, PedidoArquivado, ItemPedidoArquivado, VendasDiarias, STATUS_FINALIZADO
+
+
+# Linhas gravadas por INSERT na reconstrução.
+TAMANHO_LOTE = 500
+
+
+def _dia(valor):
+    # O SQLite devolve date(...) como texto ('AAAA-MM-DD'); os demais bancos, como data.
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(valor)
+
+
+def _insert_acumulando(session, linhas):
+    '''
+    INSERT das linhas do resumo que, se o dia/sabor/tamanho já existir, soma os valores
+    às linhas existentes ("upsert" atômico, seguro com finalizações simultâneas).
+    Cada banco tem a própria sintaxe: ON CONFLICT (SQLite/PostgreSQL) ou
+    ON DUPLICATE KEY UPDATE (MySQL).
+    '''
+
+    dialeto = session.get_bind().dialect.name
+
+    if dialeto == 'mysql':
+        comando = mysql.insert(VendasDiarias).values(linhas)
+        return comando.on_duplicate_key_update(
+            unidades=VendasDiarias.unidades + comando.inserted.unidades,
+            receita=VendasDiarias.receita + comando.inserted.receita,
+            pedidos=VendasDiarias.pedidos + comando.inserted.pedidos,
+        )
+
+    if dialeto not in ('postgresql', 'sqlite'):
+        raise RuntimeError(f'Resumos de vendas não suportados no banco "{dialeto}".')
+
+    comando = (postgresql.insert if dialeto == 'postgresql' else sqlite.insert)(VendasDiarias).values(linhas)
+    return comando.on_conflict_do_update(
+        index_elements=[VendasDiarias.dia, VendasDiarias.sabor, VendasDiarias.tamanho],
+        set_={
+            'unidades': VendasDiarias.unidades + comando.excluded.unidades,
+            'receita': VendasDiarias.receita + comando.excluded.receita,
+            'pedidos': VendasDiarias.pedidos + comando.excluded.pedidos,
+        },
+    )
+
+
+async def acumular_vendas_pedido(session, id_pedido, criado_em):
+    '''
+    Soma os itens de um pedido recém-finalizado aos resumos do dia do pedido.
+
+    Deve ser chamada na mesma transação que finaliza o pedido: o resumo e o status
+    são confirmados (ou desfeitos) juntos. Os itens de um pedido finalizado não mudam
+    mais (as rotas de itens só alteram pedidos PENDENTES), então cada pedido é somado
+    uma única vez.
+    '''
+
+    itens = (await session.execute(
+        select(
+            ItensPedido.sabor,
+            ItensPedido.tamanho,
+            func.coalesce(func.sum(ItensPedido.quantidade), 0).label('unidades'),
+            func.coalesce(func.sum(ItensPedido.quantidade * ItensPedido.preco_unitario), 0).label('receita'),
+        )
+        .where(ItensPedido.pedido == id_pedido, ItensPedido.sabor.is_not(None), ItensPedido.tamanho.is_not(None))
+        .group_by(ItensPedido.sabor, ItensPedido.tamanho)
+    )).all()
+
+    # Mesmos critérios da reconstrução (_agregar_vendas): pedidos sem data e itens sem
+    # sabor/tamanho ficam fora dos resumos, e itens sem preço somam receita 0.
+    if not itens or criado_em is None:
+        return
+
+    dia = _dia(criado_em)
+    await session.execute(_insert_acumulando(session, [
+        {'dia': dia, 'sabor': item.sabor, 'tamanho': item.tamanho,
+         'unidades': item.unidades, 'receita': item.receita, 'pedidos': 1}
+        for item in itens
+    ]))
+
+
+def _agregar_vendas(modelo_pedido, modelo_item, desde, ate):
+    # Consulta que agrega os itens dos pedidos finalizados do período por dia × sabor × tamanho.
+    condicoes = [
+        modelo_pedido.status == STATUS_FINALIZADO,
+        modelo_pedido.criado_em.is_not(None),
+        modelo_item.sabor.is_not(None),
+        modelo_item.tamanho.is_not(None),
+    ]
+    if desde is not None:
+        condicoes.append(modelo_pedido.criado_em >= datetime.combine(desde, time.min))
+    if ate is not None:
+        condicoes.append(modelo_pedido.criado_em < datetime.combine(ate + timedelta(days=1), time.min))
+
+    dia = func.date(modelo_pedido.criado_em)
+    return (
+        select(
+            dia.label('dia'),
+            modelo_item.sabor,
+            modelo_item.tamanho,
+            func.coalesce(func.sum(modelo_item.quantidade), 0).label('unidades'),
+            func.coalesce(func.sum(modelo_item.quantidade * modelo_item.preco_unitario), 0).label('receita'),
+            func.count(modelo_item.pedido.distinct()).label('pedidos'),
+        )
+        .join(modelo_pedido, modelo_pedido.id == modelo_item.pedido)
+        .where(*condicoes)
+        .group_by(dia, modelo_item.sabor, modelo_item.tamanho)
+    )
+
+
+async def reconstruir_resumos(session, desde=None, ate=None):
+    '''
+    Recalcula os resumos do período [desde, ate] (datas; None = sem limite) a partir
+    dos pedidos finalizados, em uma única transação. Retorna as linhas gravadas.
+
+    Os pedidos já arquivados (tabelas de arquivo) também entram no cálculo. Um pedido
+    está sempre em apenas uma das tabelas, então as somas das duas podem ser juntadas.
+
+    O resultado agregado tem uma linha por dia × sabor × tamanho, então cabe em memória
+    mesmo com um histórico grande de pedidos. Durante a reconstrução, finalizações
+    simultâneas do mesmo período podem não ser contadas: prefira rodá-la fora do pico.
+    '''
+
+    condicoes_resumo = []
+    if desde is not None:
+        condicoes_resumo.append(VendasDiarias.dia >= desde)
+    if ate is not None:
+        condicoes_resumo.append(VendasDiarias.dia <= ate)
+
+    resumos = {}
+    for modelo_pedido, modelo_item in ((Pedido, ItensPedido), (PedidoArquivado, ItemPedidoArquivado)):
+        linhas = (await session.execute(_agregar_vendas(modelo_pedido, modelo_item, desde, ate))).all()
+        for linha in linhas:
+            chave = (_dia(linha.dia), linha.sabor, linha.tamanho)
+            resumo = resumos.setdefault(chave, {
+                'dia': chave[0], 'sabor': linha.sabor, 'tamanho': linha.tamanho,
+                'unidades': 0, 'receita': 0.0, 'pedidos': 0,
+            })
+            resumo['unidades'] += linha.unidades
+            resumo['receita'] += linha.receita
+            resumo['pedidos'] += linha.pedidos
+
+    await session.execute(delete(VendasDiarias).where(*condicoes_resumo))
+
+    resumos = list(resumos.values())
+    for inicio in range(0, len(resumos), TAMANHO_LOTE):
+        await session.execute(_insert_acumulando(session, resumos[inicio:inicio + TAMANHO_LOTE]))
+
+    await session.commit()
+    return len(resumos)
+
+
+async def _reconstruir(desde, ate):
+    from database import iniciar_banco, encerrar_banco, pegar_fabrica_sessoes
+
+    iniciar_banco()
+    try:
+        async with pegar_fabrica_sessoes()() as session:
+            return await reconstruir_resumos(session, desde, ate)
+    finally:
+        await encerrar_banco()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reconstrói os resumos de vendas (tabela vendas_diarias).')
+    parser.add_argument('--desde', type=date.fromisoformat, help='primeiro dia (AAAA-MM-DD); padrão: todo o histórico')
+    parser.add_argument('--ate', type=date.fromisoformat, help='último dia (AAAA-MM-DD); padrão: todo o histórico')
+    args = parser.parse_args()
+
+    total = asyncio.run(_reconstruir(args.desde, args.ate))
+    print(f'{total} linhas de resumo gravadas.')
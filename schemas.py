@@ -1,10 +1,13 @@
 # Importa a classe BaseModel, usada para criar esquemas de validação com o Pydantic.
 # Esses esquemas são usados pelo FastAPI para validar e tipar automaticamente os dados recebidos nas requisições.
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
 # Importa o tipo Optional, que permite indicar que um campo pode ser opcional (ou seja, pode ser None).
 from typing import Optional
 
+# Importa o tipo 'date', usado no dia das linhas do relatório de vendas.
+from datetime import date
+
 
 # Define o esquema (modelo) de dados usado para representar o usuário.
 # Este schema é usado, por exemplo, ao criar um novo usuário via API.
@@ -14,10 +17,18 @@ class UsuarioSchema(BaseModel):
     email: str
     senha: str
 
-    # Campos opcionais: ativo e admin.
-    # Por serem Optional, o cliente pode omitir esses valores ao enviar a requisição.
+    # O e-mail é normalizado (sem espaços nas pontas e em minúsculas), para que
+    # "Ana@Email.com" e "ana@email.com" sejam tratados como o mesmo usuário.
+    @field_validator('email')
+    @classmethod
+    def normalizar_email(cls, email):
+        return email.strip().lower()
+
+    # Campo opcional: ativo.
+    # Por ser Optional, o cliente pode omitir esse valor ao enviar a requisição.
+    # Não há campo 'admin': contas criadas pela API são sempre comuns, e o acesso de
+    # administrador é concedido fora da API (python -m administradores).
     ativo: Optional[bool]
-    admin: Optional[bool]
 
     # Configurações adicionais do Pydantic.
     class Config:
@@ -39,6 +50,35 @@ class PedidoSchema(BaseModel):
 
 
 
+class ItemPedidoSchema(BaseModel):
+    # Quantidade de unidades do item (precisa ser positiva).
+    quantidade: int = Field(gt=0)
+
+    # Sabor e tamanho do item (ex: "calabresa", "grande").
+    sabor: str
+    tamanho: str
+
+    # Preço de uma unidade do item. Com o catálogo de preços preenchido, o preço é
+    # definido pelo catálogo e o valor enviado pelo cliente é ignorado.
+    preco_unitario: Optional[float] = Field(default=None, ge=0)
+
+    class Config:
+        from_attributes = True
+
+
+
+class PedidoLoteSchema(BaseModel):
+    # ID do usuário responsável pelo pedido.
+    usuario: int
+
+    # Itens do pedido; o preço total do pedido é calculado a partir deles.
+    itens: list[ItemPedidoSchema] = []
+
+    class Config:
+        from_attributes = True
+
+
+
 class LoginSchema(BaseModel):
     # E-mail do usuário, usado como identificador único para login.
     email: str
@@ -46,6 +86,81 @@ class LoginSchema(BaseModel):
     # Senha do usuário em texto puro (será comparada com a senha criptografada no banco).
     senha: str
 
+    # Normaliza o e-mail da mesma forma que no cadastro.
+    @field_validator('email')
+    @classmethod
+    def normalizar_email(cls, email):
+        return email.strip().lower()
+
     class Config:
         # Permite converter automaticamente objetos ORM (SQLAlchemy) em modelos Pydantic.
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+
+class RefreshSchema(BaseModel):
+    # Token de renovação recebido no login.
+    refresh_token: str
+
+
+
+class ItemPedidoResposta(BaseModel):
+    # Item de um pedido, como retornado pela API.
+    id: int
+    quantidade: int
+    sabor: str
+    tamanho: str
+    preco_unitario: float
+
+    class Config:
+        from_attributes = True
+
+
+
+class PedidoResposta(BaseModel):
+    # Pedido com seus itens, como retornado pela API.
+    id: int
+    usuario: int
+    status: str
+    preco: float
+
+    # Versão do pedido (enviada no cabeçalho If-Match ao alterar os itens).
+    versao: int = 0
+
+    itens: list[ItemPedidoResposta] = []
+
+    class Config:
+        # Permite montar a resposta diretamente a partir do objeto 'Pedido' do SQLAlchemy.
+        from_attributes = True
+
+
+
+class PaginaPedidosResposta(BaseModel):
+    # Página da listagem detalhada de pedidos.
+    pedidos: list[PedidoResposta]
+
+    # Cursor a ser enviado para buscar a próxima página (None quando não há mais pedidos).
+    proximo_cursor: Optional[int] = None
+
+
+
+class VendasResumoResposta(BaseModel):
+    # Uma linha do relatório de vendas; as dimensões fora do agrupamento ficam como None.
+    dia: Optional[date] = None
+    sabor: Optional[str] = None
+    tamanho: Optional[str] = None
+
+    # Unidades vendidas, receita (quantidade × preço unitário) e pedidos finalizados.
+    unidades: int
+    receita: float
+    pedidos: int
+
+
+
+class ItemCatalogoSchema(BaseModel):
+    # Preço de uma unidade do sabor/tamanho e se ele pode ser pedido.
+    preco: float = Field(ge=0)
+    ativo: bool = True
+
+    class Config:
+        from_attributes = True
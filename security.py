@@ -0,0 +1,331 @@
+# Importa o asyncio, usado para aguardar o resultado das threads sem bloquear o event loop.
+import asyncio
+
+# Importa o módulo 'os', usado para reiniciar o pool de threads em processos filhos (fork).
+import os
+
+# Importa o 'dataclass', usado para representar o usuário extraído do token.
+from dataclasses import dataclass
+
+# Importa as classes de data/hora usadas na expiração dos tokens.
+from datetime import datetime, timedelta, timezone
+
+# Importa o pool de threads onde o bcrypt é executado.
+from concurrent.futures import ThreadPoolExecutor
+
+# Importa o HTTPException, usado para sinalizar sobrecarga (HTTP 429) às rotas.
+from fastapi import HTTPException
+
+# Importa as configurações da aplicação (pool de hash e parâmetros dos tokens).
+from config import pegar_settings
+
+# Importa o cache em memória usado para os tokens já verificados.
+from cache import CacheTTL
+
+
+# O bcrypt considera apenas os primeiros 72 bytes da senha.
+LIMITE_BYTES_BCRYPT = 72
+
+
+def criar_contexto_senhas(settings=None):
+    '''
+    Cria o contexto de criptografia usado no hash das senhas, com os parâmetros configurados.
+
+    - SENHA_ESQUEMAS: algoritmos aceitos, separados por vírgula. O primeiro é usado nos novos
+      hashes; os demais só são aceitos na verificação (ex: "argon2,bcrypt" migra do bcrypt
+      para o argon2 conforme os usuários fazem login).
+    - SENHA_BCRYPT_ROUNDS: custo do bcrypt (cada unidade a mais dobra o tempo de verificação).
+    - SENHA_ARGON2_*: custo de tempo, memória (KiB) e paralelismo do argon2.
+
+    Hashes gravados com outro algoritmo ou outro custo são marcados como desatualizados
+    e refeitos no próximo login (veja ServicoHash.verify_and_update).
+
+    O Passlib é importado apenas aqui, quando o serviço de hash é iniciado,
+    e não na importação do módulo (reduz o tempo de inicialização de cada worker).
+    '''
+
+    settings = settings or pegar_settings()
+    esquemas = [esquema.strip() for esquema in settings.senha_esquemas.split(',') if esquema.strip()]
+
+    # O argon2 é opcional: depende do pacote 'argon2-cffi' (pip install argon2-cffi).
+    if 'argon2' in esquemas:
+        try:
+            import argon2  # noqa: F401
+        except ImportError:
+            raise RuntimeError('SENHA_ESQUEMAS inclui argon2, mas o pacote argon2-cffi não está instalado.')
+
+    # Importa o contexto de criptografia do Passlib.
+    # O 'CryptContext' é utilizado para gerenciar algoritmos de hash de senhas (como bcrypt),
+    # facilitando a verificação e atualização de senhas com segurança.
+    from passlib.context import CryptContext
+
+    # Cria o contexto de criptografia com os algoritmos configurados.
+    # O parâmetro 'deprecated="auto"' marca como obsoletos todos os algoritmos exceto o primeiro,
+    # e 'min_rounds'/'max_rounds' iguais aos rounds fazem o Passlib considerar desatualizado
+    # qualquer hash bcrypt com outro custo (maior ou menor que o configurado).
+    rounds = settings.senha_bcrypt_rounds
+    return CryptContext(
+        schemes=esquemas,
+        deprecated='auto',
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+        argon2__time_cost=settings.senha_argon2_time_cost,
+        argon2__memory_cost=settings.senha_argon2_memory_cost,
+        argon2__parallelism=settings.senha_argon2_parallelism,
+    )
+
+
+# ===========================
+# 🔑 Serviço de hash de senhas
+# ===========================
+class ServicoHash:
+    '''
+    Executa o hash e a verificação de senhas em um pool de threads próprio.
+
+    O bcrypt é propositalmente lento (dezenas/centenas de milissegundos). Executá-lo
+    diretamente em uma rota 'async' trava o event loop e enfileira todas as outras
+    requisições atrás dele. Aqui, o cálculo roda em threads (o bcrypt libera o GIL,
+    então as threads usam núcleos diferentes) e o event loop fica livre.
+
+    - contexto: contexto do Passlib (padrão: criar_contexto_senhas()).
+    - max_workers: quantas operações de hash rodam ao mesmo tempo (padrão: HASH_WORKERS).
+    - tamanho_fila: quantas operações podem aguardar uma thread livre (padrão: HASH_FILA).
+      Quando o limite é atingido, a requisição é recusada com 429 (back-pressure),
+      em vez de acumular uma fila que só aumentaria a latência de todos.
+
+    O contexto e o pool de threads são criados em 'iniciar' (no início do lifespan da
+    aplicação) ou, fora da aplicação, na primeira senha processada.
+    '''
+
+    def __init__(self, contexto=None, max_workers=None, tamanho_fila=None):
+        self._contexto = contexto
+        self._max_workers = max_workers
+        self._tamanho_fila = tamanho_fila
+        self._limite = 0
+        self._pendentes = 0
+        self._executor = None
+
+    @property
+    def pendentes(self):
+        # Operações em execução + operações aguardando na fila.
+        return self._pendentes
+
+    def iniciar(self, settings=None):
+        '''
+        Cria o contexto de criptografia e o pool de threads, se ainda não existirem.
+        '''
+
+        if self._executor is None:
+            settings = settings or pegar_settings()
+            max_workers = self._max_workers or settings.hash_workers
+            tamanho_fila = self._tamanho_fila if self._tamanho_fila is not None else settings.hash_fila
+            self._limite = max_workers + tamanho_fila
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hash-senha')
+
+        if self._contexto is None:
+            self._contexto = criar_contexto_senhas(settings)
+
+    def _liberar(self, _futuro):
+        self._pendentes -= 1
+
+    async def _executar(self, funcao, *args):
+        if self._executor is None:
+            self.iniciar()
+
+        # Back-pressure: recusa a operação quando a fila já está cheia.
+        if self._pendentes >= self._limite:
+            raise HTTPException(
+                status_code=429,
+                detail='Servidor ocupado processando senhas. Tente novamente em instantes.',
+                headers={'Retry-After': '1'}
+            )
+
+        loop = asyncio.get_running_loop()
+        futuro = self._executor.submit(funcao, *args)
+
+        # O contador só é decrementado quando a thread termina de fato (mesmo que o cliente
+        # desista da requisição), para que o limite reflita o trabalho realmente em andamento.
+        self._pendentes += 1
+        futuro.add_done_callback(lambda f: loop.is_closed() or loop.call_soon_threadsafe(self._liberar, f))
+
+        return await asyncio.wrap_future(futuro)
+
+    async def hash(self, senha):
+        '''
+        Gera o hash da senha sem bloquear o event loop.
+        '''
+
+        return await self._executar(self._hash, senha)
+
+    async def verify(self, senha, senha_hash):
+        '''
+        Verifica a senha contra o hash armazenado sem bloquear o event loop.
+        '''
+
+        return await self._executar(self._verify, senha, senha_hash)
+
+    async def verify_and_update(self, senha, senha_hash):
+        '''
+        Verifica a senha e, se o hash armazenado usar um algoritmo ou custo diferente do
+        configurado, gera um novo hash com os parâmetros atuais.
+
+        Retorna (senha_valida, novo_hash); 'novo_hash' é None quando o hash está atualizado.
+        '''
+
+        return await self._executar(self._verify_and_update, senha, senha_hash)
+
+    # Executados nas threads do pool (o contexto já foi criado em 'iniciar').
+    def _ajustar(self, senha, esquema):
+        # Trunca a senha nos 72 bytes considerados pelo bcrypt, sem cortar um caractere ao meio.
+        # O mesmo ajuste é aplicado no hash e na verificação, então os dois sempre coincidem.
+        if esquema == 'bcrypt':
+            return senha.encode('utf-8')[:LIMITE_BYTES_BCRYPT].decode('utf-8', errors='ignore')
+        return senha
+
+    def _hash(self, senha):
+        return self._contexto.hash(self._ajustar(senha, self._contexto.default_scheme()))
+
+    def _verify(self, senha, senha_hash):
+        return self._contexto.verify(self._ajustar(senha, self._contexto.identify(senha_hash)), senha_hash)
+
+    def _verify_and_update(self, senha, senha_hash):
+        if not self._verify(senha, senha_hash):
+            return False, None
+        if self._contexto.needs_update(senha_hash):
+            return True, self._hash(senha)
+        return True, None
+
+    def reiniciar_apos_fork(self):
+        '''
+        Descarta o pool herdado do processo pai (chamado no processo filho após um fork).
+        '''
+
+        self._executor = None
+        self._pendentes = 0
+
+    def encerrar(self):
+        '''
+        Encerra o pool de threads (chamado no desligamento da aplicação).
+        '''
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# Instância única do serviço, compartilhada pelas rotas de autenticação.
+servico_hash = ServicoHash()
+
+# Threads não sobrevivem a um fork: o processo filho descarta o pool herdado
+# (e o contador de operações pendentes) e cria um novo na primeira senha processada.
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=servico_hash.reiniciar_apos_fork)
+
+
+# ===========================
+# 🎫 Tokens de acesso (JWT)
+# ===========================
+
+# Tipos de token emitidos no login.
+# - access: enviado em cada requisição (Authorization: Bearer ...), com validade curta.
+# - refresh: usado apenas em /auth/refresh para obter um novo token de acesso.
+TOKEN_ACESSO = 'access'
+TOKEN_REFRESH = 'refresh'
+
+
+@dataclass(frozen=True)
+class UsuarioAutenticado:
+    '''
+    Usuário identificado a partir de um token válido.
+
+    Os dados vêm das informações assinadas no próprio token, sem consulta ao banco.
+    '''
+
+    id: int
+    admin: bool
+
+
+# Tokens de acesso já verificados: evita repetir a decodificação e a checagem
+# da assinatura a cada requisição do mesmo cliente (criado no primeiro uso).
+_tokens_verificados = None
+
+
+def pegar_tokens_verificados():
+    global _tokens_verificados
+    if _tokens_verificados is None:
+        settings = pegar_settings()
+        _tokens_verificados = CacheTTL(tamanho_maximo=settings.token_cache_tamanho, ttl=settings.token_cache_ttl)
+    return _tokens_verificados
+
+
+def _chave_secreta():
+    chave = pegar_settings().secret_key
+    if not chave:
+        raise RuntimeError('SECRET_KEY não configurada: defina a variável no ambiente ou no arquivo .env.')
+    return chave
+
+
+def criar_token(id_usuario, admin=False, tipo=TOKEN_ACESSO, duracao=None):
+    '''
+    Gera um token JWT assinado para o usuário.
+
+    - tipo: TOKEN_ACESSO ou TOKEN_REFRESH.
+    - duracao: validade do token (padrão: TOKEN_ACESSO_MINUTOS ou TOKEN_REFRESH_DIAS).
+    '''
+
+    settings = pegar_settings()
+    if duracao is None:
+        if tipo == TOKEN_REFRESH:
+            duracao = timedelta(days=settings.token_refresh_dias)
+        else:
+            duracao = timedelta(minutes=settings.token_acesso_minutos)
+
+    agora = datetime.now(timezone.utc)
+    dados = {
+        'sub': str(id_usuario),
+        'adm': bool(admin),
+        'typ': tipo,
+        'iat': agora,
+        'exp': agora + duracao,
+    }
+    # Importa o módulo de JWT do python-jose apenas no primeiro token emitido ou verificado.
+    from jose import jwt
+    return jwt.encode(dados, _chave_secreta(), algorithm=settings.token_algoritmo)
+
+
+def verificar_token(token, tipo=TOKEN_ACESSO):
+    '''
+    Verifica a assinatura, a expiração e o tipo do token, retornando o usuário autenticado.
+
+    Tokens de acesso já verificados ficam em cache (até TOKEN_CACHE_TTL segundos, nunca
+    além da própria expiração do token), então a verificação repetida é apenas uma busca
+    em um dicionário. Lança HTTPException 401 se o token for inválido ou estiver expirado.
+    '''
+
+    if tipo == TOKEN_ACESSO:
+        usuario = pegar_tokens_verificados().get(token)
+        if usuario is not None:
+            return usuario
+
+    # Importa o módulo de JWT do python-jose, usado para verificar os tokens de acesso.
+    from jose import jwt, JWTError
+
+    settings = pegar_settings()
+    try:
+        dados = jwt.decode(token, _chave_secreta(), algorithms=[settings.token_algoritmo])
+    except JWTError:
+        raise HTTPException(status_code=401, detail='Token inválido ou expirado.',
+                            headers={'WWW-Authenticate': 'Bearer'})
+
+    if dados.get('typ') != tipo:
+        raise HTTPException(status_code=401, detail='Tipo de token inválido.',
+                            headers={'WWW-Authenticate': 'Bearer'})
+
+    usuario = UsuarioAutenticado(id=int(dados['sub']), admin=bool(dados.get('adm')))
+
+    if tipo == TOKEN_ACESSO:
+        restante = dados['exp'] - datetime.now(timezone.utc).timestamp()
+        pegar_tokens_verificados().set(token, usuario, ttl=restante)
+
+    return usuario
@@ -2,15 +2,85 @@
 # O Uvicorn é leve, rápido e otimizado para aplicações assíncronas.
 import uvicorn
 
+# Importa o 'argparse', usado para ler as opções de linha de comando do servidor.
+import argparse
+
+# Importa o 'importlib.util', usado para verificar se uvloop/httptools estão instalados.
+import importlib.util
+
+# Importa as configurações da aplicação (host, porta, workers e ajustes do servidor).
+from config import pegar_settings
+
+
+def _escolher(valor, modulo, preferido, alternativo):
+    '''
+    Resolve o valor 'auto' para a implementação mais rápida disponível.
+    Ex: loop 'auto' vira 'uvloop' se o pacote estiver instalado, ou 'asyncio' caso contrário.
+    '''
+
+    if valor != 'auto':
+        return valor
+    return preferido if importlib.util.find_spec(modulo) else alternativo
+
+
+def ler_argumentos():
+    settings = pegar_settings()
+
+    parser = argparse.ArgumentParser(description='Inicia a API de pedidos com o Uvicorn.')
+    parser.add_argument('--dev', action='store_true',
+                        help='modo desenvolvimento: um processo, apenas 127.0.0.1 e reinício automático (reload)')
+    parser.add_argument('--host', default=settings.servidor_host)
+    parser.add_argument('--porta', type=int, default=settings.servidor_porta)
+    parser.add_argument('--workers', type=int, default=settings.servidor_workers,
+                        help='processos atendendo requisições (padrão: um por núcleo de CPU)')
+    parser.add_argument('--loop', default=settings.servidor_loop, choices=['auto', 'uvloop', 'asyncio'])
+    parser.add_argument('--http', default=settings.servidor_http, choices=['auto', 'httptools', 'h11'])
+    parser.add_argument('--keep-alive', type=int, default=settings.servidor_keep_alive,
+                        help='segundos que uma conexão ociosa fica aberta para reuso')
+    parser.add_argument('--backlog', type=int, default=settings.servidor_backlog,
+                        help='conexões aguardando aceite na fila do sistema operacional')
+    parser.add_argument('--timeout-desligamento', type=int, default=settings.servidor_timeout_desligamento,
+                        help='segundos para concluir as requisições em andamento ao desligar')
+    parser.add_argument('--limite-concorrencia', type=int, default=settings.servidor_limite_concorrencia,
+                        help='conexões simultâneas por worker antes de responder 503 (0 = sem limite)')
+    return parser.parse_args()
+
 
 # Esse bloco garante que o código abaixo só será executado
-# quando o arquivo for executado diretamente (ex: python run.py).
+# quando o arquivo for executado diretamente (ex: python server.py).
 # Se o módulo for importado por outro script, o servidor NÃO será iniciado automaticamente.
 if __name__ == '__main__':
-    # Executa o servidor Uvicorn.
-    # Parâmetros:
-    # - 'main:app': indica o módulo e o nome da instância da aplicação FastAPI (main.py -> app)
-    # - host='127.0.0.1': define o endereço local onde o servidor ficará disponível.
-    # - port=8000: define a porta do servidor.
-    # - reload=True: ativa o "hot reload", ou seja, reinicia o servidor automaticamente ao detectar mudanças no código.
-    uvicorn.run('main:app', host='127.0.0.1', port=8000, reload=True)
+    args = ler_argumentos()
+
+    if args.dev:
+        # Modo desenvolvimento (comportamento original):
+        # - 'main:app': indica o módulo e o nome da instância da aplicação FastAPI (main.py -> app)
+        # - host='127.0.0.1': o servidor fica disponível apenas na máquina local.
+        # - reload=True: reinicia o servidor automaticamente ao detectar mudanças no código.
+        uvicorn.run('main:app', host='127.0.0.1', port=args.porta, reload=True)
+
+    else:
+        # Modo produção:
+        # - 'main:create_app' + factory=True: cada worker monta a própria aplicação pela fábrica.
+        # - workers: vários processos independentes, cada um com seu próprio event loop e
+        #   seus próprios engines de banco (criados no lifespan de cada processo), usando todos os núcleos.
+        # - loop/http: uvloop e httptools, quando instalados, reduzem o custo por requisição.
+        # - timeout_keep_alive/backlog: reuso de conexões e fila de conexões pendentes.
+        # - timeout_graceful_shutdown: ao receber SIGTERM, o servidor para de aceitar conexões
+        #   e aguarda as requisições em andamento terminarem (o lifespan então fecha os recursos).
+        # - access_log=False: o log de cada requisição custa caro sob carga; a latência
+        #   por rota continua disponível em /metrics.
+        uvicorn.run(
+            'main:create_app',
+            factory=True,
+            host=args.host,
+            port=args.porta,
+            workers=max(1, args.workers),
+            loop=_escolher(args.loop, 'uvloop', 'uvloop', 'asyncio'),
+            http=_escolher(args.http, 'httptools', 'httptools', 'h11'),
+            timeout_keep_alive=args.keep_alive,
+            backlog=args.backlog,
+            timeout_graceful_shutdown=args.timeout_desligamento,
+            limit_concurrency=args.limite_concorrencia or None,
+            access_log=False,
+        )